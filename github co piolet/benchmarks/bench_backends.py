@@ -0,0 +1,107 @@
+"""
+Accuracy and latency of each inference backend, per local text model.
+
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --models distilbert-base-uncased-finetuned-sst-2-english --backends pytorch int8
+
+Every backend runs the same fixed corpus (benchmarks/data/backend_corpus.json).
+Accuracy is measured against the fp32 PyTorch output: label agreement for
+classifiers, ROUGE-L F1 for generated text. Pick a backend per model with
+INFERENCE_BACKENDS="model=backend,...".
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.inference_backend import BACKENDS, load_pipeline
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "backend_corpus.json")
+
+# model -> (task, call kwargs, output field)
+MODELS = {
+    "facebook/bart-large-cnn": ("summarization", {"max_length": 80, "min_length": 20, "do_sample": False}, "summary_text"),
+    "google/flan-t5-base": ("text2text-generation", {"max_length": 64, "do_sample": False}, "generated_text"),
+    "distilbert-base-uncased-finetuned-sst-2-english": ("sentiment-analysis", {}, "label"),
+    "Helsinki-NLP/opus-mt-en-hi": ("translation", {}, "translation_text")
+}
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    """ROUGE-L F1 over whitespace tokens"""
+    a, b = candidate.lower().split(), reference.lower().split()
+    if not a or not b:
+        return float(a == b)
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(a), lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def prompt(task: str, text: str) -> str:
+    return f"Generate a question from: {text}" if task == "text2text-generation" else text
+
+
+def run_backend(model: str, backend: str, corpus):
+    task, kwargs, field = MODELS[model]
+    started = time.monotonic()
+    pipe = load_pipeline(task, model, backend)
+    load_seconds = time.monotonic() - started
+
+    pipe(prompt(task, corpus[0]), **kwargs)  # warm-up
+    outputs, latencies = [], []
+    for text in corpus:
+        started = time.monotonic()
+        result = pipe(prompt(task, text), **kwargs)
+        latencies.append(time.monotonic() - started)
+        outputs.append(result[0][field])
+    del pipe
+    gc.collect()
+    return outputs, latencies, load_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=list(MODELS))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--corpus", default=CORPUS)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    print(f"{'model':<50}{'backend':<9}{'load s':>8}{'p50 ms':>9}{'mean ms':>9}{'speedup':>9}{'accuracy':>10}")
+    for model in args.models:
+        task = MODELS[model][0]
+        baseline, baseline_latency = None, None
+        for backend in ["pytorch"] + [b for b in args.backends if b != "pytorch"]:
+            try:
+                outputs, latencies, load_seconds = run_backend(model, backend, corpus)
+            except Exception as e:
+                print(f"{model:<50}{backend:<9}  failed: {e}")
+                continue
+            mean = statistics.mean(latencies)
+            if baseline is None:
+                baseline, baseline_latency = outputs, mean
+            if task == "sentiment-analysis":
+                accuracy = sum(a == b for a, b in zip(outputs, baseline)) / len(baseline)
+            else:
+                accuracy = statistics.mean(rouge_l(a, b) for a, b in zip(outputs, baseline))
+            print(f"{model:<50}{backend:<9}{load_seconds:>8.1f}{1000 * statistics.median(latencies):>9.0f}"
+                  f"{1000 * mean:>9.0f}{baseline_latency / mean:>8.2f}x{accuracy:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Chapter segmentation speed and boundary accuracy on synthetic transcripts.
+
+    python benchmarks/bench_chapters.py --segments 1000 10000 50000
+
+Each synthetic transcript is a sequence of topics, each with its own
+vocabulary mixed with shared filler words; segments last 4 seconds.
+A detected boundary counts as correct within +/- 3 segments of a true one.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.chapter_extractor import ChapterExtractor
+
+FILLER = "the and so we will look at this which is what you can see here today".split()
+
+
+def synthetic_transcript(n_segments: int, n_topics: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocabularies = [
+        ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=7)) for _ in range(40)]
+        for _ in range(n_topics)
+    ]
+    cuts = sorted(rng.sample(range(20, n_segments - 20), n_topics - 1))
+    edges = [0] + cuts + [n_segments]
+    segments = []
+    for topic, (first, last) in enumerate(zip(edges, edges[1:])):
+        for i in range(first, last):
+            words = rng.choices(vocabularies[topic], k=6) + rng.choices(FILLER, k=6)
+            rng.shuffle(words)
+            segments.append({"start": 4.0 * i, "end": 4.0 * (i + 1), "text": " ".join(words)})
+    return segments, cuts
+
+
+def score(found, truth, tolerance=3):
+    hits = sum(any(abs(f - t) <= tolerance for t in truth) for f in found)
+    recalled = sum(any(abs(f - t) <= tolerance for f in found) for t in truth)
+    precision = hits / len(found) if found else 0.0
+    recall = recalled / len(truth) if truth else 1.0
+    return precision, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    extractor = ChapterExtractor()
+    print(f"{'segments':>9}{'topics':>8}{'best ms':>9}{'chapters':>10}{'precision':>11}{'recall':>8}")
+    for n in args.segments:
+        n_topics = min(25, max(2, n // 400))
+        segments, truth = synthetic_transcript(n, n_topics)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            chapters = extractor.segment_chapters(segments)
+            timings.append(time.perf_counter() - started)
+        found = [int(chapter["start_seconds"] // 4) for chapter in chapters[1:]]
+        precision, recall = score(found, truth)
+        print(f"{n:>9}{n_topics:>8}{1000 * min(timings):>9.1f}{len(chapters):>10}{precision:>11.2f}{recall:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Database round trips per job: write-through vs write-behind progress updates.
+
+    python benchmarks/bench_job_repository.py --jobs 50 --segments 120
+    python benchmarks/bench_job_repository.py --database-url postgresql://...
+
+Each simulated job emits the updates a real one does (status changes,
+one progress update per transcript segment and per analysis stage, then
+the result). Round trips = statements executed + commits.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from services.database import JobRepository, create_engine
+
+
+async def simulate_job(repository: JobRepository, job_id: str, segments: int, write_through: bool):
+    async def update(**fields):
+        if write_through:
+            repository.record(job_id, fields)
+            await repository.flush(job_id)
+        else:
+            await repository.update_job(job_id, fields)
+
+    await repository.create_job(job_id, {}, status="queued")
+    for status, progress in [("downloading", 0.0), ("extracting", 0.2), ("transcribing", 0.4)]:
+        await update(status=status, progress=progress)
+        await asyncio.sleep(random.uniform(0.01, 0.05))
+    for i in range(segments):
+        await update(progress=round(0.4 + 0.2 * (i + 1) / segments, 3))
+        await asyncio.sleep(random.uniform(0.001, 0.01))
+    await update(status="analyzing", progress=0.6)
+    for i in range(6):
+        await asyncio.sleep(random.uniform(0.01, 0.05))
+        await update(progress=round(0.6 + 0.4 * (i + 1) / 6, 3))
+    await update(status="completed", progress=1.0, result={"transcript": "..."})
+
+
+async def run(url: str, jobs: int, segments: int, write_through: bool, flush_ms: int):
+    engine = create_engine(url)
+    round_trips = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args):
+        round_trips["statements"] += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def count_commit(*args):
+        round_trips["commits"] += 1
+
+    repository = JobRepository(engine, flush_interval_ms=flush_ms)
+    await repository.init_db()
+    round_trips.update(statements=0, commits=0)
+
+    started = time.monotonic()
+    await asyncio.gather(*(
+        simulate_job(repository, f"{'wt' if write_through else 'wb'}-{i}", segments, write_through)
+        for i in range(jobs)
+    ))
+    await repository.close()
+    elapsed = time.monotonic() - started
+    return (round_trips["statements"] + round_trips["commits"]) / jobs, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--segments", type=int, default=60)
+    parser.add_argument("--flush-ms", type=int, default=500)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"{'mode':<14}{'round trips/job':>16}{'seconds':>10}")
+        for label, write_through in [("write-through", True), ("write-behind", False)]:
+            per_job, elapsed = asyncio.run(run(url, args.jobs, args.segments, write_through, args.flush_ms))
+            print(f"{label:<14}{per_job:>16.1f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
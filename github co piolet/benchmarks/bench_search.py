@@ -0,0 +1,66 @@
+"""
+Search index build time and query latency on synthetic lectures.
+
+    python benchmarks/bench_search.py --jobs 2000 --segments 300
+
+Each lecture draws its words from a Zipf-like vocabulary, so queries mix
+rare and very common terms. Latency is measured per query after the index
+is built; the index file goes to a temporary directory.
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search_index import SearchIndex
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9))) for _ in range(size)]
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words, cum_weights = vocabulary(50000, rng)
+    with tempfile.TemporaryDirectory() as root:
+        index = SearchIndex(os.path.join(root, "search.sqlite3"))
+        build = 0.0
+        for job in range(args.jobs):
+            segments = [
+                {"start": 4.0 * i, "end": 4.0 * (i + 1), "text": " ".join(rng.choices(words, cum_weights=cum_weights, k=12))}
+                for i in range(args.segments)
+            ]
+            started = time.perf_counter()
+            index.add_job(f"job-{job}", segments)
+            build += time.perf_counter() - started
+        print(f"indexed {args.jobs * args.segments} segments in {build:.1f} s "
+              f"({1000 * build / args.jobs:.1f} ms per job), {os.path.getsize(index.path) / 1e6:.0f} MB")
+
+        for label, match_all, pool in [("1 rare word", True, words[5000:]), ("2 mid words", True, words[100:2000]),
+                                       ("3 words, any", False, words[50:5000]), ("1 common word", True, words[:20])]:
+            timings = []
+            for _ in range(args.queries):
+                query = " ".join(rng.choices(pool, k=int(label[0])))
+                started = time.perf_counter()
+                index.search(query, match_all=match_all)
+                timings.append(1000 * (time.perf_counter() - started))
+            timings.sort()
+            print(f"{label:>14}: median {statistics.median(timings):6.1f} ms, "
+                  f"p95 {timings[int(0.95 * len(timings))]:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
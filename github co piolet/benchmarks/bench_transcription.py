@@ -0,0 +1,60 @@
+"""
+Realtime factor of chunked parallel transcription vs worker count.
+
+    python benchmarks/bench_transcription.py lecture.wav --workers 1 2 4 8
+
+RTF = processing seconds / audio seconds (lower is better).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.executor import InferencePool
+from services.transcriber import transcribe_parallel
+from services.utils import SAMPLE_RATE, load_audio_pcm
+
+
+async def run(audio, workers: int) -> float:
+    pool = InferencePool("whisper-chunks", workers, "process")
+    try:
+        # Warm-up: load the model in every worker before timing
+        await transcribe_parallel(audio[:SAMPLE_RATE * 5 * workers], pool=pool)
+        started = time.monotonic()
+        result = await transcribe_parallel(audio, pool=pool)
+        elapsed = time.monotonic() - started
+    finally:
+        pool.shutdown()
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="audio or video file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+
+    # Inherited by the spawned worker processes
+    os.environ["WHISPER_CPU_THREADS"] = str(args.threads_per_worker)
+
+    audio = load_audio_pcm(args.audio)
+    duration = len(audio) / SAMPLE_RATE
+    print(f"audio: {duration:.1f}s")
+    print(f"{'workers':>8} {'chunks':>7} {'seconds':>9} {'RTF':>7} {'speedup':>8} {'segments':>9}")
+
+    baseline = None
+    for workers in args.workers:
+        elapsed, result = asyncio.run(run(audio, workers))
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>8} {result['chunks']:>7} {elapsed:>9.1f} "
+            f"{elapsed / duration:>7.3f} {baseline / elapsed:>7.2f}x {len(result['segments']):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
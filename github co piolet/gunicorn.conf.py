@@ -0,0 +1,29 @@
+# Gunicorn settings for production.
+# With PRELOAD_MODELS set, the master imports the app and loads the listed
+# models once; forked workers then share the weights copy-on-write.
+import os
+
+from services.preload import log_memory_report, preload_models, selected_models
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+preload_app = bool(os.getenv("PRELOAD_MODELS"))
+
+# Tokenizer thread pools do not survive fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before workers fork
+    loaded = preload_models(selected_models())
+    if loaded:
+        server.log.info("Preloaded models: %s", ", ".join(loaded))
+    log_memory_report("master", log=server.log.info)
+
+
+def post_worker_init(worker):
+    # Startup report: how much of this worker's RSS is shared with the master
+    log_memory_report(f"worker {worker.pid}", log=worker.log.info)
@@ -1,31 +1,41 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-import os
+from typing import Optional, Dict, Any
 import json
+import uuid
+import asyncio
+import logging
+import time
 from datetime import datetime
 
-from services.downloader import download_media
-from services.transcriber import transcribe_audio
-from services.summarizer import generate_summaries
-from services.quiz_generator import QuizGenerator
-from services.sentiment_analyzer import SentimentAnalyzer
-from services.translator import Translator
-from services.chapter_extractor import ChapterExtractor
-from services.utils import (
-    validate_url,
-    extract_audio,
-    generate_thumbnail,
-    create_pdf_report
+from services.downloader import discard_upload, receive_form
+from services.executor import pool_metrics, run_in_pool, shutdown_pools
+from services.model_registry import registry
+from services.batching import batcher_metrics
+from services.preload import memory_report
+from services.events import format_sse
+from services.http_client import hf_api
+from services.cache import result_cache, hash_text
+from services.translation_memory import translation_memory
+from services.job_store import JOB_BACKEND, job_store
+from services.database import job_repository
+from services.artifacts import ARTIFACTS, artifact_store
+from services.search_index import search_index
+from services.processing import (
+    STAGES,
+    TERMINAL_STATUSES,
+    ensure_artifact,
+    ensure_report,
+    process_job,
+    translator
 )
 
-# Initialize services
-quiz_generator = QuizGenerator(os.getenv("HF_API_KEY"))
-sentiment_analyzer = SentimentAnalyzer(os.getenv("HF_API_KEY"))
-translator = Translator(os.getenv("HF_API_KEY"))
-chapter_extractor = ChapterExtractor()
+logger = logging.getLogger(__name__)
+
+# Inline jobs run as tasks on this process' event loop; keep references
+background_jobs = set()
 
 app = FastAPI(
     title="Summarize Anything AI",
@@ -44,124 +54,263 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Enhanced job processing
-async def process_job(job_id: str, request_data: dict, file: Optional[UploadFile] = None):
+@app.on_event("startup")
+async def init_database():
+    await job_repository.init_db()
+
+@app.on_event("shutdown")
+async def stop_worker_pools():
+    shutdown_pools()
+    await hf_api.close()
+    await job_repository.close()
+
+async def get_job_or_404(job_id: str, segments: bool = False) -> Dict[str, Any]:
+    job = await job_store.load(job_id, segments)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+def _log_job_failure(task: asyncio.Task):
+    background_jobs.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error("Job failed: %s", task.exception())
+
+@app.post("/api/v1/submit")
+async def submit_job(request: Request):
+    """
+    Submit a URL, uploaded file or raw text for processing.
+    Accepts JSON or multipart form data (type, url | file | text, options).
+    """
+    content_type = request.headers.get("content-type", "")
+    upload = None
+    if content_type.startswith("application/json"):
+        form = await request.json()
+    elif content_type.startswith("multipart/form-data"):
+        # Parsed as it streams in: the file goes to disk once, hashed and size-checked
+        form, upload = await receive_form(request)
+    else:
+        form = await request.form()
+
     try:
-        jobs[job_id]["status"] = "downloading"
-        if request_data.get("url"):
-            media_path = await download_media(request_data["url"])
-        else:
-            media_path = await save_upload(file)
-        jobs[job_id]["progress"] = 0.2
+        options = form.get("options") or {}
+        if isinstance(options, str):
+            try:
+                options = json.loads(options)
+            except ValueError:
+                raise HTTPException(400, "options must be a JSON object")
 
-        # Extract audio if needed
-        jobs[job_id]["status"] = "extracting"
-        if request_data["type"] == "video":
-            audio_path = await extract_audio(media_path)
-        else:
-            audio_path = media_path
-        jobs[job_id]["progress"] = 0.4
-
-        # Transcribe
-        jobs[job_id]["status"] = "transcribing"
-        transcript_data = await transcribe_audio(audio_path)
-        jobs[job_id]["progress"] = 0.6
-
-        # Extract chapters
-        chapters = await chapter_extractor.extract_chapters(
-            transcript_data["text"],
-            transcript_data["segments"]
-        )
-
-        # Generate summaries
-        jobs[job_id]["status"] = "summarizing"
-        summaries = await generate_summaries(
-            transcript_data["text"],
-            request_data.get("options", {}).get("models", ["facebook/bart-large-cnn"])
-        )
-        jobs[job_id]["progress"] = 0.7
-
-        # Generate quiz
-        quiz = await quiz_generator.generate_quiz(transcript_data["text"])
-        jobs[job_id]["progress"] = 0.8
-
-        # Analyze sentiment
-        sentiment = await sentiment_analyzer.analyze_sentiment(transcript_data["text"])
-        jobs[job_id]["progress"] = 0.9
-
-        # Detect language and translate if needed
-        source_lang = await translator.detect_language(transcript_data["text"])
-        translations = {}
-        
-        if source_lang != "en":
-            translations["en"] = await translator.translate(transcript_data["text"], "en")
+        request_data = {"type": form.get("type", "video"), "options": options}
+        if form.get("url"):
+            request_data["url"] = form["url"]
+        elif form.get("text"):
+            request_data["type"] = "text"
+            request_data["text"] = form["text"]
+        elif upload:
+            media_path, media_hash = upload
+            request_data.update(media_path=media_path, media_hash=media_hash)
+            upload = None
         else:
-            for lang in ["ta", "hi"]:
-                translations[lang] = await translator.translate(transcript_data["text"], lang)
-
-        # Store results
-        jobs[job_id].update({
-            "status": "completed",
-            "progress": 1.0,
-            "result": {
-                "transcript": transcript_data["text"],
-                "segments": transcript_data["segments"],
-                "chapters": chapters,
-                "summaries": summaries,
-                "quiz": quiz,
-                "sentiment": sentiment,
-                "translations": translations,
-                "language": source_lang
-            }
-        })
+            raise HTTPException(400, "Provide a url, file or text")
+    finally:
+        # A saved upload the job will not use (rejected, or a url/text won) is removed
+        if upload:
+            discard_upload(upload[0])
 
-    except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        raise
-
-# Update API endpoints to support new features
-@app.get("/api/v1/result/{job_id}/quiz")
-async def get_job_quiz(job_id: str):
-    """Get quiz questions for a specific job"""
-    if job_id not in jobs:
-        raise HTTPException(404, "Job not found")
-    
-    job = jobs[job_id]
-    if job["status"] != "completed":
-        raise HTTPException(400, f"Job is not completed (status: {job['status']})")
-    
-    return job["result"]["quiz"]
+    job_id = str(uuid.uuid4())
+    job_store.create(job_id, {
+        "status": "queued",
+        "progress": 0.0,
+        "created_at": datetime.utcnow().isoformat(),
+        "options": options,
+        "error": None
+    })
+    await job_repository.create_job(job_id, options, status="queued")
 
-@app.get("/api/v1/result/{job_id}/sentiment")
-async def get_job_sentiment(job_id: str):
-    """Get sentiment analysis for a specific job"""
-    if job_id not in jobs:
-        raise HTTPException(404, "Job not found")
-    
-    job = jobs[job_id]
-    if job["status"] != "completed":
-        raise HTTPException(400, f"Job is not completed (status: {job['status']})")
-    
-    return job["result"]["sentiment"]
+    if JOB_BACKEND == "celery":
+        from services.tasks import enqueue_job
+        enqueue_job(job_id, request_data)
+    else:
+        task = asyncio.create_task(process_job(job_id, request_data))
+        background_jobs.add(task)
+        task.add_done_callback(_log_job_failure)
 
-@app.get("/api/v1/result/{job_id}/chapters")
-async def get_job_chapters(job_id: str):
-    """Get chapters for a specific job"""
-    if job_id not in jobs:
-        raise HTTPException(404, "Job not found")
-    
-    job = jobs[job_id]
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/api/v1/status/{job_id}")
+async def get_job_status(job_id: str):
+    """Get status, overall progress and per-stage progress for a job"""
+    job = await get_job_or_404(job_id)
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "stage": job["status"],
+        "progress": job.get("progress", 0.0),
+        "stages": job.get("stages", {}),
+        "error": job.get("error")
+    }
+
+@app.get("/api/v1/events/{job_id}")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-sent events for a job: status/progress changes, transcript
+    segments as they decode and stage completions. The first event is a
+    snapshot so late subscribers can catch up.
+    """
+    await get_job_or_404(job_id)
+    subscription = job_store.subscribe(job_id)
+
+    async def events():
+        try:
+            # Read the snapshot only once the subscription is live, so no
+            # event falls in between
+            await subscription.__anext__()
+            job = await get_job_or_404(job_id, segments=True)
+            yield format_sse("snapshot", {
+                "status": job["status"],
+                "progress": job.get("progress", 0.0),
+                "stages": job.get("stages", {}),
+                "segments": job.get("segments") or (
+                    (await run_in_pool("default", artifact_store.get, job_id, "segments")).to_segments()
+                    if job["status"] == "completed" else []
+                )
+            })
+            if job["status"] in TERMINAL_STATUSES:
+                yield format_sse(job["status"], {"error": job.get("error")})
+                return
+
+            while not await request.is_disconnected():
+                item = await subscription.__anext__()
+                if item is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event, data = item
+                yield format_sse(event, data)
+                if event == "status" and data.get("status") in TERMINAL_STATUSES:
+                    yield format_sse(data["status"], {"error": data.get("error")})
+                    break
+        finally:
+            await subscription.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    """Worker pool queue depth, model registry counters and process memory"""
+    return {
+        "pools": pool_metrics(),
+        "models": registry.stats(),
+        "batching": batcher_metrics(),
+        "memory": memory_report(),
+        "result_cache": result_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+        "circuit_breakers": hf_api.stats(),
+        "database": job_repository.stats(),
+        "search_index": await run_in_pool("default", search_index.stats)
+    }
+
+async def get_completed_job(job_id: str) -> Dict[str, Any]:
+    job = await get_job_or_404(job_id)
     if job["status"] != "completed":
         raise HTTPException(400, f"Job is not completed (status: {job['status']})")
-    
-    return job["result"]["chapters"]
+    return job
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or f'"{etag}"' in [tag.strip() for tag in header.split(",")]
+
+async def artifact_response(request: Request, etag: str, load) -> Response:
+    """JSON body from load() (blocking), or 304 when the client's copy is current"""
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, max-age=0, must-revalidate"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    body = await run_in_pool("default", load)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/v1/result/{job_id}")
+async def get_job_result(job_id: str, request: Request):
+    """Get every artifact of a completed job as one JSON object"""
+    manifest = (await get_completed_job(job_id))["result"]
+    etag = hash_text("".join(manifest[name]["etag"] for name in sorted(manifest)))[:32]
+    return await artifact_response(request, etag, lambda: artifact_store.get_all_raw(job_id))
+
+@app.get("/api/v1/result/{job_id}/sizes")
+async def get_job_result_sizes(job_id: str):
+    """Raw and compressed size of each stored artifact"""
+    await get_completed_job(job_id)
+    return await run_in_pool("default", artifact_store.size_report, job_id)
+
+@app.get("/api/v1/result/{job_id}/segments/range")
+async def get_segment_range(job_id: str, start: float, end: float):
+    """Segments and text spoken between start and end seconds of a completed job"""
+    await get_completed_job(job_id)
+    segments = await run_in_pool("default", artifact_store.get, job_id, "segments")
+    first, last = segments.range_between(start, end)
+    return {
+        "start": start,
+        "end": end,
+        "segment_range": [first, last],
+        "text": segments.text_of(first, last),
+        "segments": segments[first:last].to_segments()
+    }
+
+@app.get("/api/v1/result/{job_id}/{artifact}")
+async def get_job_artifact(job_id: str, artifact: str, request: Request):
+    """
+    Get one artifact (quiz, sentiment, chapters, ...) of a completed job.
+    Artifacts not precomputed by the job are computed on first request.
+    Only that artifact's blob is read; conditional GETs are answered from
+    the manifest without reading it at all.
+    """
+    manifest = (await get_completed_job(job_id))["result"]
+    if artifact not in ARTIFACTS or (artifact not in manifest and artifact not in STAGES):
+        raise HTTPException(404, f"Unknown artifact: {artifact}")
+    if artifact not in manifest:
+        try:
+            manifest = await ensure_artifact(job_id, artifact)
+        except asyncio.TimeoutError:
+            raise HTTPException(504, f"Computing {artifact} timed out")
+        except Exception as e:
+            raise HTTPException(500, f"Computing {artifact} failed: {str(e)}")
+    return await artifact_response(
+        request, manifest[artifact]["etag"], lambda: artifact_store.get_raw(job_id, artifact)
+    )
+
+@app.get("/api/v1/search")
+async def search_transcripts(q: str, limit: int = 10, match: str = "all", job_id: Optional[str] = None):
+    """
+    Search the transcripts of completed jobs. Returns the best matching jobs
+    (BM25), each with its matching segments, timestamps and snippets.
+    match="all" requires every word in a segment, "any" at least one.
+    """
+    if match not in ("all", "any"):
+        raise HTTPException(400, "match must be 'all' or 'any'")
+    started = time.perf_counter()
+    results = await run_in_pool(
+        "default", search_index.search, q, min(max(limit, 1), 100), match == "all", job_id=job_id
+    )
+    return {"query": q, "results": results, "took_ms": round(1000 * (time.perf_counter() - started), 1)}
+
+@app.get("/api/v1/export/pdf/{job_id}")
+async def export_pdf(job_id: str):
+    """PDF report of a completed job, generated on first request"""
+    await get_completed_job(job_id)
+    try:
+        path = await ensure_report(job_id)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+    return FileResponse(path, media_type="application/pdf", filename=f"summary-{job_id}.pdf")
 
 @app.post("/api/v1/translate")
-async def translate_text(text: str, target_lang: str):
-    """Translate text to target language"""
+async def translate_text(text: str, target_lang: str, source_lang: Optional[str] = None):
+    """Translate text to target language; the source language is detected unless given"""
     try:
-        result = await translator.translate(text, target_lang)
+        result = await translator.translate(text, target_lang, source_lang)
         return result
     except Exception as e:
         raise HTTPException(400, str(e))
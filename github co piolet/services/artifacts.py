@@ -0,0 +1,196 @@
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, Optional
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import zstandard
+
+from services.segment_store import SegmentTable, chapter_text
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+ZSTD_LEVEL = int(os.getenv("ARTIFACT_ZSTD_LEVEL", "10"))
+
+# Result artifacts, each stored and served on its own
+ARTIFACTS = (
+    "transcript", "segments", "chapters", "summaries",
+    "quiz", "sentiment", "translations", "language"
+)
+# Artifacts kept in a compact binary form instead of JSON: name -> type
+BINARY_ARTIFACTS = {"segments": SegmentTable}
+
+
+class ArtifactStore:
+    """
+    Job results as one zstd-compressed JSON blob per artifact:
+    <root>/<job_id>/<name>.json.zst, plus a small manifest.json with each
+    blob's ETag and sizes so conditional requests never touch the blob.
+    Segments are stored as a serialized SegmentTable (<name>.bin.zst) and
+    converted to JSON only when served. Chapters are stored with only their
+    segment_range and get their "content" text back when served. Manifest updates hold an exclusive
+    lock on <job_id>/manifest.lock, because API workers, Celery workers and
+    lazy artifact requests may add artifacts to one job at the same time.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR, level: int = ZSTD_LEVEL):
+        self.root = root
+        self.level = level
+        self._local = threading.local()
+        self._manifest_lock = threading.Lock()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        # zstd contexts are not thread-safe; keep one per pool thread
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.compressor
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        self._compressor()
+        return self._local.decompressor
+
+    def _path(self, job_id: str, name: str) -> str:
+        if name not in ARTIFACTS:
+            raise KeyError(name)
+        extension = "bin" if name in BINARY_ARTIFACTS else "json"
+        return os.path.join(self.root, job_id, f"{name}.{extension}.zst")
+
+    def _manifest_path(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id, "manifest.json")
+
+    def _write(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _store(self, job_id: str, name: str, value: Any) -> Dict[str, Any]:
+        if name in BINARY_ARTIFACTS:
+            raw = BINARY_ARTIFACTS[name].from_segments(value).to_bytes()
+        else:
+            raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        compressed = self._compressor().compress(raw)
+        self._write(self._path(job_id, name), compressed)
+        return {
+            "etag": hashlib.sha256(raw).hexdigest()[:32],
+            "raw_bytes": len(raw),
+            "stored_bytes": len(compressed)
+        }
+
+    @contextmanager
+    def _locked_manifest(self, job_id: str) -> Iterator[None]:
+        """Serialize manifest read-modify-writes across threads and processes"""
+        with self._manifest_lock, open(os.path.join(self.root, job_id, "manifest.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file is closed
+            yield
+
+    def _add_to_manifest(self, job_id: str, entries: Dict[str, Dict]) -> Dict[str, Dict]:
+        with self._locked_manifest(job_id):
+            manifest = {**(self.manifest(job_id) or {}), **entries}
+            self._write(self._manifest_path(job_id), json.dumps(manifest).encode("utf-8"))
+        return manifest
+
+    def try_lock(self, job_id: str, name: str) -> Optional[IO]:
+        """
+        Take the exclusive lock on <job_id>/<name>.lock without waiting
+        (blocking I/O). Returns the lock file, which releases the lock when
+        closed, or None if another process or thread holds it.
+        """
+        os.makedirs(os.path.join(self.root, job_id), exist_ok=True)
+        lock = open(os.path.join(self.root, job_id, f"{name}.lock"), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    def put_all(self, job_id: str, artifacts: Dict[str, Any]) -> Dict[str, Dict]:
+        """Compress and store every artifact, then add them to the manifest (blocking)"""
+        os.makedirs(os.path.join(self.root, job_id), exist_ok=True)
+        entries = {name: self._store(job_id, name, value) for name, value in artifacts.items()}
+        return self._add_to_manifest(job_id, entries)
+
+    def put(self, job_id: str, name: str, value: Any) -> Dict[str, Dict]:
+        """Add one artifact to a stored job and return the new manifest (blocking)"""
+        os.makedirs(os.path.join(self.root, job_id), exist_ok=True)
+        return self._add_to_manifest(job_id, {name: self._store(job_id, name, value)})
+
+    def file_path(self, job_id: str, filename: str) -> str:
+        """Path for a non-JSON file kept with the job's artifacts (e.g. report.pdf)"""
+        return os.path.join(self.root, job_id, filename)
+
+    def put_file(self, job_id: str, filename: str, data: bytes) -> str:
+        path = self.file_path(job_id, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, data)
+        return path
+
+    def manifest(self, job_id: str) -> Optional[Dict[str, Dict]]:
+        try:
+            with open(self._manifest_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, job_id: str, name: str) -> bytes:
+        with open(self._path(job_id, name), "rb") as f:
+            return self._decompressor().decompress(f.read())
+
+    def get_raw(self, job_id: str, name: str, segments: Optional[SegmentTable] = None) -> bytes:
+        """
+        Decompressed JSON bytes of one artifact, ready to send (blocking).
+        segments, if already loaded, is reused to fill in chapter content.
+        """
+        if name in BINARY_ARTIFACTS:
+            table = segments if name == "segments" and segments is not None else self.get(job_id, name)
+            return json.dumps(table.to_segments(), ensure_ascii=False).encode("utf-8")
+        if name == "chapters":
+            segments = segments if segments is not None else self.get(job_id, "segments")
+            chapters = [
+                {**chapter, "content": chapter_text(chapter, segments)}
+                for chapter in json.loads(self._load(job_id, name))
+            ]
+            return json.dumps(chapters, ensure_ascii=False).encode("utf-8")
+        return self._load(job_id, name)
+
+    def get(self, job_id: str, name: str) -> Any:
+        """One artifact; binary ones come back in their compact form (blocking)"""
+        if name in BINARY_ARTIFACTS:
+            return BINARY_ARTIFACTS[name].from_bytes(self._load(job_id, name))
+        return json.loads(self._load(job_id, name))
+
+    def get_all_raw(self, job_id: str) -> bytes:
+        """All artifacts as one JSON object, spliced without re-parsing (blocking)"""
+        manifest = self.manifest(job_id) or {}
+        segments = self.get(job_id, "segments") if "segments" in manifest else None
+        parts = [
+            json.dumps(name).encode("utf-8") + b":" + self.get_raw(job_id, name, segments)
+            for name in manifest
+        ]
+        return b"{" + b",".join(parts) + b"}"
+
+    def size_report(self, job_id: str) -> Optional[Dict[str, Any]]:
+        manifest = self.manifest(job_id)
+        if manifest is None:
+            return None
+        raw = sum(item["raw_bytes"] for item in manifest.values())
+        stored = sum(item["stored_bytes"] for item in manifest.values())
+        return {
+            "artifacts": {
+                name: {"raw_bytes": item["raw_bytes"], "stored_bytes": item["stored_bytes"]}
+                for name, item in manifest.items()
+            },
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "compression_ratio": round(raw / stored, 2) if stored else None
+        }
+
+    def delete(self, job_id: str):
+        shutil.rmtree(os.path.join(self.root, job_id), ignore_errors=True)
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,183 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import os
+import time
+
+from services.executor import run_in_pool
+
+# Defaults for every batcher; a few milliseconds of waiting buys a full batch
+# under load and costs almost nothing when idle
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+# Padded batch budget: batch size x longest input, in (estimated) tokens
+BATCH_MAX_TOKENS = int(os.getenv("BATCH_MAX_TOKENS", "16384"))
+
+RunBatch = Callable[[List[Any]], List[Any]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _bucket(size: int) -> str:
+    """Power-of-two histogram bucket label for a batch size"""
+    upper = 1
+    while upper < size:
+        upper *= 2
+    lower = upper // 2 + 1
+    return str(upper) if lower >= upper else f"{lower}-{upper}"
+
+
+class _LoopState:
+    def __init__(self):
+        self.pending: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+
+
+class MicroBatcher:
+    """
+    Dynamic batching in front of one blocking batch function.
+    Concurrent submit() calls (from any job) are collected for up to
+    max_wait_ms, or until max_batch items or the padded token budget is
+    reached, then run as one call in the given worker pool; each caller
+    gets back its own item's result.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: RunBatch,
+        pool: str,
+        max_batch: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        max_tokens: int = BATCH_MAX_TOKENS,
+        cost: Callable[[Any], int] = estimate_tokens
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_tokens = max_tokens
+        self.cost = cost
+        self._states: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Dict[str, int] = {}
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+        self._recent_delays: deque = deque(maxlen=1000)
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            # Forget loops that have been closed (e.g. one per asyncio.run())
+            self._states = {l: s for l, s in self._states.items() if not l.is_closed()}
+            state = self._states[loop] = _LoopState()
+        if state.worker is None or state.worker.done():
+            state.worker = loop.create_task(self._collect(state))
+        return state
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one input and wait for its result"""
+        state = self._state()
+        future = asyncio.get_running_loop().create_future()
+        state.pending.append((item, self.cost(item), time.monotonic(), future))
+        state.wakeup.set()
+        return await future
+
+    def _take_batch(self, state: _LoopState) -> List:
+        batch, longest = [], 0
+        while state.pending and len(batch) < self.max_batch:
+            cost = state.pending[0][1]
+            if batch and max(longest, cost) * (len(batch) + 1) > self.max_tokens:
+                break
+            longest = max(longest, cost)
+            batch.append(state.pending.popleft())
+        return batch
+
+    def _is_full(self, state: _LoopState) -> bool:
+        if len(state.pending) >= self.max_batch:
+            return True
+        longest = max(cost for _, cost, _, _ in state.pending)
+        return longest * len(state.pending) >= self.max_tokens
+
+    async def _collect(self, state: _LoopState):
+        while True:
+            if not state.pending:
+                state.wakeup.clear()
+                await state.wakeup.wait()
+
+            # Wait for more callers, up to max_wait after the oldest arrived
+            deadline = state.pending[0][2] + self.max_wait
+            while not self._is_full(state):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                state.wakeup.clear()
+                try:
+                    await asyncio.wait_for(state.wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch(state)
+            await self._run(batch)
+
+    async def _run(self, batch: List):
+        started = time.monotonic()
+        for _, _, queued_at, _ in batch:
+            delay = started - queued_at
+            self.total_delay += delay
+            self.max_delay = max(self.max_delay, delay)
+            self._recent_delays.append(delay)
+        self.batches += 1
+        self.items += len(batch)
+        bucket = _bucket(len(batch))
+        self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+
+        try:
+            results = await run_in_pool(self.pool, self.run_batch, [item for item, _, _, _ in batch])
+            if len(results) != len(batch):
+                raise Exception(f"{self.name} returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        delays = sorted(self._recent_delays)
+        return {
+            "pool": self.pool,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items(), key=lambda kv: int(kv[0].split("-")[-1]))),
+            "queue_delay_ms": {
+                "mean": round(1000 * self.total_delay / self.items, 2) if self.items else 0.0,
+                "p95": round(1000 * delays[int(0.95 * (len(delays) - 1))], 2) if delays else 0.0,
+                "max": round(1000 * self.max_delay, 2)
+            }
+        }
+
+
+_batchers: Dict[str, MicroBatcher] = {}
+
+
+def get_batcher(name: str, run_batch: RunBatch, pool: str, **options) -> MicroBatcher:
+    """The shared batcher called name, created on first use"""
+    if name not in _batchers:
+        _batchers[name] = MicroBatcher(name, run_batch, pool, **options)
+    return _batchers[name]
+
+
+def batcher_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
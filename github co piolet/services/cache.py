@@ -0,0 +1,147 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from services.executor import run_in_pool
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache")
+CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "2048"))
+# Bump to invalidate every cached artifact after a change in stage output format
+CACHE_VERSION = 2
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in chunks (blocking)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_bytes(data) -> str:
+    """SHA-256 of any bytes-like object, e.g. a decoded PCM array (blocking)"""
+    return hashlib.sha256(memoryview(data).cast("B")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent content-addressed cache for pipeline artifacts.
+    Each stage's output is stored as its own JSON file under
+    <root>/<stage>/<key[:2]>/<key>.json, keyed by the hash of its input
+    content plus model IDs and parameters. When the cache grows past
+    max_bytes, the least recently used files are removed.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_mb: float = CACHE_MAX_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, stage: str, input_hash: str, **params) -> str:
+        """Cache key for a stage run on input_hash with the given models/params"""
+        raw = json.dumps(
+            {"v": CACHE_VERSION, "stage": stage, "input": input_hash, "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, stage, key[:2], f"{key}.json")
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        """Cached value or None (blocking)"""
+        path = self._path(stage, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+            self.hits += 1
+            return value
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+    def put(self, stage: str, key: str, value: Any):
+        """Store a value atomically and evict if over budget (blocking)"""
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size = (self._size if self._size is not None else self._scan_size()) + size
+            if self.max_bytes and self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".json"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict(self):
+        """Remove least recently used files until 90% of the budget is free"""
+        entries = sorted(self._files())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                pass
+        self._size = total
+
+    async def get_or_compute(self, stage: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, or compute, store and return it"""
+        value = await run_in_pool("default", self.get, stage, key)
+        if value is not None:
+            return value
+        value = await compute()
+        if value is not None:
+            try:
+                await run_in_pool("default", self.put, stage, key, value)
+            except Exception as e:
+                logger.warning("Could not cache %s result: %s", stage, e)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size_mb": round((self._size or 0) / 2**20, 1),
+            "max_mb": round(self.max_bytes / 2**20, 1)
+        }
+
+
+result_cache = ResultCache()
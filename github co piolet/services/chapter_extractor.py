@@ -1,61 +1,104 @@
 from typing import List, Dict
+from collections import Counter
+from itertools import chain
+import os
 import re
 from datetime import timedelta
 
+from services.executor import run_in_pool
+from services.topic_segmentation import find_boundaries, tokenize
+
+# Topic boundaries are at least this far apart, and there is at most one
+# chapter per CHAPTER_MIN_SECONDS of media
+CHAPTER_MIN_SECONDS = float(os.getenv("CHAPTER_MIN_SECONDS", "90"))
+MAX_CHAPTERS = int(os.getenv("MAX_CHAPTERS", "30"))
+
+# Explicit chapter markers, compiled once. They must open the segment, and a
+# bare number only counts as "1. Title" (not "3.5 million")
+_MARKER = re.compile(
+    r"^\s*(?:(?:chapter|section|part|topic)\s+(?:\d+|[ivx]+|one|two|three|four|five|six|seven|eight|nine|ten)\b"
+    r"|\d{1,2}\.\s+(?-i:[A-Z])"
+    r"|(?:introduction|conclusion)\b)",
+    re.IGNORECASE
+)
+
 class ChapterExtractor:
     def __init__(self):
         self.timestamp_pattern = re.compile(r'(\d{2}):(\d{2}):(\d{2})|(\d{2}):(\d{2})')
 
     async def extract_chapters(self, transcript: str, segments: List[Dict]) -> List[Dict]:
         """Extract chapters from transcript with timestamps"""
-        chapters = []
-        current_chapter = {"title": "Introduction", "start": 0.0, "end": 0.0, "content": ""}
-        
-        for segment in segments:
-            text = segment["text"]
-            start_time = segment["start"]
-            end_time = segment["end"]
+        if not segments:
+            return []
+        return await run_in_pool("default", self.segment_chapters, segments)
 
-            # Update current chapter end time
-            current_chapter["end"] = end_time
-            
-            # Check for potential chapter markers
-            if self._is_chapter_marker(text):
-                # Save previous chapter
-                if current_chapter["content"]:
-                    chapters.append(current_chapter)
-                
-                # Start new chapter
-                current_chapter = {
-                    "title": self._extract_chapter_title(text),
-                    "start": start_time,
-                    "end": end_time,
-                    "content": text
-                }
-            else:
-                current_chapter["content"] += " " + text
+    def segment_chapters(self, segments: List[Dict]) -> List[Dict]:
+        """
+        Split segments into chapters at explicit markers and at topic shifts
+        found by lexical cohesion (blocking, linear in the number of segments).
+        """
+        token_lists = [tokenize(segment["text"]) for segment in segments]
+        markers = [i for i, segment in enumerate(segments) if self._is_chapter_marker(segment["text"])]
+        boundaries = self.find_boundaries(segments, token_lists, markers)
+
+        chapters = []
+        marked = set(markers)
+        edges = [0] + boundaries + [len(segments)]
+        for first, last in zip(edges, edges[1:]):
+            if first < last:
+                chapters.append(self.build_chapter(segments[first:last], token_lists[first:last], first,
+                                                   marked=first in marked, opening=first == 0))
+        return chapters
 
-        # Add final chapter
-        if current_chapter["content"]:
-            chapters.append(current_chapter)
+    def find_boundaries(self, segments: List[Dict], token_lists: List[List[str]], markers: List[int]) -> List[int]:
+        """Indices of the segments (other than the first) that start a chapter"""
+        duration = segments[-1]["end"] - segments[0]["start"]
+        max_boundaries = min(MAX_CHAPTERS - 1, int(duration // CHAPTER_MIN_SECONDS))
+        boundaries, _ = find_boundaries(
+            token_lists,
+            [segment["start"] for segment in segments],
+            min_seconds=CHAPTER_MIN_SECONDS,
+            max_boundaries=max_boundaries,
+            forced=markers
+        )
+        return boundaries
 
-        return self._format_chapters(chapters)
+    def build_chapter(
+        self,
+        segments: List[Dict],
+        token_lists: List[List[str]],
+        first: int,
+        marked: bool,
+        opening: bool
+    ) -> Dict:
+        """
+        One formatted chapter from its segments, which start at index first
+        of the transcript. The chapter refers to them by index range instead
+        of copying their text (see segment_store.chapter_text). It is titled
+        after its marker, "Introduction" when it opens the media, else by keywords.
+        """
+        if marked:
+            title = self._extract_chapter_title(segments[0]["text"])
+        elif opening:
+            title = "Introduction"
+        else:
+            title = self._keyword_title(token_lists)
+        return self._format_chapters([{
+            "title": title,
+            "start": segments[0]["start"],
+            "end": segments[-1]["end"],
+            "segment_range": [first, first + len(segments)]
+        }])[0]
 
     def _is_chapter_marker(self, text: str) -> bool:
         """Detect if text segment is likely a chapter marker"""
-        # Check for common chapter indicators
-        chapter_indicators = [
-            r"chapter \d+",
-            r"section \d+",
-            r"part \d+",
-            r"topic \d*:?",
-            r"\d+\.",
-            r"introduction",
-            r"conclusion"
-        ]
-        
-        pattern = "|".join(chapter_indicators)
-        return bool(re.search(pattern, text.lower()))
+        return bool(_MARKER.match(text))
+
+    def _keyword_title(self, token_lists: List[List[str]]) -> str:
+        """Title from the chapter's most frequent content words"""
+        counts = Counter(chain.from_iterable(token_lists))
+        words = [word.capitalize() for word, _ in counts.most_common() if len(word) > 3][:3]
+        return ", ".join(words) or "Untitled"
 
     def _extract_chapter_title(self, text: str) -> str:
         """Extract chapter title from text"""
@@ -83,7 +126,7 @@ class ChapterExtractor:
                 "start_time": str(timedelta(seconds=int(start_time))),
                 "end_time": str(timedelta(seconds=int(end_time))),
                 "duration": str(timedelta(seconds=int(duration))),
-                "content": chapter["content"].strip(),
+                "segment_range": chapter["segment_range"],
                 "start_seconds": start_time,
                 "end_seconds": end_time
             })
@@ -1,12 +1,23 @@
-from sqlalchemy import create_engine, Column, String, Float, DateTime, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Column, String, Float, DateTime, JSON, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+import asyncio
+import logging
 import os
+import threading
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./summarize_anything.db")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# How long progress/status updates are coalesced in memory before a write
+FLUSH_INTERVAL_MS = int(os.getenv("DB_FLUSH_INTERVAL_MS", "500"))
+
+TERMINAL_STATUSES = ("completed", "failed")
+
 Base = declarative_base()
 
 class Job(Base):
@@ -18,40 +29,175 @@ class Job(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     options = Column(JSON)
+    # Manifest of the job's artifact blobs (see services/artifacts.py)
     result = Column(JSON)
     error = Column(String, nullable=True)
 
+JOB_COLUMNS = ("status", "progress", "options", "result", "error")
+
+def async_database_url(url: str) -> str:
+    """Map a plain database URL onto its async driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+def create_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        # SQLite has no server to pool connections to
+        return create_async_engine(url)
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True
+    )
+
+def _job_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "options": job.options,
+        "result": job.result,
+        "error": job.error
+    }
+
 class JobRepository:
-    def __init__(self):
-        self.db = SessionLocal()
-
-    async def create_job(self, job_id: str, options: dict):
-        job = Job(
-            id=job_id,
-            status="initializing",
-            progress=0.0,
-            options=options
-        )
-        self.db.add(job)
-        await self.db.commit()
-        return job
-
-    async def update_job(self, job_id: str, updates: dict):
-        job = self.db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            for key, value in updates.items():
-                setattr(job, key, value)
-            await self.db.commit()
-        return job
-
-    async def get_job(self, job_id: str):
-        return self.db.query(Job).filter(Job.id == job_id).first()
-
-    async def list_jobs(self, limit: int = 50, offset: int = 0):
-        return self.db.query(Job).order_by(Job.created_at.desc()).offset(offset).limit(limit).all()
-
-    def __del__(self):
-        self.db.close()
-
-# Create tables
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """
+    Durable job records on a pooled async engine.
+    Progress and status updates are merged per job in memory and written
+    behind every flush_interval_ms, one UPDATE per job per flush; terminal
+    states and results are written through immediately. Updates may come
+    from worker threads as well as the loop, so _pending is only touched
+    under a threading lock.
+    """
+
+    def __init__(self, engine: Optional[AsyncEngine] = None, flush_interval_ms: int = FLUSH_INTERVAL_MS):
+        self.engine = engine or create_engine()
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.writes = 0
+        self.flushes = 0
+        self.initialized = False
+
+    async def init_db(self):
+        """Create tables (run at startup, not at import)"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.initialized = True
+
+    async def create_job(self, job_id: str, options: dict, status: str = "initializing") -> Dict[str, Any]:
+        if not self.initialized:
+            await self.init_db()
+        job = Job(id=job_id, status=status, progress=0.0, options=options)
+        async with self.sessions() as session:
+            session.add(job)
+            await session.commit()
+        self.writes += 1
+        return _job_dict(job)
+
+    def record(self, job_id: str, updates: Dict[str, Any]):
+        """Queue an update for the next write-behind flush (no I/O)"""
+        fields = {key: value for key, value in updates.items() if key in JOB_COLUMNS}
+        if not fields:
+            return
+        with self._pending_lock:
+            self._pending.setdefault(job_id, {}).update(fields)
+        self._ensure_flusher()
+
+    async def update_job(self, job_id: str, updates: Dict[str, Any]):
+        """Queue an update; terminal states and results are flushed right away"""
+        self.record(job_id, updates)
+        if updates.get("status") in TERMINAL_STATUSES or "result" in updates:
+            await self.flush(job_id)
+
+    async def flush(self, job_id: Optional[str] = None):
+        """Write pending updates for one job (or all jobs) in a single transaction"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            with self._pending_lock:
+                if job_id is None:
+                    batch, self._pending = self._pending, {}
+                elif job_id in self._pending:
+                    batch = {job_id: self._pending.pop(job_id)}
+                else:
+                    return
+            if not batch:
+                return
+
+            try:
+                async with self.sessions() as session:
+                    for pending_id, fields in batch.items():
+                        await session.execute(
+                            update(Job).where(Job.id == pending_id)
+                            .values(**fields, updated_at=datetime.utcnow())
+                        )
+                    await session.commit()
+                self.writes += len(batch)
+                self.flushes += 1
+            except Exception as e:
+                logger.error("Job flush failed, will retry: %s", e)
+                # Put the batch back under any newer updates
+                with self._pending_lock:
+                    for pending_id, fields in batch.items():
+                        self._pending[pending_id] = {**fields, **self._pending.get(pending_id, {})}
+
+    def _ensure_flusher(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop here; the next flush() or close() writes it
+        if self._flusher is not None and not self._flusher.done() and self._flusher.get_loop() is loop:
+            return
+        self._flusher = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with self.sessions() as session:
+            job = await session.get(Job, job_id)
+        if job is None:
+            return None
+        with self._pending_lock:
+            pending = dict(self._pending.get(job_id, {}))
+        return {**_job_dict(job), **pending}
+
+    async def list_jobs(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        async with self.sessions() as session:
+            rows = await session.scalars(
+                select(Job).order_by(Job.created_at.desc()).offset(offset).limit(limit)
+            )
+            jobs = list(rows)
+        with self._pending_lock:
+            pending = {job.id: dict(self._pending.get(job.id, {})) for job in jobs}
+        return [{**_job_dict(job), **pending[job.id]} for job in jobs]
+
+    async def close(self):
+        """Stop the flusher, write what is left and release pooled connections"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        await self.engine.dispose()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_jobs": len(self._pending),
+            "writes": self.writes,
+            "flushes": self.flushes
+        }
+
+job_repository = JobRepository()
@@ -1,10 +1,56 @@
 import yt_dlp
 import os
-from typing import Optional
+import re
+import hashlib
+import tempfile
+from typing import Dict, List, Optional, Tuple
 import httpx
 from fastapi import HTTPException
 
-async def download_media(url: str) -> str:
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from services.executor import run_in_pool
+
+UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "2048")) * 1024 * 1024)
+# Room for the text fields and multipart framing around the file
+MAX_FORM_FIELDS_BYTES = 1024 * 1024
+# Only the audio track is transcribed; fall back to a muxed format if a site has no audio-only one
+AUDIO_FORMAT = "bestaudio/best"
+
+def _download_with_ytdlp(url: str, ydl_opts: dict) -> dict:
+    """Run yt-dlp extraction and download (blocking)"""
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=True)
+
+def _extract_stream_info(url: str, ydl_opts: dict) -> dict:
+    """Run yt-dlp extraction only (blocking)"""
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+async def resolve_audio_stream(url: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Resolve a page URL to the direct URL of its best audio-only format,
+    plus the HTTP headers needed to fetch it, without downloading anything.
+    """
+    try:
+        ydl_opts = {
+            'format': AUDIO_FORMAT,
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True
+        }
+        info = await run_in_pool("media", _extract_stream_info, url, ydl_opts)
+        return info["url"], info.get("http_headers", {})
+
+    except Exception as e:
+        raise HTTPException(400, f"Download failed: {str(e)}")
+
+async def download_media(url: str, audio_only: bool = False) -> str:
     """
     Download media from various sources using yt-dlp
     Returns path to downloaded file
@@ -14,7 +60,7 @@ async def download_media(url: str) -> str:
         os.makedirs("downloads", exist_ok=True)
 
         ydl_opts = {
-            'format': 'best',
+            'format': AUDIO_FORMAT if audio_only else 'best',
             'outtmpl': output_template,
             'noplaylist': True,
             'quiet': True,
@@ -22,23 +68,160 @@ async def download_media(url: str) -> str:
             'extract_flat': True
         }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            return os.path.join("downloads", f"{info['id']}.{info['ext']}")
+        info = await run_in_pool("media", _download_with_ytdlp, url, ydl_opts)
+        return os.path.join("downloads", f"{info['id']}.{info['ext']}")
 
     except Exception as e:
         raise HTTPException(400, f"Download failed: {str(e)}")
 
-async def save_upload(file) -> str:
-    """Save uploaded file and return path"""
+class UploadWriter:
+    """
+    Writes one uploaded file to a unique temp file in UPLOAD_DIR as its
+    chunks arrive, hashing them and enforcing max_bytes on the way. finish()
+    renames it to its content hash, so concurrent uploads never clobber
+    each other; abort() removes the partial file.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = MAX_UPLOAD_BYTES):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        extension = os.path.splitext(os.path.basename(filename or ""))[1]
+        self.extension = extension if re.fullmatch(r"\.[A-Za-z0-9]{1,10}", extension) else ""
+        self.max_bytes = max_bytes
+        fd, self.tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._pending = bytearray()
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    async def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(413, f"Upload exceeds {self.max_bytes // (1024 * 1024)} MB limit")
+        self.digest.update(chunk)
+        self._pending += chunk
+        if len(self._pending) >= UPLOAD_CHUNK_SIZE:
+            await self._flush()
+
+    async def _flush(self):
+        block, self._pending = bytes(self._pending), bytearray()
+        await run_in_pool("default", self._file.write, block)
+
+    async def finish(self) -> Tuple[str, str]:
+        """Close the file under its content hash; returns (path, sha256)"""
+        await self._flush()
+        self._file.close()
+        content_hash = self.digest.hexdigest()
+        file_path = os.path.join(UPLOAD_DIR, f"{content_hash}{self.extension}")
+        os.replace(self.tmp_path, file_path)
+        return file_path, content_hash
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def check_upload_length(headers, max_bytes: int = MAX_UPLOAD_BYTES):
+    """Reject a body whose declared Content-Length is over the limit before reading any of it"""
     try:
-        os.makedirs("uploads", exist_ok=True)
-        file_path = f"uploads/{file.filename}"
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        return file_path
-    except Exception as e:
-        raise HTTPException(400, f"Upload failed: {str(e)}")
\ No newline at end of file
+        declared = int(headers.get("content-length", ""))
+    except ValueError:
+        return
+    if declared > max_bytes + MAX_FORM_FIELDS_BYTES:
+        raise HTTPException(413, f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit")
+
+
+async def receive_form(request, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[Dict[str, str], Optional[Tuple[str, str]]]:
+    """
+    Parse a multipart/form-data request body as it streams in. Text fields
+    are returned as a dict; the "file" part, if any, goes straight to disk
+    through an UploadWriter and is returned as (path, sha256). Unlike
+    request.form(), the body is never spooled to a temp file first, so it
+    is written once and the size limit applies while it is read.
+    """
+    check_upload_length(request.headers, max_bytes)
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(400, "Missing multipart boundary")
+
+    # Parser callbacks are synchronous; they queue events that are then
+    # handled (with awaits for file writes) after each chunk
+    events: List[Tuple[str, bytes]] = []
+
+    def on(name: str):
+        def callback(data: bytes = b"", start: int = 0, end: int = 0):
+            events.append((name, data[start:end]))
+        return callback
+
+    parser = MultipartParser(boundary, {
+        name: on(name) for name in (
+            "on_part_begin", "on_part_data", "on_part_end", "on_header_field",
+            "on_header_value", "on_header_end", "on_headers_finished", "on_end"
+        )
+    })
+
+    fields: Dict[str, str] = {}
+    upload: Optional[Tuple[str, str]] = None
+    writer: Optional[UploadWriter] = None
+    header_field, header_value, headers = b"", b"", {}
+    name, value, field_bytes, finished = "", bytearray(), 0, False
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event, data in events:
+                if event == "on_part_begin":
+                    header_field, header_value, headers = b"", b"", {}
+                    name, value = "", bytearray()
+                elif event == "on_header_field":
+                    header_field += data
+                elif event == "on_header_value":
+                    header_value += data
+                elif event == "on_header_end":
+                    headers[header_field.lower()] = header_value
+                    header_field, header_value = b"", b""
+                elif event == "on_headers_finished":
+                    _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+                    name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                    filename = disposition.get(b"filename")
+                    if filename is not None and name == "file" and writer is None and upload is None:
+                        writer = UploadWriter(filename.decode("utf-8", "replace"), max_bytes)
+                elif event == "on_part_data":
+                    if writer is not None:
+                        await writer.write(data)
+                    else:
+                        field_bytes += len(data)
+                        if field_bytes > MAX_FORM_FIELDS_BYTES:
+                            raise HTTPException(413, "Form fields too large")
+                        value += data
+                elif event == "on_part_end":
+                    if writer is not None:
+                        upload = await writer.finish()
+                        writer = None
+                    elif name:
+                        fields[name] = value.decode("utf-8", "replace")
+                elif event == "on_end":
+                    finished = True
+            events.clear()
+        parser.finalize()
+        if not finished:
+            raise HTTPException(400, "Incomplete multipart body")
+        return fields, upload
+
+    except BaseException as e:
+        # BaseException so a client disconnect (CancelledError) cleans up too
+        if writer is not None:
+            writer.abort()
+        if upload is not None:
+            discard_upload(upload[0])
+        if isinstance(e, HTTPException) or not isinstance(e, Exception):
+            raise
+        raise HTTPException(400, f"Upload failed: {str(e)}")
+
+
+def discard_upload(path: str):
+    """Delete a saved upload that will not be processed"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,45 @@
+from collections import defaultdict
+from typing import Any, Dict, Set, Tuple
+import asyncio
+import json
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+class EventBus:
+    """
+    In-process fan-out of job events (status, progress, segments, stages)
+    to server-sent-event subscribers. Must be used from the event loop thread.
+    """
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[job_id].add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        self._subscribers[job_id].discard(queue)
+        if not self._subscribers[job_id]:
+            del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                # Slow consumer: drop the oldest event rather than block the job
+                queue.get_nowait()
+            queue.put_nowait((event, data))
+
+    def subscriber_count(self, job_id: str) -> int:
+        return len(self._subscribers.get(job_id, ()))
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+event_bus = EventBus()
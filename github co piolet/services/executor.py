@@ -0,0 +1,163 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+
+# Default worker count per kind of blocking work. Model pools are small on
+# purpose: each worker thread holds a full forward pass' worth of activations.
+DEFAULT_POOL_SIZES = {
+    "whisper": 1,
+    "summarizer": 1,
+    "quiz": 1,
+    "sentiment": 1,
+    "translation": 1,
+    "media": 2,
+    "whisper-chunks": max(1, (os.cpu_count() or 2) // 2),
+    "default": 2
+}
+
+# Pools that run in separate processes by default (model state is per process)
+DEFAULT_POOL_MODES = {
+    "whisper-chunks": "process"
+}
+
+# Process mode pickles every call and its result. Only these pools submit
+# module-level functions: whisper-chunks sends each worker its PCM slice of
+# the audio (about 38 MB per 10-minute chunk), a copy that is small next to
+# the minutes spent decoding it. The other pools call bound pipeline methods,
+# which cannot be pickled, many times per job, so they stay thread pools.
+PROCESS_POOLS = frozenset({"whisper-chunks"})
+POOL_MODES = ("thread", "process")
+
+
+def _parse_pool_config(spec: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse INFERENCE_POOLS, e.g. "whisper=2,summarizer=1,whisper-chunks=4:process".
+    Pools are thread pools unless suffixed with ":process" (or process by
+    default); ":process" is only accepted for PROCESS_POOLS.
+    """
+    config = {
+        kind: {"size": size, "mode": DEFAULT_POOL_MODES.get(kind, "thread")}
+        for kind, size in DEFAULT_POOL_SIZES.items()
+    }
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, value = entry.partition("=")
+        size, _, mode = value.partition(":")
+        kind = kind.strip()
+        mode = mode.strip() or DEFAULT_POOL_MODES.get(kind, "thread")
+        if mode not in POOL_MODES:
+            raise ValueError(f"INFERENCE_POOLS: unknown mode {mode!r} for {kind}")
+        if mode == "process" and kind not in PROCESS_POOLS:
+            raise ValueError(
+                f"INFERENCE_POOLS: {kind} cannot run in process mode "
+                f"(supported: {', '.join(sorted(PROCESS_POOLS))})"
+            )
+        config[kind] = {"size": max(1, int(size or 1)), "mode": mode}
+    return config
+
+
+class InferencePool:
+    """A bounded executor for one kind of blocking work, with queue metrics"""
+
+    def __init__(self, kind: str, size: int, mode: str = "thread"):
+        self.kind = kind
+        self.size = size
+        self.mode = mode
+        self._executor: Executor = None
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # spawn, not fork: forked children would inherit model thread
+                # pools (CTranslate2, torch) that do not survive fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.size,
+                    thread_name_prefix=f"{self.kind}-worker"
+                )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.size)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) in this pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        self.in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        started = time.monotonic()
+        try:
+            result = await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_seconds += time.monotonic() - started
+
+    def metrics(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "mode": self.mode,
+            "size": self.size,
+            "running": min(self.in_flight, self.size),
+            "queued": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_seconds": round(self.total_seconds / finished, 3) if finished else 0.0
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool_config = _parse_pool_config(os.getenv("INFERENCE_POOLS", ""))
+_pools: Dict[str, InferencePool] = {}
+
+
+def get_pool(kind: str) -> InferencePool:
+    """Return the pool for a kind of work, creating it on first use"""
+    if kind not in _pools:
+        config = _pool_config.get(kind, _pool_config["default"])
+        _pools[kind] = InferencePool(kind, config["size"], config["mode"])
+    return _pools[kind]
+
+
+async def run_in_pool(kind: str, func: Callable, *args, **kwargs) -> Any:
+    """Run blocking work (model inference, ffmpeg, yt-dlp) off the event loop"""
+    return await get_pool(kind).run(func, *args, **kwargs)
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and throughput counters for every pool created so far"""
+    return {kind: pool.metrics() for kind, pool in _pools.items()}
+
+
+def shutdown_pools():
+    """Stop all worker pools; queued work is cancelled"""
+    for pool in _pools.values():
+        pool.shutdown()
@@ -0,0 +1,217 @@
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class CircuitBreaker:
+    """
+    Per-model breaker: after failure_threshold consecutive failures the model
+    is skipped (callers go straight to local inference) for reset_seconds,
+    then a single trial request is let through. Other callers keep failing
+    fast until the trial's result is recorded (or it has been out for
+    reset_seconds, e.g. because it was cancelled).
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            now = time.monotonic()
+            if self.trial_started is not None and now - self.trial_started < self.reset_seconds:
+                return False
+            self.trial_started = now
+        return state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.state == "half-open":
+            self.opened_at = time.monotonic()
+        self.trial_started = None
+
+
+class InferenceAPIClient:
+    """
+    App-lifetime HTTP client for the Hugging Face Inference API.
+    One pooled keep-alive connection pool (HTTP/2 when h2 is installed),
+    retries with backoff on 503 "model loading" and other transient errors,
+    and a circuit breaker per model so an unhealthy model fails fast.
+    With hedge_after set, an attempt that has not answered within that many
+    seconds gets a duplicate request and the first response wins (inference
+    calls have no side effects, so the loser is simply cancelled).
+    """
+
+    def __init__(
+        self,
+        base_url: str = HF_API_URL,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        timeout: float = 60.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 20.0,
+        failure_threshold: int = 3,
+        reset_seconds: float = 60.0,
+        hedge_after: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.hedge_after = hedge_after
+        self.hedged = 0
+        self.transport = transport
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared pooled client (created on first use)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.transport is None and _http2_available(),
+                transport=self.transport
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return self.breakers[model]
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        delay = self.backoff * (2 ** attempt)
+        if response is not None and response.status_code == 503:
+            # Model loading: the API tells us roughly how long it needs
+            try:
+                delay = max(delay, float(response.json().get("estimated_time", 0)))
+            except Exception:
+                pass
+        return min(delay, self.max_backoff) * (0.8 + random.random() * 0.4)
+
+    async def _send(self, url: str, **kwargs) -> httpx.Response:
+        """One attempt, hedged with a second request if the first is slow"""
+        if not self.hedge_after:
+            return await self.client.post(url, **kwargs)
+
+        first = asyncio.ensure_future(self.client.post(url, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        self.hedged += 1
+        pending = {first, asyncio.ensure_future(self.client.post(url, **kwargs))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both failed: raise the original request's error
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def post(
+        self,
+        model: str,
+        api_key: Optional[str],
+        json: Any = None,
+        files: Any = None,
+        content: Optional[bytes] = None
+    ) -> Optional[httpx.Response]:
+        """
+        POST to /models/{model}. Returns the response, or None when the model's
+        breaker is open or retries are exhausted (callers fall back to local).
+        """
+        breaker = self.breaker(model)
+        if not breaker.allow():
+            return None
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        url = f"{self.base_url}/models/{model}"
+
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                response = await self._send(url, headers=headers, json=json, files=files, content=content)
+                if response.status_code not in RETRYABLE_STATUS:
+                    breaker.record_success()
+                    return response
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                logger.warning("HF API %s attempt %d failed: %s", model, attempt + 1, e)
+
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt, response))
+
+        breaker.record_failure()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {"state": breaker.state, "failures": breaker.failures}
+            for model, breaker in self.breakers.items()
+        }
+
+
+hf_api = InferenceAPIClient(
+    max_connections=int(os.getenv("HF_API_MAX_CONNECTIONS", "20")),
+    timeout=float(os.getenv("HF_API_TIMEOUT", "60")),
+    retries=int(os.getenv("HF_API_RETRIES", "3")),
+    hedge_after=float(os.getenv("HF_API_HEDGE_SECONDS", "0")) or None
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled client for any other outbound HTTP"""
+    return hf_api.client
@@ -0,0 +1,122 @@
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import asyncio
+import os
+
+from services.chapter_extractor import ChapterExtractor
+from services.topic_segmentation import BLOCK_SIZE, PEAK_WINDOW, tokenize
+
+# A boundary is final once this many segments follow it: its gap score and
+# the peaks around it no longer change as more segments arrive
+LOOKAHEAD_SEGMENTS = BLOCK_SIZE + PEAK_WINDOW
+# Without a topic shift, a chapter is closed anyway after this long
+CHAPTER_MAX_SECONDS = float(os.getenv("CHAPTER_MAX_SECONDS", "600"))
+
+# Called with (chapter index, formatted chapter, its segments)
+ChapterCallback = Callable[[int, Dict, List[Dict]], None]
+ChapterFunc = Callable[[int, Dict, List[Dict]], Awaitable[Any]]
+
+
+class ChapterStream:
+    """
+    Cut chapters out of a transcript while it is still being transcribed.
+    Segments are fed one at a time; every BLOCK_SIZE segments the pending
+    (not yet chaptered) ones are segmented again, and every chapter ending
+    at a settled boundary is handed to on_chapter right away.
+    """
+
+    def __init__(self, extractor: ChapterExtractor, on_chapter: ChapterCallback):
+        self.extractor = extractor
+        self.on_chapter = on_chapter
+        self.pending: List[Dict] = []
+        self.tokens: List[List[str]] = []
+        self.markers: List[int] = []
+        self.fed = 0
+        self.count = 0
+        self.offset = 0  # transcript index of pending[0]
+
+    def feed(self, segment: Dict):
+        self.pending.append(segment)
+        self.tokens.append(tokenize(segment["text"]))
+        if self.extractor._is_chapter_marker(segment["text"]):
+            self.markers.append(len(self.pending) - 1)
+        self.fed += 1
+        if self.fed % BLOCK_SIZE == 0:
+            self._cut(final=False)
+
+    def finish(self, segments: List[Dict]) -> int:
+        """
+        Feed whatever segments were not streamed (e.g. a cached transcript),
+        close the remaining chapters and return the number of chapters.
+        """
+        for segment in segments[self.fed:]:
+            self.feed(segment)
+        self._cut(final=True)
+        return self.count
+
+    def _cut(self, final: bool):
+        if not self.pending:
+            return
+        boundaries = self.extractor.find_boundaries(self.pending, self.tokens, self.markers)
+        if final:
+            cut = len(self.pending)
+        else:
+            settled = [b for b in boundaries if len(self.pending) - b >= LOOKAHEAD_SEGMENTS]
+            if settled:
+                cut, boundaries = settled[-1], settled[:-1]
+            elif self.pending[-1]["end"] - self.pending[0]["start"] >= CHAPTER_MAX_SECONDS:
+                cut, boundaries = max(1, len(self.pending) - LOOKAHEAD_SEGMENTS), []
+            else:
+                return
+
+        marked = set(self.markers)
+        edges = [0] + boundaries + [cut]
+        for first, last in zip(edges, edges[1:]):
+            if first >= last:
+                continue
+            chapter = self.extractor.build_chapter(
+                self.pending[first:last], self.tokens[first:last], self.offset + first,
+                marked=first in marked, opening=self.count == 0
+            )
+            self.on_chapter(self.count, chapter, self.pending[first:last])
+            self.count += 1
+
+        self.offset += cut
+        self.pending = self.pending[cut:]
+        self.tokens = self.tokens[cut:]
+        self.markers = [i - cut for i in self.markers if i >= cut]
+
+
+
+class ChapterPipeline:
+    """
+    Analyze chapters while the rest of the media is still being transcribed:
+    each chapter the stream cuts starts analyze(index, chapter, segments)
+    as a task of its own right away.
+    """
+
+    def __init__(self, extractor: ChapterExtractor, analyze: ChapterFunc):
+        self.analyze = analyze
+        self.stream = ChapterStream(extractor, self._dispatch)
+        self.chapters: List[Dict] = []
+        self.tasks: List[asyncio.Future] = []
+
+    def _dispatch(self, index: int, chapter: Dict, segments: List[Dict]):
+        self.chapters.append(chapter)
+        self.tasks.append(asyncio.ensure_future(self.analyze(index, chapter, segments)))
+
+    def feed(self, segment: Dict):
+        self.stream.feed(segment)
+
+    async def finish(self, segments: List[Dict]) -> Tuple[List[Dict], List[Any]]:
+        """Close the last chapters and wait for every analysis; returns (chapters, results)"""
+        self.stream.finish(segments)
+        try:
+            results = await asyncio.gather(*self.tasks)
+        except BaseException:
+            self.cancel()
+            raise
+        return self.chapters, list(results)
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
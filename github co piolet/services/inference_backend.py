@@ -0,0 +1,97 @@
+from typing import Any, Dict
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# How local transformers pipelines are executed (all on CPU):
+#   pytorch - plain fp32 PyTorch (default)
+#   int8    - PyTorch with dynamically int8-quantized Linear layers
+#   onnx    - ONNX export run by ONNX Runtime (via optimum)
+BACKENDS = ("pytorch", "int8", "onnx")
+DEFAULT_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch")
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join("models", "onnx"))
+
+# Rough resident size relative to fp32, for the model registry's budget
+SIZE_FACTORS = {"pytorch": 1.0, "int8": 0.4, "onnx": 1.0}
+
+# optimum model class per pipeline task
+_ORT_CLASSES = {
+    "summarization": "ORTModelForSeq2SeqLM",
+    "text2text-generation": "ORTModelForSeq2SeqLM",
+    "translation": "ORTModelForSeq2SeqLM",
+    "sentiment-analysis": "ORTModelForSequenceClassification",
+    "text-classification": "ORTModelForSequenceClassification"
+}
+
+
+def _parse_backend_config(spec: str) -> Dict[str, str]:
+    """
+    Parse INFERENCE_BACKENDS, e.g.
+    "facebook/bart-large-cnn=int8,distilbert-base-uncased-finetuned-sst-2-english=onnx"
+    """
+    config = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, backend = entry.rpartition("=")
+        backend = backend.strip()
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend for {model}: {backend}")
+        config[model.strip()] = backend
+    return config
+
+
+_backend_config = _parse_backend_config(os.getenv("INFERENCE_BACKENDS", ""))
+
+
+def backend_for(model: str) -> str:
+    """Configured backend for a model"""
+    return _backend_config.get(model, DEFAULT_BACKEND)
+
+
+def set_backend(model: str, backend: str):
+    """Override a model's backend (before it is first loaded)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    _backend_config[model] = backend
+
+
+def _load_pytorch(task: str, model: str, **kwargs) -> Any:
+    from transformers import pipeline
+    return pipeline(task, model=model, device="cpu", **kwargs)
+
+
+def _load_int8(task: str, model: str, **kwargs) -> Any:
+    import torch
+    pipe = _load_pytorch(task, model, **kwargs)
+    pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipe
+
+
+def _load_onnx(task: str, model: str, **kwargs) -> Any:
+    if task not in _ORT_CLASSES:
+        raise ValueError(f"No ONNX Runtime backend for task {task}")
+    try:
+        import optimum.onnxruntime as ort
+    except ImportError:
+        raise Exception("The onnx backend requires optimum[onnxruntime]")
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = getattr(ort, _ORT_CLASSES[task])
+    export_dir = os.path.join(ONNX_CACHE_DIR, model.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        ort_model = model_class.from_pretrained(export_dir)
+    else:
+        # First use exports the checkpoint; later loads reuse the export
+        logger.info("Exporting %s to ONNX in %s", model, export_dir)
+        ort_model = model_class.from_pretrained(model, export=True)
+        ort_model.save_pretrained(export_dir)
+    return pipeline(task, model=ort_model, tokenizer=AutoTokenizer.from_pretrained(model),
+                    device="cpu", **kwargs)
+
+
+_LOADERS = {"pytorch": _load_pytorch, "int8": _load_int8, "onnx": _load_onnx}
+
+
+def load_pipeline(task: str, model: str, backend: str = "pytorch", **kwargs) -> Any:
+    """Build a CPU transformers pipeline on the given backend (blocking)"""
+    return _LOADERS[backend](task, model, **kwargs)
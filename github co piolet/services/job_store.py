@@ -0,0 +1,194 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+
+from services.events import event_bus
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+JOB_BACKEND = os.getenv("JOB_BACKEND", "inline")  # inline | celery
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(7 * 24 * 3600)))
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[str, Dict[str, Any]]
+# First item of every subscription, yielded once events are being delivered
+SUBSCRIBED: Event = ("subscribed", {})
+
+
+class MemoryJobStore:
+    """Process-local job records; used for inline execution and in tests"""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def create(self, job_id: str, record: Dict[str, Any]):
+        self.jobs[job_id] = {"stages": {}, "segments": [], **record}
+
+    def get(self, job_id: str, segments: bool = False) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def load(self, job_id: str, segments: bool = False) -> Optional[Dict[str, Any]]:
+        """get() for async callers"""
+        return self.get(job_id, segments)
+
+    def update(self, job_id: str, fields: Dict[str, Any]):
+        self.jobs[job_id].update(fields)
+
+    def update_stage(self, job_id: str, stage: str, state: Dict[str, Any]):
+        self.jobs[job_id]["stages"][stage] = dict(state)
+
+    def append_segment(self, job_id: str, segment: Dict[str, Any]):
+        self.jobs[job_id]["segments"].append(segment)
+
+    def clear_segments(self, job_id: str):
+        self.jobs[job_id]["segments"] = []
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        event_bus.publish(job_id, event, data)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Optional[Event]]:
+        """
+        Yield SUBSCRIBED, then events for a job; yields None every 15 s of
+        silence (keepalive)
+        """
+        queue = event_bus.subscribe(job_id)
+        try:
+            yield SUBSCRIBED
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            event_bus.unsubscribe(job_id, queue)
+
+
+class RedisJobStore:
+    """
+    Job records shared by every API and worker process.
+    A job is a Redis hash of JSON-encoded fields (stages get one field each so
+    concurrent stage workers never overwrite each other), plus a list of
+    streamed segments; events go out on a pub/sub channel per job.
+
+    Called from an event loop, writes are queued on one background thread
+    instead of blocking the loop, and load() reads on that same thread, so
+    every read still sees the writes queued before it. Segments are only
+    read when asked for.
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis
+        self.url = url
+        self.redis = redis.Redis.from_url(url)
+        # One thread keeps queued writes (and the reads behind them) in order
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+
+    def _key(self, job_id: str) -> str:
+        return f"job:{job_id}"
+
+    def _segments_key(self, job_id: str) -> str:
+        return f"job:{job_id}:segments"
+
+    def _channel(self, job_id: str) -> str:
+        return f"job-events:{job_id}"
+
+    def _write(self, fn: Callable, *args):
+        """Run a write inline, or queue it when called on an event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            fn(*args)
+            return
+        self._io.submit(fn, *args).add_done_callback(self._log_failed_write)
+
+    @staticmethod
+    def _log_failed_write(future: Future):
+        if future.exception() is not None:
+            logger.error("Job store write failed: %s", future.exception())
+
+    def create(self, job_id: str, record: Dict[str, Any]):
+        self.update(job_id, record)
+
+    def get(self, job_id: str, segments: bool = False) -> Optional[Dict[str, Any]]:
+        raw = self.redis.hgetall(self._key(job_id))
+        if not raw:
+            return None
+        record: Dict[str, Any] = {"stages": {}}
+        for field, value in raw.items():
+            field = field.decode()
+            if field.startswith("stage:"):
+                record["stages"][field[len("stage:"):]] = json.loads(value)
+            else:
+                record[field] = json.loads(value)
+        if segments:
+            record["segments"] = [json.loads(item) for item in self.redis.lrange(self._segments_key(job_id), 0, -1)]
+        return record
+
+    async def load(self, job_id: str, segments: bool = False) -> Optional[Dict[str, Any]]:
+        """get() on the store's thread, behind any queued writes"""
+        return await asyncio.get_running_loop().run_in_executor(self._io, self.get, job_id, segments)
+
+    def update(self, job_id: str, fields: Dict[str, Any]):
+        self._write(self._update, job_id, fields)
+
+    def _update(self, job_id: str, fields: Dict[str, Any]):
+        key = self._key(job_id)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={field: json.dumps(value) for field, value in fields.items()})
+        pipe.expire(key, JOB_TTL_SECONDS)
+        pipe.execute()
+
+    def update_stage(self, job_id: str, stage: str, state: Dict[str, Any]):
+        self._write(self.redis.hset, self._key(job_id), f"stage:{stage}", json.dumps(state))
+
+    def append_segment(self, job_id: str, segment: Dict[str, Any]):
+        self._write(self._append_segment, job_id, segment)
+
+    def _append_segment(self, job_id: str, segment: Dict[str, Any]):
+        key = self._segments_key(job_id)
+        pipe = self.redis.pipeline()
+        pipe.rpush(key, json.dumps(segment))
+        pipe.expire(key, JOB_TTL_SECONDS)
+        pipe.execute()
+
+    def clear_segments(self, job_id: str):
+        self._write(self.redis.delete, self._segments_key(job_id))
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        self._write(self.redis.publish, self._channel(job_id), json.dumps([event, data]))
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Optional[Event]]:
+        import redis.asyncio as aioredis
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(self._channel(job_id))
+            # Sending SUBSCRIBE is not enough: only after the server's
+            # confirmation is every later publish delivered to us
+            confirmation = await pubsub.get_message(timeout=10)
+            if not confirmation or confirmation["type"] != "subscribe":
+                raise ConnectionError(f"Subscribing to {self._channel(job_id)} was not confirmed")
+            yield SUBSCRIBED
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=15)
+                if message is None:
+                    yield None
+                    continue
+                event, data = json.loads(message["data"])
+                yield event, data
+        finally:
+            await pubsub.unsubscribe(self._channel(job_id))
+            await client.close()
+
+
+def create_job_store():
+    """Redis-backed store when jobs run on Celery workers, else in-memory"""
+    if JOB_BACKEND == "celery":
+        return RedisJobStore()
+    return MemoryJobStore()
+
+
+job_store = create_job_store()
@@ -0,0 +1,158 @@
+from typing import Dict, List
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+# Offline language identification. Only a bounded sample of the text is
+# looked at (SAMPLE_WINDOWS evenly spaced slices, SAMPLE_CHARS in total), so
+# the cost does not grow with the transcript. Scripts are counted over the
+# sample's code points in one NumPy pass; Latin-script text is then told apart
+# with character trigram profiles.
+SAMPLE_CHARS = int(os.getenv("LANGID_SAMPLE_CHARS", "4096"))
+SAMPLE_WINDOWS = 16
+# Trigram log-likelihoods count as at most this many trigrams of evidence,
+# so the confidence of a short or ambiguous sample stays moderate
+NGRAM_EVIDENCE = 50
+
+# (first code point, last code point, language); "latin" goes to the n-gram model
+_SCRIPTS = [
+    (0x0041, 0x005A, "latin"), (0x0061, 0x007A, "latin"), (0x00C0, 0x024F, "latin"),
+    (0x0370, 0x03FF, "el"), (0x0400, 0x04FF, "ru"), (0x0590, 0x05FF, "he"),
+    (0x0600, 0x06FF, "ar"), (0x0900, 0x097F, "hi"), (0x0980, 0x09FF, "bn"),
+    (0x0A00, 0x0A7F, "pa"), (0x0A80, 0x0AFF, "gu"), (0x0B80, 0x0BFF, "ta"),
+    (0x0C00, 0x0C7F, "te"), (0x0C80, 0x0CFF, "kn"), (0x0D00, 0x0D7F, "ml"),
+    (0x0E00, 0x0E7F, "th"), (0x3040, 0x30FF, "ja"), (0x4E00, 0x9FFF, "zh"),
+    (0xAC00, 0xD7AF, "ko")
+]
+# [start0, end0 + 1, start1, end1 + 1, ...]: a code point is inside range k
+# exactly when searchsorted(..., side="right") returns 2k + 1
+_SCRIPT_EDGES = np.array([edge for start, end, _ in _SCRIPTS for edge in (start, end + 1)], dtype=np.uint32)
+_SCRIPT_LANGS = [lang for _, _, lang in _SCRIPTS]
+
+# Seed text per Latin-script language; profiles are built from it at import
+_LATIN_SEEDS = {
+    "en": "All human beings are born free and equal in dignity and rights. They are endowed with reason and "
+          "conscience and should act towards one another in a spirit of brotherhood. This is one of the most "
+          "important things that we have ever seen, and we would like to share it with you and your family. "
+          "Here people should think about how they want to live, because there are many ways to do that, "
+          "which will help everyone who is going through it.",
+    "es": "Todos los seres humanos nacen libres e iguales en dignidad y derechos y, dotados como están de razón "
+          "y conciencia, deben comportarse fraternalmente los unos con los otros. Es una de las cosas más "
+          "importantes que hemos visto, y por eso queremos compartirla con ustedes y su familia. Aquí la gente "
+          "debe pensar en cómo quiere vivir, porque hay muchas maneras de hacerlo, que ayudarán a todos.",
+    "fr": "Tous les êtres humains naissent libres et égaux en dignité et en droits. Ils sont doués de raison "
+          "et de conscience et doivent agir les uns envers les autres dans un esprit de fraternité. C'est une "
+          "des choses les plus importantes que nous avons vues, et nous voulons la partager avec vous et votre "
+          "famille. Ici les gens doivent penser à la façon dont ils veulent vivre, parce qu'il y a beaucoup de "
+          "manières de le faire, qui aideront tout le monde.",
+    "de": "Alle Menschen sind frei und gleich an Würde und Rechten geboren. Sie sind mit Vernunft und Gewissen "
+          "begabt und sollen einander im Geist der Brüderlichkeit begegnen. Das ist eines der wichtigsten Dinge, "
+          "die wir je gesehen haben, und wir möchten es mit euch und eurer Familie teilen. Hier sollten die Leute "
+          "darüber nachdenken, wie sie leben wollen, denn es gibt viele Wege, das zu tun, die allen helfen werden.",
+    "it": "Tutti gli esseri umani nascono liberi ed eguali in dignità e diritti. Essi sono dotati di ragione e "
+          "di coscienza e devono agire gli uni verso gli altri in spirito di fratellanza. È una delle cose più "
+          "importanti che abbiamo mai visto, e vogliamo condividerla con voi e la vostra famiglia. Qui le persone "
+          "dovrebbero pensare a come vogliono vivere, perché ci sono molti modi per farlo, che aiuteranno tutti.",
+    "pt": "Todos os seres humanos nascem livres e iguais em dignidade e em direitos. Dotados de razão e de "
+          "consciência, devem agir uns para com os outros em espírito de fraternidade. É uma das coisas mais "
+          "importantes que já vimos, e queremos compartilhá-la com você e a sua família. Aqui as pessoas devem "
+          "pensar sobre como querem viver, porque há muitas maneiras de fazer isso, que vão ajudar a todos.",
+    "nl": "Alle mensen worden vrij en gelijk in waardigheid en rechten geboren. Zij zijn begiftigd met verstand "
+          "en geweten, en behoren zich jegens elkander in een geest van broederschap te gedragen. Het is een van "
+          "de belangrijkste dingen die we ooit hebben gezien, en we willen het met jullie en je familie delen. "
+          "Hier moeten de mensen nadenken over hoe ze willen leven, want er zijn veel manieren om dat te doen, "
+          "die iedereen zullen helpen."
+}
+
+_word = re.compile(r"[^\W\d_]+")
+
+
+def _trigrams(text: str) -> List[str]:
+    grams = []
+    for word in _word.findall(text.lower()):
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _build_profiles():
+    """Vocabulary index and a (languages, vocabulary + 1) table of smoothed log-probabilities"""
+    counts = {lang: Counter(_trigrams(seed)) for lang, seed in _LATIN_SEEDS.items()}
+    vocabulary = {gram: i for i, gram in enumerate(sorted(set().union(*counts.values())))}
+    table = np.empty((len(counts), len(vocabulary) + 1), dtype=np.float64)
+    for row, counter in enumerate(counts.values()):
+        total = sum(counter.values()) + len(vocabulary) + 1
+        table[row, :] = math.log(1 / total)  # last column: unseen trigram
+        for gram, count in counter.items():
+            table[row, vocabulary[gram]] = math.log((count + 1) / total)
+    return vocabulary, table
+
+
+_VOCABULARY, _LOG_PROBS = _build_profiles()
+_LATIN_LANGS = list(_LATIN_SEEDS)
+
+
+def sample_text(text: str, max_chars: int = SAMPLE_CHARS, windows: int = SAMPLE_WINDOWS) -> str:
+    """At most max_chars of text, taken as evenly spaced slices across all of it"""
+    if len(text) <= max_chars:
+        return text
+    width = max_chars // windows
+    step = (len(text) - width) / (windows - 1)
+    return " ".join(text[int(i * step):int(i * step) + width] for i in range(windows))
+
+
+def script_counts(sample: str) -> Dict[str, int]:
+    """Letters per script language (plus "latin") in sample"""
+    points = np.frombuffer(sample.encode("utf-32-le"), dtype=np.uint32)
+    slots = np.searchsorted(_SCRIPT_EDGES, points, side="right")
+    inside = slots[(slots & 1) == 1] // 2
+    counts = np.bincount(inside, minlength=len(_SCRIPTS))
+    totals: Dict[str, int] = {}
+    for lang, count in zip(_SCRIPT_LANGS, counts.tolist()):
+        if count:
+            totals[lang] = totals.get(lang, 0) + count
+    return totals
+
+
+def latin_scores(sample: str) -> Dict[str, float]:
+    """Probability of each Latin-script language from trigram likelihoods"""
+    grams = _trigrams(sample)
+    if not grams:
+        return {"en": 1.0}
+    unseen = len(_VOCABULARY)
+    indices = np.fromiter((_VOCABULARY.get(gram, unseen) for gram in grams), dtype=np.int64, count=len(grams))
+    likelihood = _LOG_PROBS[:, indices].mean(axis=1) * min(len(grams), NGRAM_EVIDENCE)
+    weights = np.exp(likelihood - likelihood.max())
+    weights /= weights.sum()
+    return dict(zip(_LATIN_LANGS, weights.tolist()))
+
+
+def identify_language(text: str) -> Dict:
+    """
+    Language of text as {"language", "confidence", "scores"}; scores map
+    ISO 639-1 codes to probabilities. Defaults to English without letters.
+    """
+    sample = sample_text(text)
+    counts = script_counts(sample)
+    letters = sum(counts.values())
+    if not letters:
+        return {"language": "en", "confidence": 0.0, "scores": {}}
+
+    scores = {lang: count / letters for lang, count in counts.items() if lang != "latin"}
+    if "latin" in counts:
+        share = counts["latin"] / letters
+        for lang, probability in latin_scores(sample).items():
+            scores[lang] = scores.get(lang, 0.0) + share * probability
+    # Kana alongside Han characters is Japanese, not Chinese
+    if "ja" in scores and "zh" in scores:
+        scores["ja"] += scores.pop("zh")
+
+    language = max(scores, key=scores.get)
+    return {
+        "language": language,
+        "confidence": round(scores[language], 4),
+        "scores": {lang: round(score, 4) for lang, score in sorted(scores.items(), key=lambda item: -item[1])}
+    }
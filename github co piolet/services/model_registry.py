@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import gc
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_bytes(model: Any) -> Optional[int]:
+    """Best-effort parameter size of a transformers pipeline or torch module"""
+    module = getattr(model, "model", model)
+    parameters = getattr(module, "parameters", None)
+    if parameters is None:
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+
+class ModelSpec:
+    """How to build a model and roughly how much memory it takes"""
+
+    def __init__(self, loader: Callable[[], Any], size_mb: float):
+        self.loader = loader
+        self.size_mb = size_mb
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+    Models are built on first use and shared by every service; when the
+    memory budget is exceeded the least recently used models are dropped.
+    A model evicted while a worker is still using it stays alive until that
+    call returns, so eviction never breaks in-flight inference.
+    """
+
+    def __init__(self, budget_mb: float = 0):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._specs: Dict[str, ModelSpec] = {}
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def register(self, name: str, loader: Callable[[], Any], size_mb: float = 500):
+        """Declare a model; nothing is loaded until get() is called"""
+        with self._lock:
+            self._specs[name] = ModelSpec(loader, size_mb)
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def register_pipeline(self, name: str, task: str, model: Optional[str] = None,
+                          size_mb: float = 500, **kwargs):
+        """
+        Declare a transformers pipeline; transformers is imported lazily.
+        It runs on the backend configured for the model (see inference_backend).
+        """
+        from services.inference_backend import SIZE_FACTORS, backend_for, load_pipeline
+        backend = backend_for(model or name)
+
+        def load():
+            return load_pipeline(task, model or name, backend, **kwargs)
+
+        self.register(name, load, size_mb * SIZE_FACTORS[backend])
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._specs
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, name: str) -> Any:
+        """Return a loaded model, building it (blocking) on first use"""
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                self.hits += 1
+                return self._models[name]
+            if name not in self._specs:
+                raise KeyError(f"Unknown model: {name}")
+            spec = self._specs[name]
+            load_lock = self._load_locks[name]
+
+        # Only one thread loads a given model; others wait and then hit
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self.hits += 1
+                    return self._models[name]
+                self._make_room(int(spec.size_mb * 1024 * 1024))
+
+            started = time.monotonic()
+            model = spec.loader()
+            elapsed = time.monotonic() - started
+            size = estimate_model_bytes(model) or int(spec.size_mb * 1024 * 1024)
+
+            with self._lock:
+                self._models[name] = model
+                self._sizes[name] = size
+                self.loads += 1
+                self.load_seconds += elapsed
+                self._make_room(0, keep=name)
+            logger.info("Loaded model %s in %.1fs (%.0f MB)", name, elapsed, size / 2**20)
+            return model
+
+    def _make_room(self, incoming: int, keep: Optional[str] = None):
+        """Evict least recently used models until incoming bytes fit the budget"""
+        if not self.budget_bytes:
+            return
+        while self._models and self.used_bytes + incoming > self.budget_bytes:
+            victim = next(iter(self._models))
+            if victim == keep:
+                break
+            self._evict_locked(victim)
+
+    def _evict_locked(self, name: str):
+        self._models.pop(name, None)
+        self._sizes.pop(name, None)
+        self.evictions += 1
+        logger.info("Evicted model %s", name)
+        gc.collect()
+
+    def evict(self, name: str) -> bool:
+        """Drop a loaded model; returns False if it was not loaded"""
+        with self._lock:
+            if name not in self._models:
+                return False
+            self._evict_locked(name)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_mb": round(self.budget_bytes / 2**20, 1),
+                "used_mb": round(self.used_bytes / 2**20, 1),
+                "loaded": {name: round(size / 2**20, 1) for name, size in self._sizes.items()},
+                "registered": sorted(self._specs),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 2)
+            }
+
+
+# Shared registry; MODEL_MEMORY_BUDGET_MB=0 disables eviction
+registry = ModelRegistry(float(os.getenv("MODEL_MEMORY_BUDGET_MB", "6144")))
@@ -0,0 +1,147 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+import asyncio
+import time
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+ProgressCallback = Callable[[str, Dict[str, Any], float], None]
+
+
+class StageError(Exception):
+    """Raised when a required stage fails, times out or cannot run"""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage '{stage}' failed: {message}")
+        self.stage = stage
+
+
+class Stage:
+    """A single node in the processing graph"""
+
+    def __init__(
+        self,
+        name: str,
+        func: StageFunc,
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        weight: float = 1.0,
+        required: bool = True
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.weight = weight
+        self.required = required
+
+
+class StageGraph:
+    """
+    Run a set of async stages as a dependency graph.
+    Stages whose dependencies are satisfied run concurrently; each stage
+    receives a dict with the results of the stages it depends on.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        self.status: Dict[str, Dict[str, Any]] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        func: StageFunc,
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        weight: float = 1.0,
+        required: bool = True
+    ) -> "StageGraph":
+        """Register a stage; returns the graph so calls can be chained"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, depends_on, timeout, weight, required)
+        self.status[name] = {"status": "pending", "duration": None, "error": None}
+        return self
+
+    def _validate(self):
+        """Reject unknown dependencies and cycles before anything starts"""
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(self, on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Execute all stages and return their results keyed by stage name"""
+        self._validate()
+
+        results: Dict[str, Any] = {}
+        total_weight = sum(stage.weight for stage in self.stages.values()) or 1.0
+        finished_weight = 0.0
+        tasks: Dict[str, asyncio.Task] = {}
+
+        def report(name: str, **fields):
+            nonlocal finished_weight
+            self.status[name].update(fields)
+            if fields.get("status") in ("completed", "failed", "timeout", "skipped"):
+                finished_weight += self.stages[name].weight
+            if on_progress:
+                on_progress(name, self.status[name], finished_weight / total_weight)
+
+        async def execute(stage: Stage):
+            # Wait for dependencies; a failed optional dependency skips this stage
+            for dep in stage.depends_on:
+                await asyncio.shield(tasks[dep])
+                if self.status[dep]["status"] != "completed":
+                    report(stage.name, status="skipped", error=f"dependency '{dep}' did not complete")
+                    results[stage.name] = None
+                    if stage.required:
+                        raise StageError(stage.name, f"dependency '{dep}' did not complete")
+                    return
+
+            report(stage.name, status="running")
+            started = time.monotonic()
+            try:
+                inputs = {dep: results[dep] for dep in stage.depends_on}
+                results[stage.name] = await asyncio.wait_for(stage.func(inputs), stage.timeout)
+                report(stage.name, status="completed", duration=round(time.monotonic() - started, 3))
+            except asyncio.TimeoutError:
+                results[stage.name] = None
+                report(stage.name, status="timeout", duration=round(time.monotonic() - started, 3),
+                       error=f"timed out after {stage.timeout}s")
+                if stage.required:
+                    raise StageError(stage.name, f"timed out after {stage.timeout}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                results[stage.name] = None
+                report(stage.name, status="failed", duration=round(time.monotonic() - started, 3),
+                       error=str(e))
+                if stage.required:
+                    raise StageError(stage.name, str(e)) from e
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(execute(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return results
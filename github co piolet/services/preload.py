@@ -0,0 +1,72 @@
+from typing import Callable, Dict, Iterable, List
+import gc
+import logging
+import os
+
+from services.model_registry import registry
+
+logger = logging.getLogger(__name__)
+
+
+def selected_models(spec: str = None) -> List[str]:
+    """Registry names listed in PRELOAD_MODELS ("all" selects every registered model)"""
+    spec = os.getenv("PRELOAD_MODELS", "") if spec is None else spec
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    if names == ["all"]:
+        return registry.stats()["registered"]
+    return names
+
+
+def preload_models(names: List[str]) -> List[str]:
+    """
+    Load models in the current (master) process before workers fork.
+    Weights then live in pages the workers share copy-on-write; gc.freeze()
+    keeps the collector from writing to those objects and un-sharing them.
+    """
+    loaded = []
+    for name in names:
+        if not registry.is_registered(name):
+            logger.warning("PRELOAD_MODELS: unknown model %s", name)
+            continue
+        registry.get(name)
+        loaded.append(name)
+
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+
+def memory_report(pid: str = "self") -> Dict[str, float]:
+    """Resident memory split into shared and private (unique) MB for one process"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            return parse_smaps_rollup(f)
+    except OSError:
+        return {}
+
+
+def parse_smaps_rollup(lines: Iterable[str]) -> Dict[str, float]:
+    """memory_report figures from the lines of a /proc/<pid>/smaps_rollup file (kB values)"""
+    fields = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+            fields[parts[0][:-1]] = int(parts[1]) / 1024
+
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    unique = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "pss_mb": round(fields.get("Pss", 0), 1),
+        "shared_mb": round(shared, 1),
+        "unique_mb": round(unique, 1)
+    }
+
+
+def log_memory_report(label: str, pid: str = "self", log: Callable = logger.info):
+    report = memory_report(pid)
+    if report:
+        log(
+            "%s memory: rss=%.0fMB unique=%.0fMB shared=%.0fMB pss=%.0fMB",
+            label, report["rss_mb"], report["unique_mb"], report["shared_mb"], report["pss_mb"]
+        )
@@ -0,0 +1,551 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+
+from services.downloader import download_media, resolve_audio_stream
+from services.transcriber import transcribe_audio, model_size as whisper_model_size
+from services.summarizer import LOCAL_SUMMARY_MODEL, generate_summaries, reduce_summaries
+from services.quiz_generator import QuizGenerator, merge_quizzes
+from services.sentiment_analyzer import SentimentAnalyzer, merge_sentiment
+from services.translator import Translator
+from services.chapter_extractor import ChapterExtractor
+from services.incremental import ChapterPipeline
+from services.pipeline import StageGraph
+from services.inference_backend import backend_for
+from services.executor import run_in_pool
+from services.cache import result_cache, hash_bytes, hash_file, hash_text
+from services.job_store import job_store
+from services.database import job_repository
+from services.artifacts import artifact_store
+from services.segment_store import SegmentTable, chapter_text, segments_text
+from services.search_index import search_index
+from services.utils import SAMPLE_RATE, extract_audio, create_pdf_report, load_audio_pcm
+
+logger = logging.getLogger(__name__)
+
+# Initialize services
+quiz_generator = QuizGenerator(os.getenv("HF_API_KEY"))
+sentiment_analyzer = SentimentAnalyzer(os.getenv("HF_API_KEY"))
+translator = Translator(os.getenv("HF_API_KEY"))
+chapter_extractor = ChapterExtractor()
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Per-stage timeouts (seconds) for the post-transcription analysis stages;
+# can be overridden per job via options["stage_timeouts"]
+STAGE_TIMEOUTS = {
+    "chapters": float(os.getenv("CHAPTERS_TIMEOUT", "120")),
+    "summaries": float(os.getenv("SUMMARIES_TIMEOUT", "900")),
+    "quiz": float(os.getenv("QUIZ_TIMEOUT", "900")),
+    "sentiment": float(os.getenv("SENTIMENT_TIMEOUT", "300")),
+    "language": float(os.getenv("LANGUAGE_TIMEOUT", "60")),
+    "translations": float(os.getenv("TRANSLATIONS_TIMEOUT", "900"))
+}
+
+# Analysis stages: name -> (dependencies, progress weight)
+STAGES = {
+    "chapters": ([], 0.5),
+    "summaries": ([], 2),
+    "quiz": (["chapters"], 2),
+    "sentiment": ([], 1),
+    "language": ([], 0.5),
+    "translations": (["language"], 2)
+}
+
+# Stages computed while a job runs (plus their dependencies); everything else
+# is computed the first time it is requested. Per job via options["precompute"]
+DEFAULT_PRECOMPUTE = [name for name in os.getenv("PRECOMPUTE_STAGES", "summaries").split(",") if name]
+# How often a lazy artifact request re-checks a computation another process holds
+LAZY_LOCK_POLL_SECONDS = 0.2
+
+# What the translations stage translates: the full "transcript", or only the
+# "summary" (short summary and chapter titles); per job via options["translation_scope"]
+TRANSLATION_SCOPE = os.getenv("TRANSLATION_SCOPE", "transcript")
+
+# "files": download, extract a WAV, transcribe the WAV. "stream": ffmpeg
+# decodes the audio-only stream (or the upload) into memory for Whisper; no
+# temp files, but the whole decoded PCM (about 230 MB per hour of audio) is
+# held in memory until the job is transcribed.
+# Per job via options["audio_pipeline"]
+AUDIO_PIPELINE = os.getenv("AUDIO_PIPELINE", "files")
+
+# Incremental jobs cut chapters while the media is still being transcribed and
+# summarize, score and quiz each one as soon as it is cut; the job-level
+# summaries, sentiment and quiz are then reduced from the chapters' results.
+# Inline jobs only; per job via options["incremental"]
+INCREMENTAL = os.getenv("INCREMENTAL_PIPELINE", "0") == "1"
+INCREMENTAL_STAGES = ("chapters", "summaries", "sentiment", "quiz")
+QUIZ_QUESTIONS_PER_CHAPTER = int(os.getenv("QUIZ_QUESTIONS_PER_CHAPTER", "2"))
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+def translation_scope(request_data: dict) -> str:
+    return request_data.get("options", {}).get("translation_scope", TRANSLATION_SCOPE)
+
+def is_incremental(request_data: dict) -> bool:
+    return request_data["type"] != "text" and request_data.get("options", {}).get("incremental", INCREMENTAL)
+
+def stage_dependencies(request_data: dict) -> Dict[str, List[str]]:
+    """Each stage's dependencies for this job"""
+    dependencies = {name: list(depends_on) for name, (depends_on, _) in STAGES.items()}
+    if translation_scope(request_data) == "summary":
+        dependencies["translations"] += ["summaries", "chapters"]
+    return dependencies
+
+def eager_stages(request_data: dict) -> List[str]:
+    """Stages to run as part of the job: options["precompute"] and their dependencies"""
+    wanted = request_data.get("options", {}).get("precompute", DEFAULT_PRECOMPUTE)
+    dependencies = stage_dependencies(request_data)
+    selected = set()
+
+    def add(name: str):
+        if name in STAGES and name not in selected:
+            selected.add(name)
+            for dep in dependencies[name]:
+                add(dep)
+
+    for name in wanted:
+        add(name)
+    return [name for name in STAGES if name in selected]
+
+def update_job(job_id: str, **fields):
+    """
+    Update a job record and push the change to event subscribers.
+    The database copy is written behind; see fail_job/finalize for the
+    terminal writes that go through immediately.
+    """
+    job_store.update(job_id, fields)
+    job_repository.record(job_id, fields)
+    event_fields = {key: fields[key] for key in ("status", "progress", "error") if key in fields}
+    job_store.publish(job_id, "status", event_fields)
+
+def record_segment(job_id: str, segment: Dict, duration: float):
+    """Store a freshly decoded segment and stream it to subscribers"""
+    job_store.append_segment(job_id, segment)
+    job_store.publish(job_id, "segment", segment)
+    if duration:
+        progress = round(0.4 + 0.2 * min(1.0, segment["end"] / duration), 3)
+        job_store.update(job_id, {"progress": progress})
+
+def record_stage(job_id: str, stage: str, state: Dict[str, Any], fraction: float):
+    """Store one analysis stage's state and the resulting overall progress"""
+    progress = round(0.6 + 0.4 * fraction, 3)
+    job_store.update_stage(job_id, stage, state)
+    job_store.update(job_id, {"progress": progress})
+    job_store.publish(job_id, "stage", {"stage": stage, **state, "progress": progress})
+
+async def ingest(
+    job_id: str,
+    request_data: dict,
+    on_segment: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Download or load the media and return its transcript (cached by media hash).
+    on_segment, if given, also sees each segment as it is decoded; a cached
+    transcript is returned without any calls.
+    """
+    if request_data["type"] == "text":
+        return {"text": request_data["text"], "segments": [], "language": None}
+
+    url = request_data.get("url")
+
+    def transcript_key(media_hash: str) -> str:
+        return result_cache.key(
+            "transcript", media_hash,
+            model=f"whisper-{whisper_model_size}", type=request_data["type"]
+        )
+
+    # A URL processed before maps to its media hash: skip the download entirely
+    if url:
+        alias = await run_in_pool("default", result_cache.get, "url", result_cache.key("url", url))
+        if alias:
+            cached = await run_in_pool(
+                "default", result_cache.get, "transcript", transcript_key(alias["media_hash"])
+            )
+            if cached is not None:
+                return cached
+
+    streaming = request_data.get("options", {}).get("audio_pipeline", AUDIO_PIPELINE) == "stream"
+    audio = None
+
+    update_job(job_id, status="downloading")
+    if url and streaming:
+        # ffmpeg reads the audio-only stream over HTTP and pipes PCM to us:
+        # no container on disk, no WAV, and no video bytes downloaded
+        source, headers = await resolve_audio_stream(url)
+        update_job(job_id, status="extracting")
+        audio = await run_in_pool("media", load_audio_pcm, source, SAMPLE_RATE, headers)
+        media_hash = await run_in_pool("media", hash_bytes, audio)
+    elif url:
+        media_path = await download_media(url, audio_only=True)
+        media_hash = await run_in_pool("media", hash_file, media_path)
+    else:
+        # Uploads are streamed to disk and hashed when the job is submitted
+        media_path, media_hash = request_data["media_path"], request_data["media_hash"]
+    if url:
+        await run_in_pool("default", result_cache.put, "url", result_cache.key("url", url),
+                          {"media_hash": media_hash})
+    update_job(job_id, progress=0.2)
+
+    async def transcribe():
+        nonlocal audio
+        # Extract audio if needed
+        if audio is None:
+            update_job(job_id, status="extracting")
+            if streaming:
+                audio = await run_in_pool("media", load_audio_pcm, media_path)
+            elif request_data["type"] == "video":
+                audio = await extract_audio(media_path)
+            else:
+                audio = media_path
+        update_job(job_id, progress=0.4)
+
+        def decoded(segment: Dict, duration: float):
+            record_segment(job_id, segment, duration)
+            if on_segment:
+                on_segment(segment)
+
+        # Transcribe, streaming segments into the job record as they decode
+        update_job(job_id, status="transcribing")
+        job_store.clear_segments(job_id)
+        return await transcribe_audio(audio, on_segment=decoded)
+
+    return await result_cache.get_or_compute("transcript", transcript_key(media_hash), transcribe)
+
+def compact_transcript(transcript_data: Dict) -> Dict:
+    """The transcript with its segments as a SegmentTable, whose buffer doubles as the text"""
+    table = SegmentTable.from_segments(transcript_data["segments"])
+    text = table.buffer if table.buffer == transcript_data["text"] else transcript_data["text"]
+    return {**transcript_data, "text": text, "segments": table}
+
+def build_stages(request_data: dict, transcript_data: Dict) -> Dict[str, StageFunc]:
+    """Analysis stage functions for one transcript, each skipped when cached"""
+    options = request_data.get("options", {})
+    text = transcript_data["text"]
+    segments = SegmentTable.from_segments(transcript_data["segments"])
+    transcript_hash = hash_text(text)
+    summary_models = options.get("models", ["facebook/bart-large-cnn"])
+    scope = translation_scope(request_data)
+
+    def cached(stage: str, compute: StageFunc, **params) -> StageFunc:
+        """Skip a stage whose transcript, models and parameters are unchanged"""
+        async def run(deps):
+            key = result_cache.key(stage, transcript_hash, **params, **deps)
+            return await result_cache.get_or_compute(stage, key, lambda: compute(deps))
+        return run
+
+    async def run_chapters(_):
+        return await chapter_extractor.extract_chapters(text, segments)
+
+    async def run_summaries(_):
+        return await generate_summaries(
+            text,
+            summary_models,
+            segments=segments
+        )
+
+    async def run_quiz(deps):
+        chapters = [{**chapter, "content": chapter_text(chapter, segments)} for chapter in deps["chapters"]]
+        return await quiz_generator.generate_quiz(text, chapters=chapters)
+
+    async def run_sentiment(_):
+        return await sentiment_analyzer.analyze_sentiment(text, segments=segments)
+
+    async def run_language(_):
+        return await translator.detect_language(text)
+
+    async def translate_summary(lang: str, source: str, summaries: Dict, chapters: List[Dict]) -> Dict:
+        result = await translator.translate(summaries["short"], lang, source_lang=source)
+        titles = await translator.translate_sentences([c["title"] for c in chapters], lang)
+        return {**result, "chapter_titles": titles}
+
+    async def run_translations(deps):
+        targets = ["en"] if deps["language"] != "en" else ["ta", "hi"]
+        if scope == "summary":
+            jobs = (translate_summary(lang, deps["language"], deps["summaries"], deps["chapters"])
+                    for lang in targets)
+        else:
+            jobs = (translator.translate(text, lang, source_lang=deps["language"]) for lang in targets)
+        results = await asyncio.gather(*jobs)
+        return dict(zip(targets, results))
+
+    return {
+        "chapters": cached("chapters", run_chapters),
+        "summaries": cached("summaries", run_summaries, models=summary_models,
+                            backend=backend_for(LOCAL_SUMMARY_MODEL)),
+        "quiz": cached("quiz", run_quiz, model=quiz_generator.local_model_id,
+                       backend=backend_for(quiz_generator.local_model_id)),
+        "sentiment": cached("sentiment", run_sentiment, model=sentiment_analyzer.local_model_id,
+                            backend=backend_for(sentiment_analyzer.local_model_id)),
+        "language": cached("language", run_language),
+        "translations": cached("translations", run_translations,
+                               models=translator.language_models, scope=scope,
+                               backends={m: backend_for(m) for m in translator.language_models.values()})
+    }
+
+def stage_timeouts(request_data: dict) -> Dict[str, float]:
+    return {**STAGE_TIMEOUTS, **request_data.get("options", {}).get("stage_timeouts", {})}
+
+async def fail_job(job_id: str, error: str):
+    """Mark a job failed and persist it right away"""
+    update_job(job_id, status="failed", error=error)
+    await job_repository.flush(job_id)
+
+async def store_transcript(job_id: str, transcript_data: Dict) -> Dict[str, Dict]:
+    """
+    Persist a job's transcript and segments artifacts ahead of its analysis.
+    Queue workers load it with load_transcript instead of each receiving a
+    copy through the broker.
+    """
+    return await run_in_pool("default", artifact_store.put_all, job_id, {
+        "transcript": transcript_data["text"],
+        "segments": transcript_data["segments"]
+    })
+
+async def load_transcript(job_id: str) -> Dict:
+    """A stored job's transcript, with its segments as a SegmentTable"""
+    text, segments = await asyncio.gather(
+        run_in_pool("default", artifact_store.get, job_id, "transcript"),
+        run_in_pool("default", artifact_store.get, job_id, "segments")
+    )
+    return {"text": text, "segments": segments}
+
+async def finalize(job_id: str, transcript_data: Dict, outputs: Dict[str, Any], transcript_stored: bool = False):
+    """
+    Store results and mark the job completed. Each artifact goes to its own
+    compressed blob; the job record keeps only the manifest (ETags, sizes).
+    With transcript_stored, the transcript was already written by
+    store_transcript and only the outputs are added.
+    The segments are added to the search index; if that fails the job still
+    completes and `python -m services.search_index --backfill` catches up.
+    """
+    artifacts = dict(outputs)
+    if not transcript_stored:
+        artifacts.update(transcript=transcript_data["text"], segments=transcript_data["segments"])
+    manifest = await run_in_pool("default", artifact_store.put_all, job_id, artifacts)
+    if len(transcript_data["segments"]):
+        try:
+            await run_in_pool("default", search_index.add_job, job_id, transcript_data["segments"])
+        except Exception:
+            logger.exception("Indexing job %s for search failed", job_id)
+    job_store.clear_segments(job_id)
+    update_job(job_id, **{
+        "status": "completed",
+        "progress": 1.0,
+        "result": manifest
+    })
+    await job_repository.flush(job_id)
+
+async def analyze_chapter(job_id: str, request_data: dict, index: int, chapter: Dict, segments: List[Dict]):
+    """
+    Summarize, score and quiz one chapter of an incremental job and publish
+    the results. Each part is cached on the chapter's text, like the stages.
+    """
+    models = request_data.get("options", {}).get("models", ["facebook/bart-large-cnn"])
+    text = segments_text(segments)
+    chapter_hash = hash_text(text)
+
+    def cached(stage: str, compute: Callable[[], Awaitable[Any]], **params) -> Awaitable[Any]:
+        return result_cache.get_or_compute(stage, result_cache.key(stage, chapter_hash, **params), compute)
+
+    async def run_summaries():
+        return await generate_summaries(text, models, segments=segments)
+
+    async def run_sentiment():
+        return await sentiment_analyzer.analyze_sentiment(text, segments=segments)
+
+    async def run_quiz():
+        return await quiz_generator.generate_quiz(
+            text, QUIZ_QUESTIONS_PER_CHAPTER, chapters=[{**chapter, "content": text}]
+        )
+
+    summaries, sentiment, quiz = await asyncio.gather(
+        cached("chapter-summaries", run_summaries, models=models, backend=backend_for(LOCAL_SUMMARY_MODEL)),
+        cached("chapter-sentiment", run_sentiment, model=sentiment_analyzer.local_model_id,
+               backend=backend_for(sentiment_analyzer.local_model_id)),
+        cached("chapter-quiz", run_quiz, model=quiz_generator.local_model_id,
+               backend=backend_for(quiz_generator.local_model_id),
+               questions=QUIZ_QUESTIONS_PER_CHAPTER, title=chapter.get("title"))
+    )
+    job_store.publish(job_id, "chapter", {
+        "index": index,
+        **chapter,
+        "content": text,
+        "summary": summaries["short"],
+        "sentiment": {key: sentiment[key] for key in ("sentiment", "confidence", "emotions")},
+        "quiz": quiz
+    })
+    return summaries, sentiment, quiz
+
+async def reduce_chapters(request_data: dict, chapters: List[Dict], results: List[Tuple]) -> Dict[str, Any]:
+    """Job-level stage outputs of an incremental job from its per-chapter results"""
+    if not chapters:
+        return {}
+    models = request_data.get("options", {}).get("models", ["facebook/bart-large-cnn"])
+    summaries, sentiments, quizzes = zip(*results)
+    return {
+        "chapters": chapters,
+        "summaries": await reduce_summaries([s["short"] for s in summaries], models),
+        "sentiment": merge_sentiment(list(sentiments), [c["end_seconds"] - c["start_seconds"] for c in chapters]),
+        "quiz": merge_quizzes(list(quizzes))
+    }
+
+def precomputed(value: Any) -> StageFunc:
+    async def run(_):
+        return value
+    return run
+
+async def process_job(job_id: str, request_data: dict):
+    """Run a whole job in this process (JOB_BACKEND=inline)"""
+    chapters = None
+    if is_incremental(request_data):
+        chapters = ChapterPipeline(
+            chapter_extractor,
+            lambda index, chapter, segments: analyze_chapter(job_id, request_data, index, chapter, segments)
+        )
+    try:
+        transcript_data = compact_transcript(
+            await ingest(job_id, request_data, on_segment=chapters.feed if chapters else None)
+        )
+        update_job(job_id, progress=0.6)
+
+        # Everything downstream depends only on the transcript, so run it as a graph
+        update_job(job_id, status="analyzing")
+        stages = build_stages(request_data, transcript_data)
+        timeouts = stage_timeouts(request_data)
+        dependencies = stage_dependencies(request_data)
+
+        done: Dict[str, Any] = {}
+        if chapters:
+            # Most chapters were analyzed during transcription; wait for the rest
+            limit = max(timeouts[name] for name in INCREMENTAL_STAGES)
+            found, results = await asyncio.wait_for(chapters.finish(transcript_data["segments"]), limit)
+            done = await reduce_chapters(request_data, found, results)
+
+        eager = eager_stages(request_data)
+        graph = StageGraph()
+        for name in STAGES:
+            if name in done:
+                graph.add_stage(name, precomputed(done[name]), depends_on=dependencies[name],
+                                weight=STAGES[name][1])
+            elif name in eager:
+                graph.add_stage(name, stages[name], depends_on=dependencies[name],
+                                timeout=timeouts[name], weight=STAGES[name][1])
+
+        outputs = await graph.run(
+            on_progress=lambda stage, state, fraction: record_stage(job_id, stage, state, fraction)
+        )
+        await finalize(job_id, transcript_data, outputs)
+
+    except Exception as e:
+        if chapters:
+            chapters.cancel()
+        await fail_job(job_id, str(e))
+        raise
+
+async def run_single_stage(job_id: str, request_data: dict, transcript_data: Dict, stage: str) -> Any:
+    """
+    Run one analysis stage on its own (used by queue workers). Dependencies
+    are resolved through the result cache: once one worker has stored them,
+    the others reuse them, but workers that start together may each compute
+    the same dependency.
+    """
+    stages = build_stages(request_data, transcript_data)
+    timeouts = stage_timeouts(request_data)
+    deps = {}
+    for dep in stage_dependencies(request_data)[stage]:
+        deps[dep] = await asyncio.wait_for(stages[dep]({}), timeouts[dep])
+
+    graph = StageGraph().add_stage(stage, lambda _: stages[stage](deps), timeout=timeouts[stage])
+    try:
+        outputs = await graph.run()
+    finally:
+        state = graph.status[stage]
+        finished = (await job_store.load(job_id))["stages"]
+        finished[stage] = state
+        eager = eager_stages(request_data)
+        total = sum(STAGES[name][1] for name in eager)
+        done = sum(STAGES[name][1] for name, s in finished.items()
+                   if name in eager and s["status"] not in ("pending", "running"))
+        record_stage(job_id, stage, state, done / total)
+    return outputs[stage]
+
+_in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+async def single_flight(key: Tuple[str, str], compute: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run compute once per key at a time within this process: concurrent
+    callers share the same run, and a caller going away does not cancel it
+    for the others. Other processes are not covered; see _compute_artifact.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(compute())
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(task)
+
+async def ensure_artifact(job_id: str, name: str) -> Dict[str, Dict]:
+    """
+    Compute a derived artifact of a completed job the first time it is
+    requested, persist it, and return the job's updated manifest.
+    Dependencies (e.g. chapters for the quiz) are computed the same way.
+    The computation runs in the requesting (API) process, not on the
+    worker queues.
+    """
+    job = await job_store.load(job_id)
+    manifest = job.get("result") or {}
+    if name in manifest:
+        return manifest
+    return await single_flight((job_id, name), lambda: _compute_artifact(job_id, name))
+
+async def _compute_artifact(job_id: str, name: str) -> Dict[str, Dict]:
+    # The artifact lock keeps other API processes from computing it too
+    lock = await run_in_pool("default", artifact_store.try_lock, job_id, name)
+    while lock is None:
+        await asyncio.sleep(LAZY_LOCK_POLL_SECONDS)
+        lock = await run_in_pool("default", artifact_store.try_lock, job_id, name)
+    try:
+        # Another process may have stored it while we waited
+        manifest = await run_in_pool("default", artifact_store.manifest, job_id) or {}
+        if name in manifest:
+            job_store.update(job_id, {"result": manifest})
+            return manifest
+        return await _compute_artifact_locked(job_id, name)
+    finally:
+        lock.close()
+
+async def _compute_artifact_locked(job_id: str, name: str) -> Dict[str, Dict]:
+    job = await job_store.load(job_id)
+    request_data = {"options": job.get("options") or {}}
+    stages = build_stages(request_data, await load_transcript(job_id))
+
+    deps = {}
+    for dep in stage_dependencies(request_data)[name]:
+        await ensure_artifact(job_id, dep)
+        deps[dep] = await run_in_pool("default", artifact_store.get, job_id, dep)
+
+    value = await asyncio.wait_for(stages[name](deps), stage_timeouts(request_data)[name])
+    manifest = await run_in_pool("default", artifact_store.put, job_id, name, value)
+    job_store.update(job_id, {"result": manifest})
+    await job_repository.update_job(job_id, {"result": manifest})
+    return manifest
+
+async def ensure_report(job_id: str) -> str:
+    """Build the job's PDF report on first request; returns its path"""
+    path = artifact_store.file_path(job_id, "report.pdf")
+    if os.path.exists(path):
+        return path
+
+    async def build() -> str:
+        await ensure_artifact(job_id, "summaries")
+        job = await job_store.load(job_id)
+        result = {
+            "transcript": await run_in_pool("default", artifact_store.get, job_id, "transcript"),
+            "summaries": await run_in_pool("default", artifact_store.get, job_id, "summaries")
+        }
+        pdf = await run_in_pool("default", create_pdf_report, {**job, "result": result})
+        return await run_in_pool("default", artifact_store.put_file, job_id, "report.pdf", pdf)
+
+    return await single_flight((job_id, "report.pdf"), build)
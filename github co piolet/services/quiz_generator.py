@@ -1,65 +1,166 @@
-from typing import List, Dict
-import httpx
-from transformers import pipeline
+from typing import List, Dict, Optional
+from collections import Counter
+import math
+import re
+
+from services.executor import run_in_pool
+from services.model_registry import registry
+from services.http_client import hf_api
+
+# Local generation settings: passages are kept well under flan-t5's 512-token
+# input, and a few sampled candidates per prompt leave room for deduplication
+PASSAGE_MAX_CHARS = 1200
+MAX_CANDIDATES = 4
+
+_sentence_split = re.compile(r"(?<=[.!?])\s+")
+_word = re.compile(r"[a-z0-9']+")
+_STOPWORDS = {
+    "the", "and", "that", "this", "with", "from", "they", "there", "their", "have",
+    "were", "what", "when", "which", "will", "would", "about", "into", "your", "just",
+    "like", "some", "then", "than", "them", "been", "also", "because", "could", "very"
+}
+
+def _content_words(text: str) -> List[str]:
+    return [w for w in _word.findall(text.lower()) if len(w) > 3 and w not in _STOPWORDS]
+
+def select_passages(text: str, count: int, chapters: Optional[List[Dict]] = None) -> List[str]:
+    """
+    Pick up to count distinct, non-overlapping passages worth asking about.
+    Sentences are ranked by how many of the transcript's frequent content
+    words they contain; with chapters, picks go round-robin across chapters
+    so questions cover the whole text.
+    """
+    groups = [c["content"] for c in chapters or [] if c.get("content", "").strip()] or [text]
+    frequency = Counter(_content_words(text))
+    ranked_groups = []
+    for group in groups:
+        sentences = [s.strip() for s in _sentence_split.split(group) if s.strip()]
+        scores = []
+        for i, sentence in enumerate(sentences):
+            words = set(_content_words(sentence))
+            if words:
+                scores.append((sum(frequency[w] for w in words) / math.sqrt(len(words)), i))
+        ranked_groups.append((sentences, sorted(scores, reverse=True), set()))
+
+    passages = []
+    while len(passages) < count and any(ranked for _, ranked, _ in ranked_groups):
+        for sentences, ranked, used in ranked_groups:
+            if len(passages) >= count:
+                break
+            while ranked:
+                _, i = ranked.pop(0)
+                window = [j for j in (i - 1, i, i + 1) if 0 <= j < len(sentences)]
+                if used.isdisjoint(window):
+                    used.update(window)
+                    passages.append(" ".join(sentences[j] for j in window)[:PASSAGE_MAX_CHARS])
+                    break
+    return passages
+
+def _question_key(question: str) -> frozenset:
+    return frozenset(_word.findall(question.lower()))
+
+def _is_duplicate(question: str, seen: List[frozenset]) -> bool:
+    """Same question modulo punctuation/case, or nearly the same words"""
+    key = _question_key(question)
+    if not key:
+        return True
+    return any(len(key & other) / len(key | other) > 0.8 for other in seen)
+
+def merge_quizzes(quizzes: List[Dict]) -> Dict:
+    """Questions of several quizzes (e.g. one per chapter), interleaved, without duplicates"""
+    merged = {}
+    for kind in ("mcq", "true_false"):
+        questions, seen = [], []
+        for rank in range(max((len(quiz[kind]) for quiz in quizzes), default=0)):
+            for part, quiz in enumerate(quizzes):
+                if rank < len(quiz[kind]) and not _is_duplicate(quiz[kind][rank]["question"], seen):
+                    seen.append(_question_key(quiz[kind][rank]["question"]))
+                    questions.append({**quiz[kind][rank], "chapter": part})
+        merged[kind] = questions
+    return merged
 
 class QuizGenerator:
     def __init__(self, hf_api_key: str = None):
         self.hf_api_key = hf_api_key
-        # Fallback model for local processing
-        self.local_generator = pipeline(
-            "text2text-generation",
-            model="google/flan-t5-base",
-            device="cpu"
-        )
+        # Fallback model for local processing, loaded on first use
+        self.local_model_id = "google/flan-t5-base"
+        registry.register_pipeline(self.local_model_id, "text2text-generation", size_mb=1000)
 
-    async def generate_quiz(self, text: str, num_questions: int = 5) -> Dict:
+    def local_generator(self, prompt: str, **kwargs):
+        """Run the shared local text2text pipeline (blocking)"""
+        return registry.get(self.local_model_id)(prompt, **kwargs)
+
+    async def generate_quiz(self, text: str, num_questions: int = 5, chapters: Optional[List[Dict]] = None) -> Dict:
         """Generate MCQ and True/False questions from text"""
         try:
             if self.hf_api_key:
-                headers = {"Authorization": f"Bearer {self.hf_api_key}"}
                 prompt = f"""Generate {num_questions} multiple choice questions and 
                 {num_questions} true/false questions from this text: {text}
                 Format as JSON with 'mcq' and 'true_false' lists."""
 
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api-inference.huggingface.co/models/Qwen/Qwen2.5-7B-Instruct",
-                        headers=headers,
-                        json={"inputs": prompt}
-                    )
+                response = await hf_api.post(
+                    "Qwen/Qwen2.5-7B-Instruct",
+                    self.hf_api_key,
+                    json={"inputs": prompt}
+                )
 
-                if response.status_code == 200:
+                if response is not None and response.status_code == 200:
                     result = response.json()
                     return self._format_quiz(result[0]["generated_text"])
 
             # Fallback to local generation
-            return await self._generate_quiz_locally(text, num_questions)
+            return await self._generate_quiz_locally(text, num_questions, chapters)
 
         except Exception as e:
             raise Exception(f"Quiz generation failed: {str(e)}")
 
-    async def _generate_quiz_locally(self, text: str, num_questions: int) -> Dict:
-        """Generate quiz using local model"""
-        mcq_questions = []
-        tf_questions = []
+    async def _generate_quiz_locally(self, text: str, num_questions: int, chapters: Optional[List[Dict]] = None) -> Dict:
+        """
+        Generate quiz using local model. Each question type gets its own
+        distinct passages, so every passage is encoded once; all prompts go
+        through one batched, sampled generate call and duplicates are dropped.
+        """
+        passages = select_passages(text, 2 * num_questions, chapters)
+        if not passages:
+            return {"mcq": [], "true_false": []}
+        mcq_passages = passages[0::2]
+        tf_passages = passages[1::2] or passages
 
-        # Generate MCQ
-        for i in range(num_questions):
-            prompt = f"Generate a multiple choice question from: {text}"
-            response = self.local_generator(prompt, max_length=200)
-            mcq_questions.append(self._parse_mcq(response[0]["generated_text"]))
+        prompts = [f"Generate a multiple choice question from: {p}" for p in mcq_passages]
+        prompts += [f"Generate a true/false question from: {p}" for p in tf_passages]
+        candidates = min(MAX_CANDIDATES, math.ceil(num_questions / min(len(mcq_passages), len(tf_passages))) + 1)
 
-        # Generate True/False
-        for i in range(num_questions):
-            prompt = f"Generate a true/false question from: {text}"
-            response = self.local_generator(prompt, max_length=100)
-            tf_questions.append(self._parse_tf(response[0]["generated_text"]))
+        outputs = await run_in_pool(
+            "quiz",
+            self.local_generator,
+            prompts,
+            max_length=200,
+            do_sample=True,
+            top_p=0.92,
+            num_return_sequences=candidates,
+            batch_size=len(prompts),
+            truncation=True
+        )
+        mcq_outputs, tf_outputs = outputs[:len(mcq_passages)], outputs[len(mcq_passages):]
 
         return {
-            "mcq": mcq_questions,
-            "true_false": tf_questions
+            "mcq": self._unique(mcq_outputs, self._parse_mcq, num_questions),
+            "true_false": self._unique(tf_outputs, self._parse_tf, num_questions)
         }
 
+    def _unique(self, outputs: List[List[Dict]], parse, limit: int) -> List[Dict]:
+        """Parsed questions without duplicates, taking candidates round-robin across passages"""
+        questions, seen = [], []
+        for rank in range(max(len(candidates) for candidates in outputs)):
+            for candidates in outputs:
+                if len(questions) >= limit or rank >= len(candidates):
+                    continue
+                question = parse(candidates[rank]["generated_text"])
+                if not _is_duplicate(question["question"], seen):
+                    seen.append(_question_key(question["question"]))
+                    questions.append(question)
+        return questions
+
     def _parse_mcq(self, text: str) -> Dict:
         """Parse MCQ from generated text"""
         # Basic parsing logic - enhance based on actual output format
@@ -67,7 +168,7 @@ class QuizGenerator:
         return {
             "question": lines[0],
             "options": lines[1:5] if len(lines) >= 5 else [],
-            "correct_answer": lines[5] if len(lines) > 5 else lines[1]
+            "correct_answer": lines[5] if len(lines) > 5 else (lines[1] if len(lines) > 1 else "")
         }
 
     def _parse_tf(self, text: str) -> Dict:
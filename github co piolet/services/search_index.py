@@ -0,0 +1,197 @@
+"""
+Full-text search over the transcript segments of completed jobs.
+
+    python -m services.search_index --backfill    # index stored jobs not indexed yet
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from services.artifacts import ARTIFACT_DIR, artifact_store
+
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(ARTIFACT_DIR, "search_index.sqlite3"))
+MAX_SEGMENTS_PER_JOB = 5
+# BM25 has to score every match; a query matching more segments than this
+# (i.e. only very common words) ranks the most recently indexed ones
+MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "20000"))
+
+_term = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(query: str, match_all: bool = True) -> str:
+    """FTS5 query for the words of query, each quoted so no user input is parsed as syntax"""
+    terms = ['"' + term + '"' for term in _term.findall(query.lower())]
+    return (" " if match_all else " OR ").join(terms)
+
+
+class SearchIndex:
+    """
+    Inverted index of transcript segments in one SQLite FTS5 table, ranked
+    with BM25. Each completed job adds its segments in one transaction; a
+    job's rows occupy a contiguous rowid range, so re-indexing or removing a
+    job touches only its own postings and never rebuilds the index.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared across pool threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+                "text, job_id UNINDEXED, segment UNINDEXED, start UNINDEXED, end UNINDEXED, "
+                "tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, first_row INTEGER, last_row INTEGER, indexed_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_last_row ON jobs (last_row)")
+            self._local.conn = conn
+        return conn
+
+    def _delete_rows(self, conn: sqlite3.Connection, job_id: str):
+        row = conn.execute("SELECT first_row, last_row FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?", row)
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def add_job(self, job_id: str, segments: Sequence[Dict]):
+        """Index (or re-index) one job's segments (blocking)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete_rows(conn, job_id)
+            # MAX(rowid) would scan the FTS table; the jobs table knows the last row
+            first = conn.execute("SELECT COALESCE(MAX(last_row), 0) + 1 FROM jobs").fetchone()[0]
+            rows = [
+                (first + i, segment["text"].strip(), job_id, i, segment["start"], segment["end"])
+                for i, segment in enumerate(segments)
+            ]
+            conn.executemany(
+                "INSERT INTO segments (rowid, text, job_id, segment, start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute(
+                "INSERT INTO jobs (job_id, first_row, last_row, indexed_at) VALUES (?, ?, ?, ?)",
+                (job_id, first, first + len(rows) - 1, time.time())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remove_job(self, job_id: str):
+        """Drop one job from the index (blocking)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete_rows(conn, job_id)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def indexed_jobs(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT job_id FROM jobs")]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        match_all: bool = True,
+        per_job: int = MAX_SEGMENTS_PER_JOB,
+        job_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Jobs whose segments match query, best first, each with its best
+        matching segments (timestamps, text and a highlighted snippet).
+        Scores are BM25, higher is better. Blocking.
+        """
+        expression = match_expression(query, match_all)
+        if not expression:
+            return []
+        where = "segments MATCH ?"
+        params: List[Any] = [expression]
+        if job_id:
+            where += " AND rowid BETWEEN (SELECT first_row FROM jobs WHERE job_id = ?) AND (SELECT last_row FROM jobs WHERE job_id = ?)"
+            params += [job_id, job_id]
+
+        conn = self._connection()
+        # Walking matches newest first stops after MAX_CANDIDATES, so this
+        # costs little even for words found in most segments
+        bound = conn.execute(
+            f"SELECT rowid FROM segments WHERE {where} ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            params + [MAX_CANDIDATES]
+        ).fetchone()
+        if bound:
+            where += " AND rowid > ?"
+            params.append(bound[0])
+
+        # Enough segment hits to fill `limit` jobs in the common case
+        rows = conn.execute(
+            "SELECT job_id, segment, start, end, text, "
+            "snippet(segments, 0, '[', ']', '...', 16), bm25(segments) "
+            f"FROM segments WHERE {where} ORDER BY rank LIMIT ?",
+            params + [limit * per_job * 4]
+        )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for job, segment, start, end, text, snippet, rank in rows:
+            entry = results.get(job)
+            if entry is None:
+                if len(results) >= limit:
+                    continue
+                entry = results[job] = {"job_id": job, "score": round(-rank, 4), "segments": []}
+            if len(entry["segments"]) < per_job:
+                entry["segments"].append({
+                    "segment": segment,
+                    "start": start,
+                    "end": end,
+                    "text": text,
+                    "snippet": snippet,
+                    "score": round(-rank, 4)
+                })
+        return list(results.values())
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connection()
+        return {
+            "jobs": conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0],
+            "segments": conn.execute("SELECT COALESCE(SUM(last_row - first_row + 1), 0) FROM jobs").fetchone()[0]
+        }
+
+
+search_index = SearchIndex()
+
+
+def backfill(index: SearchIndex = search_index) -> int:
+    """Index every stored job that has segments and is not indexed yet; returns how many"""
+    indexed = set(index.indexed_jobs())
+    added = 0
+    for job_id in sorted(os.listdir(artifact_store.root)) if os.path.isdir(artifact_store.root) else []:
+        manifest = artifact_store.manifest(job_id)
+        if job_id in indexed or not manifest or "segments" not in manifest:
+            continue
+        index.add_job(job_id, artifact_store.get(job_id, "segments"))
+        added += 1
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backfill", action="store_true", help="index stored jobs that are not indexed yet")
+    args = parser.parse_args()
+    if args.backfill:
+        print(f"indexed {backfill()} jobs")
+    print(search_index.stats())
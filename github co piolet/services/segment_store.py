@@ -0,0 +1,132 @@
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+import struct
+
+import numpy as np
+
+# Binary layout: header, float32 starts, float32 ends, uint32 offsets (n + 1),
+# then the UTF-8 text buffer
+_MAGIC = b"SEG1"
+_HEADER = struct.Struct("<4sII")  # magic, segment count, text buffer bytes
+
+
+class SegmentTable:
+    """
+    Transcript segments in columnar form: float32 start/end times and one
+    text buffer, " ".join of the segment texts (i.e. the transcript itself),
+    with segment i at text[offsets[i]:offsets[i + 1] - 1]. Slicing returns a
+    view over the same arrays and buffer; indexing or iterating yields the
+    usual {"start", "end", "text"} dicts, built on the fly.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, text: str, offsets: np.ndarray):
+        self.starts = starts
+        self.ends = ends
+        self.buffer = text
+        self.offsets = offsets
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[Dict]) -> "SegmentTable":
+        if isinstance(segments, SegmentTable):
+            return segments
+        texts = [segment["text"] for segment in segments]
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.uint32, count=len(texts))
+        offsets = np.zeros(len(texts) + 1, dtype=np.uint32)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(
+            np.fromiter((segment["start"] for segment in segments), dtype=np.float32, count=len(texts)),
+            np.fromiter((segment["end"] for segment in segments), dtype=np.float32, count=len(texts)),
+            " ".join(texts),
+            offsets
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, "SegmentTable"]:
+        if isinstance(index, slice):
+            first, last, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("SegmentTable slices must be contiguous")
+            last = max(first, last)
+            return SegmentTable(self.starts[first:last], self.ends[first:last], self.buffer,
+                                self.offsets[first:last + 1])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return {
+            "start": float(self.starts[index]),
+            "end": float(self.ends[index]),
+            "text": self.buffer[self.offsets[index]:self.offsets[index + 1] - 1]
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def text(self) -> str:
+        """Texts of these segments joined by spaces (the whole buffer when not sliced)"""
+        if not len(self):
+            return ""
+        first, last = int(self.offsets[0]), int(self.offsets[-1]) - 1
+        return self.buffer if (first, last) == (0, len(self.buffer)) else self.buffer[first:last]
+
+    def text_of(self, first: int, last: int) -> str:
+        """Text of segments first..last - 1"""
+        return self[first:last].text
+
+    def range_between(self, start: float, end: float) -> Tuple[int, int]:
+        """Index range of the segments overlapping [start, end) seconds (binary search)"""
+        first = int(np.searchsorted(self.ends, start, side="right"))
+        last = int(np.searchsorted(self.starts, end, side="left"))
+        return first, max(first, last)
+
+    def text_between(self, start: float, end: float) -> str:
+        """Text spoken between start and end seconds, e.g. text_between(720, 900)"""
+        return self.text_of(*self.range_between(start, end))
+
+    def to_segments(self) -> List[Dict]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.ends.nbytes + self.offsets.nbytes + len(self.text.encode("utf-8"))
+
+    def to_bytes(self) -> bytes:
+        # Offsets are in characters, so they stay valid after a UTF-8 round trip
+        offsets = self.offsets - self.offsets[0] if len(self.offsets) else np.zeros(1, dtype=np.uint32)
+        text = self.text.encode("utf-8")
+        return b"".join([
+            _HEADER.pack(_MAGIC, len(self), len(text)),
+            self.starts.astype("<f4").tobytes(),
+            self.ends.astype("<f4").tobytes(),
+            offsets.astype("<u4").tobytes(),
+            text
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SegmentTable":
+        magic, count, text_bytes = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialized SegmentTable")
+        position = _HEADER.size
+        starts = np.frombuffer(data, dtype="<f4", count=count, offset=position)
+        ends = np.frombuffer(data, dtype="<f4", count=count, offset=position + 4 * count)
+        offsets = np.frombuffer(data, dtype="<u4", count=count + 1, offset=position + 8 * count)
+        position += 12 * count + 4
+        text = data[position:position + text_bytes].decode("utf-8")
+        return cls(starts, ends, text, offsets)
+
+
+def segments_text(segments: Union[SegmentTable, Sequence[Dict]]) -> str:
+    """Text of a run of segments, either a SegmentTable or a list of dicts"""
+    if isinstance(segments, SegmentTable):
+        return segments.text
+    return " ".join(segment["text"] for segment in segments)
+
+
+def chapter_text(chapter: Dict, segments: Union[SegmentTable, Sequence[Dict]]) -> str:
+    """Text of a chapter, from the transcript segments its segment_range points at"""
+    first, last = chapter["segment_range"]
+    return segments_text(segments[first:last])
@@ -1,66 +1,215 @@
-from typing import Dict
-import httpx
-from transformers import pipeline
+from typing import Dict, List, Optional
+import asyncio
+import math
+import os
+import re
 import numpy as np
 
+from services.batching import get_batcher
+from services.model_registry import registry
+from services.http_client import hf_api
+
+# Scoring works on windows of consecutive segments that fit the model
+# (512 tokens); past SENTIMENT_MAX_WINDOWS only every k-th window is scored
+WINDOW_CHARS = int(os.getenv("SENTIMENT_WINDOW_CHARS", "1000"))
+MAX_WINDOWS = int(os.getenv("SENTIMENT_MAX_WINDOWS", "256"))
+REMOTE_BATCH_SIZE = 16
+REMOTE_MODEL_ID = "SamLowe/roberta-base-go_emotions"
+
+POSITIVE_EMOTIONS = ["joy", "gratitude", "optimism", "pride", "admiration", "love"]
+NEGATIVE_EMOTIONS = ["anger", "disgust", "fear", "sadness", "disappointment", "grief"]
+NEUTRAL_EMOTIONS = ["neutral", "surprise", "curiosity", "realization"]
+
+_sentence_split = re.compile(r"(?<=[.!?])\s+")
+
+def build_windows(text: str, segments: Optional[List[Dict]] = None, max_chars: int = WINDOW_CHARS) -> List[Dict]:
+    """
+    Group consecutive transcript segments (or sentences, without timestamps)
+    into windows of at most max_chars, keeping each window's time span.
+    """
+    units = segments or [
+        {"start": None, "end": None, "text": sentence}
+        for sentence in _sentence_split.split(text) if sentence.strip()
+    ]
+    windows: List[Dict] = []
+    current = None
+    for unit in units:
+        piece = unit["text"].strip()
+        if not piece:
+            continue
+        if current and len(current["text"]) + len(piece) + 1 > max_chars:
+            windows.append(current)
+            current = None
+        if current is None:
+            current = {"start": unit["start"], "end": unit["end"], "text": piece[:max_chars]}
+        else:
+            current["text"] += " " + piece
+            current["end"] = unit["end"]
+    if current:
+        windows.append(current)
+    return windows
+
+def sample_windows(windows: List[Dict], max_windows: int = MAX_WINDOWS, every: Optional[int] = None):
+    """Every k-th window (k chosen so at most max_windows remain) and k"""
+    k = every or max(1, math.ceil(len(windows) / max_windows))
+    return windows[::k], k
+
+def merge_sentiment(results: List[Dict], weights: List[float]) -> Dict:
+    """Document sentiment from per-part results (e.g. one per chapter), weighted"""
+    total = sum(weights) or 1.0
+    emotions = {
+        name: round(sum(r["emotions"].get(name, 0.0) * w for r, w in zip(results, weights)) / total, 3)
+        for name in ("positive", "negative", "neutral")
+    }
+    merged = {
+        "sentiment": max(emotions, key=emotions.get).upper(),
+        "confidence": max(emotions.values()),
+        "emotions": emotions,
+        "chapters": [{"sentiment": r["sentiment"], "confidence": r["confidence"]} for r in results]
+    }
+    timelines = [r["timeline"] for r in results if "timeline" in r]
+    if timelines:
+        merged["timeline"] = {key: [v for t in timelines for v in t[key]] for key in ("start", "end", "positive")}
+        merged["sampled_every"] = max(r.get("sampled_every", 1) for r in results)
+    return merged
+
+def _timeline(windows: List[Dict], positive: np.ndarray) -> Dict:
+    """Positivity per scored window, with its time span"""
+    return {
+        "start": [w["start"] for w in windows],
+        "end": [w["end"] for w in windows],
+        "positive": np.round(positive, 3).tolist()
+    }
+
+def _empty_result(step: int) -> Dict:
+    return {
+        "sentiment": "NEUTRAL",
+        "confidence": 0.0,
+        "emotions": {"positive": 0.0, "negative": 0.0, "neutral": 1.0},
+        "timeline": {"start": [], "end": [], "positive": []},
+        "sampled_every": step
+    }
+
 class SentimentAnalyzer:
     def __init__(self, hf_api_key: str = None):
         self.hf_api_key = hf_api_key
-        # Fallback model for local processing
-        self.local_analyzer = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english",
-            device="cpu"
-        )
-
-    async def analyze_sentiment(self, text: str) -> Dict:
+        # Fallback model for local processing, loaded on first use
+        self.local_model_id = "distilbert-base-uncased-finetuned-sst-2-english"
+        registry.register_pipeline(self.local_model_id, "sentiment-analysis", size_mb=270)
+        self.batcher = get_batcher(self.local_model_id, self.local_analyzer_batch, pool="sentiment")
+
+    def local_analyzer(self, text, **kwargs):
+        """Run the shared local sentiment pipeline (blocking)"""
+        return registry.get(self.local_model_id)(text, **kwargs)
+
+    def local_analyzer_batch(self, texts):
+        """One padded forward pass over texts from any number of jobs (blocking)"""
+        return self.local_analyzer(texts, truncation=True, batch_size=len(texts))
+
+    async def analyze_sentiment(
+        self,
+        text: str,
+        segments: Optional[List[Dict]] = None,
+        sample_every: Optional[int] = None
+    ) -> Dict:
         """Analyze text sentiment and emotions"""
         try:
             if self.hf_api_key:
-                headers = {"Authorization": f"Bearer {self.hf_api_key}"}
-                
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api-inference.huggingface.co/models/SamLowe/roberta-base-go_emotions",
-                        headers=headers,
-                        json={"inputs": text}
-                    )
-
-                if response.status_code == 200:
-                    emotions = response.json()[0]
-                    return self._format_sentiment_analysis(emotions)
+                result = await self._analyze_remotely(text, segments, sample_every)
+                if result is not None:
+                    return result
 
             # Fallback to local analysis
-            return await self._analyze_locally(text)
+            return await self._analyze_locally(text, segments, sample_every)
 
         except Exception as e:
             raise Exception(f"Sentiment analysis failed: {str(e)}")
 
-    async def _analyze_locally(self, text: str) -> Dict:
-        """Perform sentiment analysis using local model"""
-        result = self.local_analyzer(text)[0]
-        
+    async def _analyze_remotely(
+        self,
+        text: str,
+        segments: Optional[List[Dict]] = None,
+        sample_every: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Score the same windows as _analyze_locally through the Inference API,
+        in batches; None if it is unavailable. Emotion scores are grouped per
+        window and aggregated (length-weighted) the same way.
+        """
+        windows, step = sample_windows(build_windows(text, segments), every=sample_every)
+        if not windows:
+            return _empty_result(step)
+
+        window_emotions = []
+        for start in range(0, len(windows), REMOTE_BATCH_SIZE):
+            batch = [w["text"] for w in windows[start:start + REMOTE_BATCH_SIZE]]
+            response = await hf_api.post(REMOTE_MODEL_ID, self.hf_api_key, json={"inputs": batch})
+            if response is None or response.status_code != 200:
+                return None
+            window_emotions.extend(
+                {item["label"]: float(item["score"]) for item in labels}
+                for labels in response.json()
+            )
+
+        polarity = np.array([
+            [sum(emotions.get(e, 0.0) for e in names)
+             for names in (POSITIVE_EMOTIONS, NEGATIVE_EMOTIONS)]
+            for emotions in window_emotions
+        ])
+        weights = np.array([len(w["text"]) for w in windows], dtype=float)
+        labels = sorted({label for emotions in window_emotions for label in emotions})
+        detailed = {
+            label: float(np.average([emotions.get(label, 0.0) for emotions in window_emotions], weights=weights))
+            for label in labels
+        }
+        result = self._format_sentiment_analysis(detailed)
+        # Positivity per window: positive share of the polar emotions
+        polar = polarity.sum(axis=1)
+        positive = np.divide(polarity[:, 0], polar, out=np.full(len(windows), 0.5), where=polar > 0)
+        result["timeline"] = _timeline(windows, positive)
+        result["sampled_every"] = step
+        return result
+
+    async def _analyze_locally(
+        self,
+        text: str,
+        segments: Optional[List[Dict]] = None,
+        sample_every: Optional[int] = None
+    ) -> Dict:
+        """
+        Perform sentiment analysis using local model, window by window.
+        Windows are scored in micro-batches and aggregated (length-weighted)
+        into the document score, plus a positivity timeline per window.
+        """
+        windows, step = sample_windows(build_windows(text, segments), every=sample_every)
+        if not windows:
+            return _empty_result(step)
+
+        results = await asyncio.gather(*(self.batcher.submit(w["text"]) for w in windows))
+        scores = np.array([float(r["score"]) for r in results])
+        is_positive = np.array([r["label"] == "POSITIVE" for r in results])
+        positive = np.where(is_positive, scores, 1.0 - scores)
+        weights = np.array([len(w["text"]) for w in windows], dtype=float)
+        document = float(np.average(positive, weights=weights))
+
         return {
-            "sentiment": result["label"],
-            "confidence": round(float(result["score"]), 3),
+            "sentiment": "POSITIVE" if document >= 0.5 else "NEGATIVE",
+            "confidence": round(max(document, 1.0 - document), 3),
             "emotions": {
-                "positive": round(float(result["score"] if result["label"] == "POSITIVE" else 1 - result["score"]), 3),
-                "negative": round(float(result["score"] if result["label"] == "NEGATIVE" else 1 - result["score"]), 3),
+                "positive": round(document, 3),
+                "negative": round(1.0 - document, 3),
                 "neutral": 0.0
-            }
+            },
+            "timeline": _timeline(windows, positive),
+            "sampled_every": step
         }
 
     def _format_sentiment_analysis(self, emotions: Dict) -> Dict:
         """Format emotion analysis results"""
         # Group emotions into sentiment categories
-        positive_emotions = ["joy", "gratitude", "optimism", "pride", "admiration", "love"]
-        negative_emotions = ["anger", "disgust", "fear", "sadness", "disappointment", "grief"]
-        neutral_emotions = ["neutral", "surprise", "curiosity", "realization"]
-
-        # Calculate aggregate scores
-        positive_score = sum(emotions.get(e, 0) for e in positive_emotions)
-        negative_score = sum(emotions.get(e, 0) for e in negative_emotions)
-        neutral_score = sum(emotions.get(e, 0) for e in neutral_emotions)
+        positive_score = sum(emotions.get(e, 0) for e in POSITIVE_EMOTIONS)
+        negative_score = sum(emotions.get(e, 0) for e in NEGATIVE_EMOTIONS)
+        neutral_score = sum(emotions.get(e, 0) for e in NEUTRAL_EMOTIONS)
 
         # Determine overall sentiment
         sentiment_scores = {
@@ -1,83 +1,279 @@
-from typing import List, Dict, Optional
-import httpx
-from transformers import pipeline
+from typing import Awaitable, Callable, List, Dict, Optional
+from collections import OrderedDict
+import asyncio
+import hashlib
 import os
+import re
 
-# Local fallback models
-local_summarizer = pipeline(
-    "summarization",
-    model="facebook/bart-large-cnn",
-    device="cpu"
-)
+from services.executor import run_in_pool
+from services.batching import get_batcher
+from services.inference_backend import backend_for
+from services.model_registry import registry
+from services.http_client import hf_api
+
+# Local fallback model, loaded on first use
+LOCAL_SUMMARY_MODEL = "facebook/bart-large-cnn"
+registry.register_pipeline(LOCAL_SUMMARY_MODEL, "summarization", size_mb=1650)
+
+# Map-reduce settings: chunks stay under the model's 1024-token input limit,
+# and the map phase always uses the same lengths so its output can be cached
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "900"))
+MAP_MAX_LENGTH = int(os.getenv("SUMMARY_MAP_MAX_LENGTH", "180"))
+MAP_MIN_LENGTH = int(os.getenv("SUMMARY_MAP_MIN_LENGTH", "30"))
+BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "4"))
+MAX_REDUCE_DEPTH = 4
+CHUNK_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))
+
+_sentence_split = re.compile(r"(?<=[.!?])\s+")
+_chunk_cache: "OrderedDict[str, str]" = OrderedDict()
+
+SummarizeFn = Callable[[List[str], int, int], Awaitable[List[str]]]
+
+def local_summarizer(text, **kwargs) -> List[Dict]:
+    """Run the shared local summarization pipeline (blocking)"""
+    return registry.get(LOCAL_SUMMARY_MODEL)(text, **kwargs)
+
+def _tokenizer_name(model: str) -> str:
+    """Register (once) and return the registry name of a model's tokenizer"""
+    name = f"{model}#tokenizer"
+    if not registry.is_registered(name):
+        def load():
+            from transformers import AutoTokenizer
+            return AutoTokenizer.from_pretrained(model)
+        registry.register(name, load, size_mb=5)
+    return name
+
+def _count_tokens(model: str, texts: List[str]) -> List[int]:
+    """Token count of each text without special tokens (blocking)"""
+    tokenizer = registry.get(_tokenizer_name(model))
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+def split_units(text: str, segments: Optional[List[Dict]] = None) -> List[str]:
+    """Split text at transcript segment boundaries if available, else at sentences"""
+    if segments:
+        units = [segment["text"].strip() for segment in segments]
+    else:
+        units = _sentence_split.split(text)
+    return [unit for unit in units if unit and unit.strip()]
+
+async def pack_chunks(model: str, units: List[str], budget: int = CHUNK_TOKENS) -> List[str]:
+    """Greedily pack consecutive units into chunks of at most budget tokens"""
+    counts = await run_in_pool("default", _count_tokens, model, units)
+    chunks, current, used = [], [], 0
+
+    for unit, count in zip(units, counts):
+        if count > budget:
+            # A single oversized unit is split on words, proportionally
+            words = unit.split()
+            step = max(1, len(words) * budget // count)
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [unit]
+
+        for piece in pieces:
+            size = min(count, budget) if len(pieces) == 1 else budget
+            if current and used + size > budget:
+                chunks.append(" ".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += size
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def _cache_key(model: str, chunk: str) -> str:
+    raw = f"{model}\0{backend_for(model)}\0{MAP_MAX_LENGTH}\0{MAP_MIN_LENGTH}\0{chunk}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+async def map_chunks(model: str, chunks: List[str], summarize: SummarizeFn) -> List[str]:
+    """Summarize chunks in batches, reusing cached chunk summaries"""
+    keys = [_cache_key(model, chunk) for chunk in chunks]
+    # Concurrent jobs may evict entries while this one awaits the model, so
+    # its results are collected here and the cache is only looked up and filled
+    summaries: List[Optional[str]] = [_chunk_cache.get(key) for key in keys]
+    for key, summary in zip(keys, summaries):
+        if summary is not None:
+            _chunk_cache.move_to_end(key)
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+
+    for start in range(0, len(missing), BATCH_SIZE):
+        batch = missing[start:start + BATCH_SIZE]
+        results = await summarize([chunks[i] for i in batch], MAP_MAX_LENGTH, MAP_MIN_LENGTH)
+        for i, summary in zip(batch, results):
+            summaries[i] = summary
+            _chunk_cache[keys[i]] = summary
+            while len(_chunk_cache) > CHUNK_CACHE_SIZE:
+                _chunk_cache.popitem(last=False)
+
+    return summaries
+
+async def summarize_hierarchical(
+    text: str,
+    model: str,
+    summarize: SummarizeFn,
+    max_length: int,
+    min_length: int,
+    segments: Optional[List[Dict]] = None
+) -> Dict:
+    """
+    Map-reduce summarization for inputs longer than the model's context.
+    Chunks are summarized, then the joined chunk summaries are re-chunked
+    and reduced until they fit one pass. Empty input gives an empty summary
+    without calling the model.
+    """
+    units = split_units(text, segments)
+    if not units:
+        return {"summary": "", "chunk_summaries": [], "reduce_depth": 0}
+    chunk_summaries: List[str] = []
+    depth = 0
+
+    while True:
+        chunks = await pack_chunks(model, units)
+        if len(chunks) <= 1 or depth >= MAX_REDUCE_DEPTH:
+            final_input = " ".join(chunks)
+            break
+        partials = await map_chunks(model, chunks, summarize)
+        if depth == 0:
+            chunk_summaries = partials
+        units = partials
+        depth += 1
+
+    summary = (await summarize([final_input], max_length, min_length))[0]
+    return {
+        "summary": summary,
+        "chunk_summaries": chunk_summaries or [summary],
+        "reduce_depth": depth
+    }
+
+def _local_batcher(max_length: int, min_length: int):
+    """
+    Micro-batcher for one set of generation lengths. Chunks from concurrent
+    jobs are batched together (only inputs with equal lengths can share a
+    generate() call).
+    """
+    def run_batch(texts: List[str]) -> List[Dict]:
+        return local_summarizer(
+            texts,
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False,
+            truncation=True,
+            batch_size=len(texts)
+        )
+    return get_batcher(
+        f"{LOCAL_SUMMARY_MODEL}:{max_length}:{min_length}", run_batch,
+        pool="summarizer", max_batch=BATCH_SIZE
+    )
+
+def _local_summarize_fn() -> SummarizeFn:
+    async def summarize(texts: List[str], max_length: int, min_length: int) -> List[str]:
+        batcher = _local_batcher(max_length, min_length)
+        result = await asyncio.gather(*(batcher.submit(text) for text in texts))
+        return [item["summary_text"] for item in result]
+    return summarize
+
+def _remote_summarize_fn(model: str, hf_api_key: str) -> SummarizeFn:
+    async def summarize_one(text: str, max_length: int, min_length: int) -> str:
+        response = await hf_api.post(
+            model,
+            hf_api_key,
+            json={
+                "inputs": text,
+                "parameters": {
+                    "max_length": max_length,
+                    "min_length": min_length,
+                    "do_sample": False
+                }
+            }
+        )
+        if response is None:
+            raise Exception(f"Inference API unavailable for {model}")
+        response.raise_for_status()
+        return response.json()[0]["summary_text"]
+
+    async def summarize(texts: List[str], max_length: int, min_length: int) -> List[str]:
+        return list(await asyncio.gather(
+            *(summarize_one(text, max_length, min_length) for text in texts)
+        ))
+    return summarize
 
 async def generate_summaries(
     text: str,
     models: List[str] = ["facebook/bart-large-cnn"],
-    hf_api_key: Optional[str] = None
+    hf_api_key: Optional[str] = None,
+    segments: Optional[List[Dict]] = None,
+    max_length: int = 1024,
+    min_length: int = 40
 ) -> Dict:
     """
     Generate summaries using Hugging Face models
-    Falls back to local models if API fails
+    Falls back to local models if API fails. Long inputs are summarized
+    hierarchically (map-reduce) instead of being truncated by the model.
     """
     summaries = {}
-    
+    chunk_summaries = {}
+
     try:
         if hf_api_key:
-            headers = {"Authorization": f"Bearer {hf_api_key}"}
-            
             # Try Hugging Face API for each model
-            async with httpx.AsyncClient() as client:
-                for model in models:
-                    try:
-                        response = await client.post(
-                            f"https://api-inference.huggingface.co/models/{model}",
-                            headers=headers,
-                            json={
-                                "inputs": text,
-                                "parameters": {
-                                    "max_length": 1024,
-                                    "min_length": 40,
-                                    "do_sample": False
-                                }
-                            }
-                        )
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            summaries[model] = result[0]["summary_text"]
-                            continue
-                            
-                    except Exception:
-                        pass
-                    
-                    # Fallback to local model if API fails
-                    if model == "facebook/bart-large-cnn":
-                        summary = local_summarizer(
-                            text,
-                            max_length=1024,
-                            min_length=40,
-                            do_sample=False
-                        )
-                        summaries[model] = summary[0]["summary_text"]
-        
+            for model in models:
+                try:
+                    result = await summarize_hierarchical(
+                        text, model, _remote_summarize_fn(model, hf_api_key),
+                        max_length, min_length, segments
+                    )
+                    summaries[model] = result["summary"]
+                    chunk_summaries[model] = result["chunk_summaries"]
+                    continue
+
+                except Exception:
+                    pass
+
+                # Fallback to local model if API fails
+                if model == LOCAL_SUMMARY_MODEL:
+                    result = await summarize_hierarchical(
+                        text, model, _local_summarize_fn(),
+                        max_length, min_length, segments
+                    )
+                    summaries[model] = result["summary"]
+                    chunk_summaries[model] = result["chunk_summaries"]
+
         else:
             # Use local model only
-            summary = local_summarizer(
-                text,
-                max_length=1024,
-                min_length=40,
-                do_sample=False
+            result = await summarize_hierarchical(
+                text, LOCAL_SUMMARY_MODEL, _local_summarize_fn(),
+                max_length, min_length, segments
             )
-            summaries["facebook/bart-large-cnn"] = summary[0]["summary_text"]
-        
+            summaries[LOCAL_SUMMARY_MODEL] = result["summary"]
+            chunk_summaries[LOCAL_SUMMARY_MODEL] = result["chunk_summaries"]
+
+        first_model = next(iter(summaries))
         return {
-            "short": next(iter(summaries.values())),  # First summary
+            "short": summaries[first_model],  # First summary
+            "detailed": " ".join(chunk_summaries[first_model]),
+            "bullets": chunk_summaries[first_model],
             "models": summaries
         }
-        
+
     except Exception as e:
         raise Exception(f"Summarization failed: {str(e)}")
 
+async def reduce_summaries(
+    partials: List[str],
+    models: List[str] = ["facebook/bart-large-cnn"],
+    hf_api_key: Optional[str] = None
+) -> Dict:
+    """
+    Document summary from summaries of its parts (e.g. one per chapter);
+    the parts are the units of the map-reduce, so none is split.
+    """
+    result = await generate_summaries(
+        " ".join(partials), models, hf_api_key,
+        segments=[{"text": partial} for partial in partials]
+    )
+    return {**result, "detailed": " ".join(partials), "bullets": partials}
+
 async def generate_quiz(text: str) -> Dict:
     """Generate quiz questions from text"""
     # Implement quiz generation using language models
@@ -86,4 +282,4 @@ async def generate_quiz(text: str) -> Dict:
 async def analyze_sentiment(text: str) -> Dict:
     """Analyze text sentiment"""
     # Implement sentiment analysis
-    pass
\ No newline at end of file
+    pass
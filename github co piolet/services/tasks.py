@@ -0,0 +1,142 @@
+"""
+Celery tasks for distributed job execution (JOB_BACKEND=celery).
+
+A job is a chain: ingest (download + transcription) on the "heavy" queue,
+then a chord of one task per analysis stage on the "light" queue, then a
+finalize task. Start workers per queue, e.g.
+
+    celery -A services.tasks worker -Q heavy --concurrency 1
+    celery -A services.tasks worker -Q light --concurrency 4
+"""
+from typing import Any, Coroutine, Dict, List
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from celery import Celery, chain, chord, group
+from celery.signals import worker_init, worker_process_shutdown
+
+from services import processing
+from services.job_store import REDIS_URL
+from services.database import JobRepository, job_repository
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery(
+    "summarize_anything",
+    broker=os.getenv("CELERY_BROKER_URL", REDIS_URL),
+    backend=os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_routes={
+        "jobs.ingest": {"queue": "heavy"},
+        "jobs.stage": {"queue": "light"},
+        "jobs.finalize": {"queue": "light"}
+    }
+)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def run_async(coro: Coroutine) -> Any:
+    """
+    Run a coroutine on this process' long-lived event loop thread.
+    Services keep loop-bound state (pooled HTTP connections), so every task
+    in a worker process shares one loop instead of calling asyncio.run().
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="task-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+@worker_init.connect
+def create_job_tables(**kwargs):
+    """
+    Make sure the jobs table exists before any task writes to it; the web
+    app may not have started yet. Runs once in the parent worker process,
+    on a throwaway engine so no connection is inherited by the forked
+    children. Retries while the database is still coming up (or another
+    service is creating the same tables).
+    """
+    async def init():
+        repository = JobRepository()
+        try:
+            await repository.init_db()
+        finally:
+            await repository.engine.dispose()
+
+    for attempt in range(10):
+        try:
+            asyncio.run(init())
+            return
+        except Exception as e:
+            logger.warning("Creating job tables failed (attempt %d): %s", attempt + 1, e)
+            time.sleep(2)
+    asyncio.run(init())
+
+@worker_process_shutdown.connect
+def flush_job_updates(**kwargs):
+    """Write out progress updates still buffered in this worker"""
+    if _loop is not None:
+        run_async(job_repository.close())
+
+@celery_app.task(name="jobs.ingest")
+def ingest_task(job_id: str, request_data: dict) -> str:
+    """
+    Transcribe and store the transcript as the job's artifacts. Only the
+    job id travels down the chain (and nothing large goes in the job
+    record); stage and finalize tasks load the transcript from the store.
+    """
+    try:
+        transcript_data = run_async(processing.ingest(job_id, request_data))
+        run_async(processing.store_transcript(job_id, transcript_data))
+    except Exception as e:
+        run_async(processing.fail_job(job_id, str(e)))
+        raise
+    processing.update_job(job_id, status="analyzing", progress=0.6)
+    return job_id
+
+@celery_app.task(name="jobs.stage")
+def stage_task(transcript_job_id: str, job_id: str, request_data: dict, stage: str) -> Dict:
+    try:
+        transcript_data = run_async(processing.load_transcript(transcript_job_id))
+        result = run_async(processing.run_single_stage(job_id, request_data, transcript_data, stage))
+    except Exception as e:
+        run_async(processing.fail_job(job_id, str(e)))
+        raise
+    return {"stage": stage, "result": result}
+
+@celery_app.task(name="jobs.finalize")
+def finalize_task(results: List[Dict], job_id: str) -> str:
+    outputs = {item["stage"]: item["result"] for item in results}
+    transcript_data = run_async(processing.load_transcript(job_id))
+    run_async(processing.finalize(job_id, transcript_data, outputs, transcript_stored=True))
+    return job_id
+
+def enqueue_job(job_id: str, request_data: dict):
+    """Submit a job to the distributed queue"""
+    eager = processing.eager_stages(request_data)
+    if not eager:
+        return chain(
+            ingest_task.s(job_id, request_data),
+            finalize_task.si([], job_id)
+        ).apply_async()
+
+    stages = group(
+        stage_task.s(job_id, request_data, name)
+        for name in eager
+    )
+    return chain(
+        ingest_task.s(job_id, request_data),
+        chord(stages, finalize_task.s(job_id))
+    ).apply_async()
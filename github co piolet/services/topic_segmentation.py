@@ -0,0 +1,120 @@
+from typing import List, Sequence, Tuple
+import re
+import zlib
+
+import numpy as np
+
+# Lexical-cohesion (TextTiling-style) topic segmentation over transcript segments.
+# Terms are hashed into a fixed number of columns so the segment x term
+# matrix stays small (10k segments x 256 columns x 4 bytes = 10 MB) and every
+# step below is a vectorized O(n) pass over it.
+HASH_DIMENSIONS = 256
+BLOCK_SIZE = 8           # segments on each side of a candidate gap
+SMOOTHING = 3            # moving average width over gap scores
+PEAK_WINDOW = 16         # how far a depth score looks for its surrounding peaks
+CUTOFF_STDS = 2.0        # valleys this many std above the mean valley depth are boundaries
+MIN_DEPTH = 0.4          # and at least this deep, so a single-topic stretch is not split
+
+_token = re.compile(r"[a-z][a-z']{2,}")
+_STOPWORDS = frozenset("""
+the and that this with from they there their have were what when which will would about into your
+just like some then than them been also because could very really know going yeah okay right well
+thing things lot kind sort think mean actually basically said says say get got gonna want here
+how who why where all any can are but for not you was his her she him its our out one two use used
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _token.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def term_matrix(token_lists: Sequence[List[str]]) -> np.ndarray:
+    """Hashed term counts, one row per segment"""
+    rows = np.repeat(np.arange(len(token_lists)), [len(tokens) for tokens in token_lists])
+    # Hash each distinct term once; crc32 is stable across processes, unlike hash()
+    terms = [term for tokens in token_lists for term in tokens]
+    column_of = {term: zlib.crc32(term.encode("utf-8")) % HASH_DIMENSIONS for term in set(terms)}
+    columns = np.fromiter(map(column_of.__getitem__, terms), dtype=np.int64, count=len(terms))
+    # bincount over flat cell indices is a single pass, unlike np.add.at
+    cells = np.bincount(rows * HASH_DIMENSIONS + columns, minlength=len(token_lists) * HASH_DIMENSIONS)
+    return cells.reshape(len(token_lists), HASH_DIMENSIONS).astype(np.float32)
+
+
+def gap_scores(matrix: np.ndarray, block: int = BLOCK_SIZE) -> np.ndarray:
+    """
+    Cosine similarity between the block of segments before and after each
+    gap (gap i sits before segment i, for i = 1..n-1), via prefix sums.
+    """
+    n = len(matrix)
+    # prefix[block + i] = sum of rows < i, padded with `block` copies of the
+    # first and last sums so both blocks are plain slices at the edges.
+    # float32 sums of term counts stay exact far beyond any transcript length.
+    prefix = np.zeros((n + 1 + 2 * block, matrix.shape[1]), dtype=np.float32)
+    np.cumsum(matrix, axis=0, out=prefix[block + 1:block + n + 1])
+    prefix[block + n + 1:] = prefix[block + n]
+    left = prefix[block + 1:block + n] - prefix[1:n]
+    right = prefix[2 * block + 1:2 * block + n] - prefix[block + 1:block + n]
+    dots = np.einsum("ij,ij->i", left, right)
+    norms = np.sqrt(np.einsum("ij,ij->i", left, left) * np.einsum("ij,ij->i", right, right))
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+
+def _smooth(values: np.ndarray, width: int) -> np.ndarray:
+    if width <= 1 or len(values) < width:
+        return values
+    kernel = np.ones(width) / width
+    padded = np.pad(values, (width // 2, width - 1 - width // 2), mode="edge")
+    return np.convolve(padded, kernel, mode="valid")
+
+
+def _running_max(values: np.ndarray, window: int, reverse: bool = False) -> np.ndarray:
+    """Max over the previous (or, reversed, the next) window values including each one"""
+    series = values[::-1] if reverse else values
+    padded = np.concatenate([np.full(window - 1, -np.inf), series])
+    result = np.lib.stride_tricks.sliding_window_view(padded, window).max(axis=1)
+    return result[::-1] if reverse else result
+
+
+def depth_scores(scores: np.ndarray, window: int = PEAK_WINDOW) -> np.ndarray:
+    """How deep each gap's similarity valley is relative to the peaks around it"""
+    if len(scores) == 0:
+        return scores
+    return (_running_max(scores, window) - scores) + (_running_max(scores, window, reverse=True) - scores)
+
+
+def find_boundaries(
+    token_lists: Sequence[List[str]],
+    starts: Sequence[float],
+    min_seconds: float,
+    max_boundaries: int,
+    forced: Sequence[int] = ()
+) -> Tuple[List[int], np.ndarray]:
+    """
+    Indices of segments that start a new topic (besides segment 0), plus the
+    depth score of every gap. Valleys (local depth maxima) deeper than
+    mean + CUTOFF_STDS * std of all valleys (and than MIN_DEPTH) become
+    boundaries, deepest first, at least min_seconds apart from each other
+    and from the forced boundaries (explicit chapter markers).
+    """
+    n = len(token_lists)
+    if n < 2:
+        return sorted(set(forced) - {0}), np.zeros(0)
+
+    depths = depth_scores(_smooth(gap_scores(term_matrix(token_lists)), SMOOTHING))
+    previous = np.concatenate([[-np.inf], depths[:-1]])
+    following = np.concatenate([depths[1:], [-np.inf]])
+    valleys = np.flatnonzero((depths >= previous) & (depths > following))
+    threshold = max(MIN_DEPTH, depths[valleys].mean() + CUTOFF_STDS * depths[valleys].std())
+    candidates = valleys[depths[valleys] > threshold]
+    ranked = candidates[np.argsort(-depths[candidates], kind="stable")] + 1  # gap -> segment index
+
+    starts = np.asarray(starts, dtype=float)
+    chosen = [index for index in forced if index > 0]
+    taken = np.array([starts[i] for i in chosen] + [starts[0]])
+    for index in ranked:
+        if len(chosen) >= max_boundaries + len(forced):
+            break
+        if np.all(np.abs(taken - starts[index]) >= min_seconds):
+            chosen.append(int(index))
+            taken = np.append(taken, starts[index])
+    return sorted(set(chosen)), depths
@@ -1,68 +1,294 @@
-from faster_whisper import WhisperModel
+import asyncio
+import multiprocessing
 import os
-from typing import Dict, Optional
-import httpx
+import math
+import re
+from typing import Callable, Dict, List, Optional, Union
+import numpy as np
 
-# Initialize Whisper model (local fallback)
+from services.executor import get_pool, run_in_pool, InferencePool
+from services.model_registry import registry
+from services.http_client import hf_api
+from services.utils import SAMPLE_RATE, load_audio_pcm, pcm_to_wav
+
+# Whisper model (local fallback), loaded on first use
 model_size = "base"
-local_model = WhisperModel(model_size, device="cpu", compute_type="int8")
+
+# Parallel chunked transcription: "auto" splits audio longer than
+# TRANSCRIBE_PARALLEL_MIN_SECONDS across the whisper-chunks process pool
+PARALLEL_MODE = os.getenv("TRANSCRIBE_PARALLEL", "auto")
+PARALLEL_MIN_SECONDS = float(os.getenv("TRANSCRIBE_PARALLEL_MIN_SECONDS", "600"))
+MAX_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_MAX_CHUNK_SECONDS", "600"))
+CHUNK_OVERLAP_SECONDS = 1.0
+SPLIT_SEARCH_SECONDS = 30.0
+
+def whisper_cpu_threads() -> int:
+    """
+    CTranslate2 threads per Whisper model (WHISPER_CPU_THREADS, else the
+    cores split across the pool that runs it). Every whisper-chunks worker
+    process loads its own model, so full-width thread pools in each of
+    them would oversubscribe the CPU.
+    """
+    configured = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+    if configured > 0:
+        return configured
+    pool = get_pool("whisper-chunks" if multiprocessing.parent_process() else "whisper")
+    return max(1, (os.cpu_count() or 1) // pool.size)
+
+def _load_whisper():
+    from faster_whisper import WhisperModel
+    return WhisperModel(
+        model_size,
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=whisper_cpu_threads()
+    )
+
+registry.register(f"whisper-{model_size}", _load_whisper, size_mb=300)
+
+# Called with (segment, total_duration_seconds) as each segment is decoded
+SegmentCallback = Callable[[Dict, float], None]
+
+def _transcribe_locally(
+    audio: Union[str, np.ndarray],
+    offset: float = 0.0,
+    on_segment: Optional[SegmentCallback] = None
+) -> Dict:
+    """Run Whisper and drain its lazy segment generator (blocking)"""
+    local_model = registry.get(f"whisper-{model_size}")
+    decoded, info = local_model.transcribe(
+        audio,
+        beam_size=5,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500)
+    )
+    # Decoding happens while iterating, so consume the generator exactly once
+    segments = []
+    for segment in decoded:
+        item = {
+            "start": segment.start + offset,
+            "end": segment.end + offset,
+            "text": segment.text
+        }
+        segments.append(item)
+        if on_segment:
+            on_segment(item, info.duration)
+
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": info.language
+    }
+
+def _silence_midpoints(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Sample positions in the middle of non-speech gaps, via Silero VAD"""
+    try:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=300))
+    except Exception:
+        return np.empty(0, dtype=np.int64)
+
+    gaps = [
+        (previous["end"] + current["start"]) // 2
+        for previous, current in zip(speech, speech[1:])
+    ]
+    return np.asarray(gaps, dtype=np.int64)
+
+def _quietest_point(audio: np.ndarray, lo: int, hi: int, sample_rate: int) -> int:
+    """Fallback split point: the lowest-energy 300 ms window in [lo, hi)"""
+    frame = sample_rate * 30 // 1000
+    window = audio[lo:hi]
+    n_frames = len(window) // frame
+    if n_frames < 10:
+        return (lo + hi) // 2
+    energy = np.square(window[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+    smoothed = np.convolve(energy, np.ones(10) / 10, mode="same")
+    return lo + int(np.argmin(smoothed)) * frame + frame // 2
+
+def find_split_points(audio: np.ndarray, n_chunks: int, sample_rate: int = SAMPLE_RATE) -> List[int]:
+    """
+    Pick n_chunks - 1 cut positions (in samples) close to equal-length targets,
+    preferring silence detected by VAD and falling back to low-energy frames.
+    """
+    gaps = _silence_midpoints(audio, sample_rate)
+    search = int(SPLIT_SEARCH_SECONDS * sample_rate)
+    cuts = []
+
+    for k in range(1, n_chunks):
+        target = k * len(audio) // n_chunks
+        if len(gaps):
+            nearest = gaps[np.argmin(np.abs(gaps - target))]
+            if abs(int(nearest) - target) <= search:
+                cuts.append(int(nearest))
+                continue
+        cuts.append(_quietest_point(audio, max(0, target - search), min(len(audio), target + search), sample_rate))
+
+    return sorted(set(cuts))
+
+_word = re.compile(r"[\w']+")
+
+def _dedupe_seam(previous: Dict, segment: Dict, max_words: int = 8) -> Dict:
+    """Drop words at the start of segment that repeat the end of previous"""
+    tail = _word.findall(previous["text"].lower())[-max_words:]
+    words = segment["text"].split()
+    head = [" ".join(_word.findall(w.lower())) for w in words[:max_words]]
+
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k]:
+            return {**segment, "text": " " + " ".join(words[k:])}
+    return segment
+
+def _stitch_chunk(merged: List[Dict], segments: List[Dict], lo: float, hi: float) -> List[Dict]:
+    """Append the segments a chunk owns (midpoint in [lo, hi)) to merged"""
+    added = []
+    for segment in segments:
+        midpoint = (segment["start"] + segment["end"]) / 2
+        if not lo <= midpoint < hi:
+            continue
+        if not added and merged:
+            segment = _dedupe_seam(merged[-1], segment)
+        if segment["text"].strip():
+            merged.append(segment)
+            added.append(segment)
+    return added
+
+def stitch_segments(chunks: List[List[Dict]], seams: List[float]) -> List[Dict]:
+    """
+    Merge per-chunk segments (already shifted to absolute time).
+    Each chunk owns the segments whose midpoint falls between its seams;
+    words duplicated across a seam by the overlap are removed.
+    """
+    merged: List[Dict] = []
+    bounds = [-math.inf] + list(seams) + [math.inf]
+
+    for i, segments in enumerate(chunks):
+        _stitch_chunk(merged, segments, bounds[i], bounds[i + 1])
+
+    return merged
+
+async def transcribe_parallel(
+    audio: Union[str, np.ndarray],
+    pool: Optional[InferencePool] = None,
+    sample_rate: int = SAMPLE_RATE,
+    on_segment: Optional[SegmentCallback] = None
+) -> Dict:
+    """
+    Split audio at silences into chunks, transcribe them across a process
+    pool and stitch the segments back together with absolute timestamps.
+    Stitched segments are reported in order as soon as every earlier chunk is done.
+    """
+    pool = pool or get_pool("whisper-chunks")
+    if isinstance(audio, str):
+        audio = await run_in_pool("media", load_audio_pcm, audio, sample_rate)
+
+    duration = len(audio) / sample_rate
+    rounds = max(1, math.ceil(duration / (pool.size * MAX_CHUNK_SECONDS)))
+    n_chunks = max(1, pool.size * rounds)
+
+    cuts = await run_in_pool("default", find_split_points, audio, n_chunks, sample_rate)
+    overlap = int(CHUNK_OVERLAP_SECONDS * sample_rate)
+    edges = [0] + cuts + [len(audio)]
+
+    tasks = []
+    for start, end in zip(edges, edges[1:]):
+        padded_start = max(0, start - overlap)
+        padded_end = min(len(audio), end + overlap)
+        tasks.append(asyncio.ensure_future(pool.run(
+            _transcribe_locally,
+            audio[padded_start:padded_end],
+            padded_start / sample_rate
+        )))
+
+    segments: List[Dict] = []
+    languages = []
+    bounds = [-math.inf] + [cut / sample_rate for cut in cuts] + [math.inf]
+    try:
+        for i, task in enumerate(tasks):
+            result = await task
+            languages.append(result["language"])
+            for segment in _stitch_chunk(segments, result["segments"], bounds[i], bounds[i + 1]):
+                if on_segment:
+                    on_segment(segment, duration)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": max(set(languages), key=languages.count),
+        "chunks": len(tasks)
+    }
 
 async def transcribe_audio(
-    audio_path: str,
+    audio: Union[str, np.ndarray],
     use_hf_api: bool = True,
-    hf_api_key: Optional[str] = None
+    hf_api_key: Optional[str] = None,
+    parallel: Optional[bool] = None,
+    on_segment: Optional[SegmentCallback] = None
 ) -> Dict:
     """
-    Transcribe audio using Hugging Face Whisper API or local model
+    Transcribe audio using Hugging Face Whisper API or local model.
+    audio is a file path or 16 kHz mono float32 PCM already decoded in memory.
+    on_segment, if given, is called on the event loop for every segment as it is decoded.
     """
     try:
+        loop = asyncio.get_running_loop()
+
+        def report(segment: Dict, duration: float):
+            # Local decoding runs in a worker thread; hop back to the loop
+            loop.call_soon_threadsafe(on_segment, segment, duration)
+
+        local_callback = report if on_segment else None
+
         if use_hf_api and hf_api_key:
             # Try Hugging Face API first
-            headers = {"Authorization": f"Bearer {hf_api_key}"}
-            
-            with open(audio_path, "rb") as f:
-                files = {
-                    "audio": (os.path.basename(audio_path), f, "audio/wav")
-                }
-                
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api-inference.huggingface.co/models/openai/whisper-large-v3",
-                        headers=headers,
-                        files=files
-                    )
-                    
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        "text": result.get("text", ""),
-                        "segments": result.get("segments", []),
-                        "language": result.get("language", "en")
+            if isinstance(audio, np.ndarray):
+                files = {"audio": ("audio.wav", pcm_to_wav(audio), "audio/wav")}
+            else:
+                with open(audio, "rb") as f:
+                    # Read once so retries can resend the same body
+                    files = {
+                        "audio": (os.path.basename(audio), f.read(), "audio/wav")
                     }
-        
-        # Fallback to local model
-        segments, info = local_model.transcribe(
-            audio_path,
-            beam_size=5,
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500)
-        )
-        
-        # Combine segments
-        text = " ".join(segment.text for segment in segments)
-        
-        return {
-            "text": text,
-            "segments": [
-                {
-                    "start": segment.start,
-                    "end": segment.end,
-                    "text": segment.text
+
+            response = await hf_api.post(
+                "openai/whisper-large-v3",
+                hf_api_key,
+                files=files
+            )
+
+            if response is not None and response.status_code == 200:
+                result = response.json()
+                segments = result.get("segments", [])
+                if on_segment and segments:
+                    # The API returns every segment at once; progress is
+                    # relative to the whole media, as on the local path
+                    if isinstance(audio, np.ndarray):
+                        duration = len(audio) / SAMPLE_RATE
+                    else:
+                        duration = segments[-1].get("end", 0.0)
+                    for segment in segments:
+                        on_segment(segment, duration)
+                return {
+                    "text": result.get("text", ""),
+                    "segments": segments,
+                    "language": result.get("language", "en")
                 }
-                for segment in segments
-            ],
-            "language": info.language
-        }
-        
+
+        # Fallback to local model
+        if parallel is None and PARALLEL_MODE != "never":
+            if isinstance(audio, str):
+                audio = await run_in_pool("media", load_audio_pcm, audio)
+            long_enough = len(audio) / SAMPLE_RATE >= PARALLEL_MIN_SECONDS
+            if PARALLEL_MODE == "always" or (long_enough and get_pool("whisper-chunks").size > 1):
+                return await transcribe_parallel(audio, on_segment=on_segment)
+            return await run_in_pool("whisper", _transcribe_locally, audio, 0.0, local_callback)
+
+        if parallel:
+            return await transcribe_parallel(audio, on_segment=on_segment)
+        return await run_in_pool("whisper", _transcribe_locally, audio, 0.0, local_callback)
+
     except Exception as e:
-        raise Exception(f"Transcription failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Transcription failed: {str(e)}")
@@ -0,0 +1,70 @@
+from typing import Dict, List
+import hashlib
+import os
+import sqlite3
+import threading
+
+from services.cache import CACHE_DIR
+
+TM_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join(CACHE_DIR, "translation_memory.sqlite3"))
+
+
+class TranslationMemory:
+    """
+    Persistent (sentence, target language, model) -> translation store.
+    A single SQLite file shared by every process; lookups and inserts are
+    done in bulk, one statement per batch of sentences.
+    """
+
+    def __init__(self, path: str = TM_PATH):
+        self.path = path
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared across pool threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translation TEXT NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def key(self, model: str, target_lang: str, sentence: str) -> str:
+        return hashlib.sha1(f"{model}\0{target_lang}\0{sentence}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, target_lang: str, sentences: List[str]) -> Dict[str, str]:
+        """Known translations for sentences, keyed by sentence (blocking)"""
+        keys = {self.key(model, target_lang, s): s for s in sentences}
+        found: Dict[str, str] = {}
+        items = list(keys)
+        for start in range(0, len(items), 500):
+            chunk = items[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            found.update({keys[key]: translation for key, translation in rows})
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model: str, target_lang: str, translations: Dict[str, str]):
+        """Store sentence -> translation pairs (blocking)"""
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation) VALUES (?, ?)",
+                [(self.key(model, target_lang, s), t) for s, t in translations.items()]
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+translation_memory = TranslationMemory()
@@ -1,7 +1,39 @@
-from typing import Dict
-import httpx
-from transformers import pipeline
+from typing import Dict, List, Optional
+import asyncio
 import json
+import os
+import re
+
+from services.batching import get_batcher
+from services.inference_backend import backend_for
+from services.executor import run_in_pool
+from services.model_registry import registry
+from services.http_client import hf_api
+from services.language_id import identify_language, sample_text
+from services.translation_memory import translation_memory
+
+# opus-mt inputs stay well under its 512-token limit
+SENTENCE_MAX_CHARS = 400
+REMOTE_BATCH_SIZE = 16
+# Only ask the remote detector when the local guess is this unsure; it then
+# sees a sample that fits its 512-token input, not the whole transcript
+REMOTE_DETECTION_BELOW = float(os.getenv("REMOTE_DETECTION_BELOW", "0.8"))
+REMOTE_SAMPLE_CHARS = 1500
+
+_sentence_split = re.compile(r"(?<=[.!?।])\s+")
+
+def split_sentences(text: str, max_chars: int = SENTENCE_MAX_CHARS) -> List[str]:
+    """Split text into sentences; overlong ones are cut at word boundaries"""
+    sentences = []
+    for sentence in _sentence_split.split(" ".join(text.split())):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
 
 class Translator:
     def __init__(self, hf_api_key: str = None):
@@ -11,95 +43,102 @@ class Translator:
             "hi": "Helsinki-NLP/opus-mt-en-hi",  # English to Hindi
             "en": "Helsinki-NLP/opus-mt-mul-en"  # Multiple languages to English
         }
-        
-        # Initialize local fallback models
-        self.local_translators = {}
 
-    async def translate(self, text: str, target_lang: str) -> Dict:
-        """Translate text to target language"""
+        # Local fallback models are registered here and loaded on first use
+        for model_id in self.language_models.values():
+            registry.register_pipeline(model_id, "translation", size_mb=300)
+
+    async def translate(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> Dict:
+        """
+        Translate text to target language, sentence by sentence. source_lang
+        is reported as given, or detected from the text when not known.
+        """
         try:
-            if self.hf_api_key:
-                headers = {"Authorization": f"Bearer {self.hf_api_key}"}
-                model_id = self.language_models.get(target_lang)
-                
-                if not model_id:
-                    raise ValueError(f"Unsupported target language: {target_lang}")
-
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"https://api-inference.huggingface.co/models/{model_id}",
-                        headers=headers,
-                        json={"inputs": text}
-                    )
-
-                if response.status_code == 200:
-                    translation = response.json()[0]["translation_text"]
-                    return {
-                        "translated_text": translation,
-                        "source_lang": "en",
-                        "target_lang": target_lang
-                    }
-
-            # Fallback to local translation
-            return await self._translate_locally(text, target_lang)
+            sentences = split_sentences(text)
+            translated = await self.translate_sentences(sentences, target_lang)
+            return {
+                "translated_text": " ".join(translated),
+                "source_lang": source_lang or await self.detect_language(text),
+                "target_lang": target_lang
+            }
 
         except Exception as e:
             raise Exception(f"Translation failed: {str(e)}")
 
-    async def _translate_locally(self, text: str, target_lang: str) -> Dict:
-        """Translate using local models"""
-        try:
-            model_id = self.language_models.get(target_lang)
-            
-            if model_id not in self.local_translators:
-                self.local_translators[model_id] = pipeline(
-                    "translation",
-                    model=model_id,
-                    device="cpu"
-                )
+    async def translate_sentences(self, sentences: List[str], target_lang: str) -> List[str]:
+        """
+        Translate sentences in batches. Each distinct sentence is translated
+        once and remembered on disk, so repeated phrases and re-runs are free.
+        """
+        model_id = self.language_models.get(target_lang)
+        if not model_id:
+            raise ValueError(f"Unsupported target language: {target_lang}")
 
-            result = self.local_translators[model_id](text)
-            
-            return {
-                "translated_text": result[0]["translation_text"],
-                "source_lang": "en",
-                "target_lang": target_lang
-            }
+        unique = list(dict.fromkeys(sentences))
+        # Remember outputs per backend: quantized models translate slightly differently
+        tm_model = model_id if backend_for(model_id) == "pytorch" else f"{model_id}@{backend_for(model_id)}"
+        known = await run_in_pool("default", translation_memory.get_many, tm_model, target_lang, unique)
+        missing = [sentence for sentence in unique if sentence not in known]
+
+        if missing:
+            new = await self._translate_remotely(model_id, missing) if self.hf_api_key else None
+            if new is None:
+                # Fallback to local translation
+                new = await self._translate_locally(model_id, missing)
+            fresh = dict(zip(missing, new))
+            await run_in_pool("default", translation_memory.put_many, tm_model, target_lang, fresh)
+            known.update(fresh)
+
+        return [known[sentence] for sentence in sentences]
+
+    async def _translate_remotely(self, model_id: str, sentences: List[str]):
+        """Translate through the Inference API in batches; None if it is unavailable"""
+        translated = []
+        for start in range(0, len(sentences), REMOTE_BATCH_SIZE):
+            batch = sentences[start:start + REMOTE_BATCH_SIZE]
+            response = await hf_api.post(model_id, self.hf_api_key, json={"inputs": batch})
+            if response is None or response.status_code != 200:
+                return None
+            translated.extend(item["translation_text"] for item in response.json())
+        return translated
+
+    async def _translate_locally(self, model_id: str, sentences: List[str]) -> List[str]:
+        """Translate using local models, padded batches via the shared batcher"""
+        try:
+            batcher = self.local_batcher(model_id)
+            results = await asyncio.gather(*(batcher.submit(sentence) for sentence in sentences))
+            return [result["translation_text"] for result in results]
 
         except Exception as e:
             raise Exception(f"Local translation failed: {str(e)}")
 
+    def local_translator(self, model_id: str, text, **kwargs):
+        """Run the shared local translation pipeline for model_id (blocking)"""
+        return registry.get(model_id)(text, **kwargs)
+
+    def local_batcher(self, model_id: str):
+        """Micro-batcher shared by all jobs translating with model_id"""
+        def run_batch(texts):
+            return self.local_translator(model_id, texts, truncation=True, batch_size=len(texts))
+        return get_batcher(model_id, run_batch, pool="translation")
+
     async def detect_language(self, text: str) -> str:
         """Detect the language of the input text"""
         try:
-            if self.hf_api_key:
-                headers = {"Authorization": f"Bearer {self.hf_api_key}"}
-                
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api-inference.huggingface.co/models/papluca/xlm-roberta-base-language-detection",
-                        headers=headers,
-                        json={"inputs": text}
-                    )
-
-                if response.status_code == 200:
+            guess = identify_language(text)
+            if self.hf_api_key and guess["confidence"] < REMOTE_DETECTION_BELOW:
+                # Unsure locally: ask the remote model about the same bounded sample
+                response = await hf_api.post(
+                    "papluca/xlm-roberta-base-language-detection",
+                    self.hf_api_key,
+                    json={"inputs": sample_text(text, REMOTE_SAMPLE_CHARS)}
+                )
+
+                if response is not None and response.status_code == 200:
                     result = response.json()[0]
                     return result[0]["label"]
 
-            # Fallback to basic detection
-            return self._detect_language_locally(text)
+            return guess["language"]
 
         except Exception:
             return "en"  # Default to English on failure
-
-    def _detect_language_locally(self, text: str) -> str:
-        """Basic language detection using character analysis"""
-        # Simple heuristic based on character sets
-        devanagari = len([c for c in text if '\u0900' <= c <= '\u097F']) > 0
-        tamil = len([c for c in text if '\u0B80' <= c <= '\u0BFF']) > 0
-        
-        if devanagari:
-            return "hi"
-        elif tamil:
-            return "ta"
-        return "en"
\ No newline at end of file
@@ -1,12 +1,16 @@
 import re
-from typing import Optional
-import httpx
+import wave
+from typing import Dict, Optional
 from fastapi import HTTPException
 import ffmpeg
 from PIL import Image
 import io
 from fpdf import FPDF
 import json
+import numpy as np
+
+from services.executor import run_in_pool
+from services.http_client import get_http_client
 
 async def validate_url(url: str) -> bool:
     """Validate URL format and accessibility"""
@@ -22,9 +26,8 @@ async def validate_url(url: str) -> bool:
         raise HTTPException(400, "Invalid URL format")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.head(url)
-            return response.status_code < 400
+        response = await get_http_client().head(url)
+        return response.status_code < 400
     except Exception:
         raise HTTPException(400, "URL is not accessible")
 
@@ -35,26 +38,55 @@ async def extract_audio(video_path: str) -> str:
         
         stream = ffmpeg.input(video_path)
         stream = ffmpeg.output(stream, output_path, acodec='pcm_s16le', ac=1, ar='16k')
-        ffmpeg.run(stream, overwrite_output=True)
+        await run_in_pool("media", ffmpeg.run, stream, overwrite_output=True)
         
         return output_path
     except Exception as e:
         raise Exception(f"Audio extraction failed: {str(e)}")
 
+SAMPLE_RATE = 16000
+
+def load_audio_pcm(source: str, sample_rate: int = SAMPLE_RATE, headers: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """
+    Decode any audio/video file or URL to mono float32 PCM via ffmpeg (blocking).
+    ffmpeg writes raw samples to a pipe, so nothing touches the disk; the
+    whole decoded output is buffered in memory and returned as one array.
+    """
+    input_args = {}
+    if headers:
+        input_args["headers"] = "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+    out, _ = (
+        ffmpeg
+        .input(source, **input_args)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def pcm_to_wav(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Encode float32 PCM as an in-memory 16-bit WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
 async def generate_thumbnail(video_path: str) -> bytes:
     """Generate thumbnail from video"""
     try:
-        probe = ffmpeg.probe(video_path)
+        probe = await run_in_pool("media", ffmpeg.probe, video_path)
         duration = float(probe['streams'][0]['duration'])
         time = duration / 2  # Take thumbnail from middle of video
         
-        out, _ = (
+        stream = (
             ffmpeg
             .input(video_path, ss=time)
             .filter('scale', 480, -1)
             .output('pipe:', vframes=1, format='image2', vcodec='mjpeg')
-            .run(capture_stdout=True)
         )
+        out, _ = await run_in_pool("media", ffmpeg.run, stream, capture_stdout=True)
         
         return out
     except Exception as e:
@@ -12,6 +12,8 @@ const app = {
             currentStage: 'Ready',
             progress: 0,
             jobId: null,
+            eventSource: null,
+            stages: {},
             error: null,
             theme: localStorage.getItem('theme') || 'dark',
             language: localStorage.getItem('language') || 'en',
@@ -91,13 +93,67 @@ const app = {
 
                 const { job_id } = await response.json();
                 this.jobId = job_id;
-                this.pollJobStatus();
+                this.watchJobEvents();
 
             } catch (error) {
                 this.handleError('Failed to submit job', error);
             }
         },
 
+        watchJobEvents() {
+            if (!this.jobId) return;
+            if (!window.EventSource) return this.pollJobStatus();
+
+            const source = new EventSource(`/api/v1/events/${this.jobId}`);
+            this.eventSource = source;
+
+            source.addEventListener('snapshot', (event) => {
+                const { status, progress, stages, segments } = JSON.parse(event.data);
+                this.currentStage = status;
+                this.progress = progress;
+                this.stages = stages;
+                this.transcript = segments.map(segment => segment.text).join('').trim();
+            });
+
+            source.addEventListener('status', (event) => {
+                // Only the fields that changed are sent
+                const { status, progress } = JSON.parse(event.data);
+                if (status !== undefined) this.currentStage = status;
+                if (progress !== undefined) this.progress = progress;
+            });
+
+            // Partial transcript is readable while decoding continues
+            source.addEventListener('segment', (event) => {
+                const segment = JSON.parse(event.data);
+                this.transcript = (this.transcript + segment.text).trim();
+            });
+
+            source.addEventListener('stage', (event) => {
+                const { stage, progress, ...state } = JSON.parse(event.data);
+                this.stages = { ...this.stages, [stage]: state };
+                this.progress = progress;
+            });
+
+            source.addEventListener('completed', async () => {
+                source.close();
+                await this.fetchResults();
+                this.saveToHistory();
+            });
+
+            source.addEventListener('failed', (event) => {
+                source.close();
+                this.handleError('Job processing failed', new Error(JSON.parse(event.data).error));
+            });
+
+            source.onerror = () => {
+                // Stream dropped (proxy, worker restart): fall back to polling
+                if (this.eventSource !== source) return;
+                source.close();
+                this.eventSource = null;
+                if (this.processing) this.pollJobStatus();
+            };
+        },
+
         async pollJobStatus() {
             if (!this.jobId) return;
 
@@ -130,25 +186,48 @@ const app = {
 
                 const results = await response.json();
                 
+                // Only precomputed artifacts are included; the rest
+                // (quiz, sentiment, ...) are fetched right after
                 this.transcript = results.transcript;
-                this.summaries = results.summaries;
-                this.chapters = results.chapters;
-                this.quiz = results.quiz;
-                this.sentiment = results.sentiment;
-                this.translations = results.translations;
+                if (results.summaries) this.summaries = results.summaries;
+                if (results.chapters) this.chapters = results.chapters;
+                if (results.quiz) this.quiz = results.quiz;
+                if (results.sentiment) this.sentiment = results.sentiment;
+                if (results.translations) this.translations = results.translations;
 
                 this.processing = false;
                 this.initializeMedia();
+                this.loadMissingArtifacts(results);
 
             } catch (error) {
                 this.handleError('Failed to fetch results', error);
             }
         },
 
+        loadMissingArtifacts(results) {
+            // Each one loads on its own, so the chapters show without
+            // waiting for the quiz
+            ['chapters', 'quiz', 'sentiment']
+                .filter(name => !results[name])
+                .forEach(name => this.loadArtifact(name)
+                    .catch(error => this.handleError(`Failed to load ${name}`, error)));
+        },
+
+        async loadArtifact(name) {
+            // Computed server-side on first request; later requests revalidate via ETag
+            const response = await fetch(`/api/v1/result/${this.jobId}/${name}`);
+            if (!response.ok) throw new Error(`Failed to load ${name}`);
+            this[name] = await response.json();
+        },
+
         async exportResults(format) {
             try {
                 let url, filename;
 
+                if (format === 'markdown' || format === 'json') {
+                    await Promise.all(['chapters', 'quiz', 'sentiment'].map(name => this.loadArtifact(name)));
+                }
+
                 switch (format) {
                     case 'pdf':
                         const pdfResponse = await fetch(`/api/v1/export/pdf/${this.jobId}`);
@@ -0,0 +1,83 @@
+import fcntl
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+from main import app, artifact_store, job_store
+from services.artifacts import ArtifactStore
+
+
+def test_artifacts_round_trip_with_size_report(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    segments = [{"start": i, "end": i + 1, "text": "the same words again"} for i in range(2000)]
+    manifest = store.put_all("job", {"segments": segments, "quiz": {"questions": []}})
+
+    assert store.get("job", "segments").to_segments() == segments
+    assert store.manifest("job") == manifest
+    assert json.loads(store.get_all_raw("job")) == {"segments": segments, "quiz": {"questions": []}}
+
+    report = store.size_report("job")
+    # Segments are stored in binary form: smaller than their JSON before compression
+    assert report["artifacts"]["segments"]["raw_bytes"] < len(json.dumps(segments)) * 0.6
+    assert report["artifacts"]["segments"]["stored_bytes"] < len(json.dumps(segments)) / 10
+    assert report["compression_ratio"] > 5
+
+
+def test_artifact_endpoint_supports_conditional_get(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "root", str(tmp_path))
+    manifest = artifact_store.put_all("done", {"quiz": {"questions": ["q1"]}, "sentiment": {"sentiment": "POSITIVE"}})
+    job_store.create("done", {"status": "completed", "progress": 1.0, "result": manifest})
+    client = TestClient(app)
+
+    response = client.get("/api/v1/result/done/quiz")
+    assert response.status_code == 200
+    assert response.json() == {"questions": ["q1"]}
+    etag = response.headers["etag"]
+
+    response = client.get("/api/v1/result/done/quiz", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert client.get("/api/v1/result/done/transcript").status_code == 404
+    assert client.get("/api/v1/result/done").json()["sentiment"] == {"sentiment": "POSITIVE"}
+    assert client.get("/api/v1/result/done/sizes").json()["artifacts"]["quiz"]["raw_bytes"] > 0
+
+
+def test_manifest_updates_wait_for_another_process_lock(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.put_all("job", {"transcript": "hello"})
+    done = threading.Event()
+
+    def add_language():
+        store.put("job", "language", "en")
+        done.set()
+
+    # A separate open file description, as another worker process would hold
+    with open(tmp_path / "job" / "manifest.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        writer = threading.Thread(target=add_language)
+        writer.start()
+        assert not done.wait(0.2)
+        assert set(store.manifest("job")) == {"transcript"}
+    writer.join(5)
+
+    assert done.is_set()
+    assert set(store.manifest("job")) == {"transcript", "language"}
+
+
+def test_served_chapters_carry_their_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "root", str(tmp_path))
+    segments = [{"start": 4.0 * i, "end": 4.0 * i + 4, "text": f" part {i}"} for i in range(6)]
+    chapters = [
+        {"title": "Introduction", "start_seconds": 0.0, "end_seconds": 8.0, "segment_range": [0, 2]},
+        {"title": "Part, Four", "start_seconds": 8.0, "end_seconds": 24.0, "segment_range": [2, 6]}
+    ]
+    manifest = artifact_store.put_all("chaptered", {"segments": segments, "chapters": chapters})
+    job_store.create("chaptered", {"status": "completed", "progress": 1.0, "result": manifest})
+    client = TestClient(app)
+
+    served = client.get("/api/v1/result/chaptered/chapters").json()
+    assert [c["content"] for c in served] == [" part 0  part 1", " part 2  part 3  part 4  part 5"]
+    assert served[1]["segment_range"] == [2, 6]
+    assert client.get("/api/v1/result/chaptered").json()["chapters"] == served
+    # Stored compactly: the text is only added when served
+    assert "content" not in artifact_store.get("chaptered", "chapters")[0]
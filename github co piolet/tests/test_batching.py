@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from services.batching import MicroBatcher
+
+
+def test_concurrent_calls_share_one_batch_and_get_their_own_result():
+    calls = []
+
+    def run_batch(items):
+        calls.append(list(items))
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher("test", run_batch, pool="default", max_batch=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(word) for word in ["a", "b", "c"]))
+
+    assert asyncio.run(run()) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["batch_sizes"] == {"3-4": 1}
+    assert stats["queue_delay_ms"]["max"] >= 0
+
+
+def test_batches_respect_size_and_padded_token_budget():
+    sizes = []
+
+    def run_batch(items):
+        sizes.append(len(items))
+        return items
+
+    async def run(batcher, items):
+        return await asyncio.gather(*(batcher.submit(item) for item in items))
+
+    by_size = MicroBatcher("size", run_batch, pool="default", max_batch=2, max_wait_ms=20)
+    assert asyncio.run(run(by_size, ["x"] * 5)) == ["x"] * 5
+    assert sizes == [2, 2, 1]
+
+    # One long input pads the batch: 3 x 40 tokens exceeds a budget of 100
+    sizes.clear()
+    by_tokens = MicroBatcher("tokens", run_batch, pool="default", max_batch=16,
+                             max_wait_ms=20, max_tokens=100, cost=len)
+    asyncio.run(run(by_tokens, ["a" * 10, "b" * 40, "c" * 10]))
+    assert sizes == [2, 1]
+
+
+def test_batch_failure_reaches_every_caller():
+    def run_batch(items):
+        raise ValueError("model crashed")
+
+    batcher = MicroBatcher("failing", run_batch, pool="default", max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
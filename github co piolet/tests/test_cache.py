@@ -0,0 +1,68 @@
+import asyncio
+import os
+
+from services.cache import ResultCache, hash_bytes, hash_file, hash_text
+
+
+def test_keys_ignore_param_order_but_not_values(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("summaries", "abc", model="bart", max_length=1024)
+
+    assert key == cache.key("summaries", "abc", max_length=1024, model="bart")
+    assert key != cache.key("summaries", "abc", model="bart", max_length=512)
+    assert key != cache.key("summaries", "abd", model="bart", max_length=1024)
+    assert key != cache.key("quiz", "abc", model="bart", max_length=1024)
+
+
+def test_content_hashes_agree(tmp_path):
+    path = tmp_path / "media.bin"
+    path.write_bytes("héllo".encode("utf-8"))
+    assert hash_file(str(path), chunk_size=2) == hash_text("héllo") == hash_bytes(path.read_bytes())
+
+
+def test_put_get_round_trip_and_hit_counts(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("chapters", "abc")
+    assert cache.get("chapters", key) is None
+
+    value = {"chapters": [{"title": "Intro", "segment_range": [0, 3]}], "n": 1.5}
+    cache.put("chapters", key, value)
+    assert cache.get("chapters", key) == value
+    assert os.path.exists(os.path.join(str(tmp_path), "chapters", key[:2], f"{key}.json"))
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_get_or_compute_computes_once(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"summary": "short"}
+
+    async def run():
+        first = await cache.get_or_compute("summaries", "k", compute)
+        second = await cache.get_or_compute("summaries", "k", compute)
+        return first, second
+
+    assert asyncio.run(run()) == ({"summary": "short"}, {"summary": "short"})
+    assert len(calls) == 1
+
+
+def test_least_recently_used_files_are_evicted_over_budget(tmp_path):
+    cache = ResultCache(str(tmp_path), max_mb=2500 / 2**20)
+    payload = "x" * 1000
+    for age, name in enumerate(["old", "unused"]):
+        cache.put("stage", name, payload)
+        os.utime(cache._path("stage", name), (1000 + age, 1000 + age))
+
+    # Reading "old" makes it the most recently used entry; the third put
+    # goes over budget and evicts "unused"
+    assert cache.get("stage", "old") == payload
+    cache.put("stage", "new", payload)
+
+    assert cache.get("stage", "unused") is None
+    assert cache.get("stage", "old") == payload
+    assert cache.get("stage", "new") == payload
+    assert cache.stats()["evictions"] == 1
+    assert cache._scan_size() <= cache.max_bytes * 0.9
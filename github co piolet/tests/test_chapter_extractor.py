@@ -0,0 +1,86 @@
+import asyncio
+import random
+
+import numpy as np
+
+from services.chapter_extractor import ChapterExtractor
+from services.incremental import ChapterStream
+from services.segment_store import chapter_text
+from services.topic_segmentation import find_boundaries, gap_scores, term_matrix, tokenize
+
+
+def topic_segments(topics, per_topic=60, seconds=4.0):
+    rng = random.Random(0)
+    filler = "so we will look at this which you can see here".split()
+    segments = []
+    for words in topics:
+        for _ in range(per_topic):
+            text = " ".join(rng.choices(words, k=5) + rng.choices(filler, k=4))
+            start = seconds * len(segments)
+            segments.append({"start": start, "end": start + seconds, "text": text})
+    return segments
+
+
+PHOTOSYNTHESIS = "chlorophyll photosynthesis sunlight leaves glucose stomata".split()
+ORBITS = "planets gravity orbit telescope comets asteroid".split()
+MARKETS = "inflation interest markets bonds equity currency".split()
+
+
+def test_markers_only_match_at_the_start():
+    extractor = ChapterExtractor()
+    assert extractor._is_chapter_marker("Chapter 3 the history of rome")
+    assert extractor._is_chapter_marker("2. Setting up the project")
+    assert extractor._is_chapter_marker("Introduction to the course")
+    assert not extractor._is_chapter_marker("revenue grew 3.5 million last year")
+    assert not extractor._is_chapter_marker("as I said in the introduction")
+
+
+def test_gap_scores_dip_at_a_topic_change():
+    tokens = [tokenize(s["text"]) for s in topic_segments([PHOTOSYNTHESIS, ORBITS])]
+    scores = gap_scores(term_matrix(tokens))
+    assert len(scores) == len(tokens) - 1
+    assert abs(int(np.argmin(scores)) + 1 - 60) <= 2
+
+
+def test_boundaries_respect_markers_and_min_spacing():
+    segments = topic_segments([PHOTOSYNTHESIS, ORBITS, MARKETS])
+    tokens = [tokenize(s["text"]) for s in segments]
+    starts = [s["start"] for s in segments]
+
+    boundaries, _ = find_boundaries(tokens, starts, min_seconds=90, max_boundaries=5)
+    assert len(boundaries) == 2
+    assert all(abs(b - t) <= 3 for b, t in zip(boundaries, [60, 120]))
+
+    boundaries, _ = find_boundaries(tokens, starts, min_seconds=90, max_boundaries=5, forced=[30])
+    assert 30 in boundaries
+    assert all(abs(starts[a] - starts[b]) >= 90 for a, b in zip(boundaries, boundaries[1:]))
+
+
+def test_extract_chapters_titles_and_content():
+    segments = topic_segments([PHOTOSYNTHESIS, ORBITS])
+    segments[0]["text"] = "Introduction to plants"
+    chapters = asyncio.run(ChapterExtractor().extract_chapters("", segments))
+
+    assert len(chapters) == 2
+    assert chapters[0]["title"] == "Introduction to plants"
+    assert chapters[1]["title"].split(", ")[0].lower() in ORBITS
+    assert chapters[0]["end_seconds"] == chapters[1]["start_seconds"]
+    first, last = chapters[1]["segment_range"]
+    assert chapters[0]["segment_range"] == [0, first] and last == len(segments)
+    assert chapter_text(chapters[1], segments).startswith(segments[first]["text"])
+    assert asyncio.run(ChapterExtractor().extract_chapters("", [])) == []
+
+
+def test_stream_cuts_chapters_before_the_transcript_ends():
+    segments = topic_segments([PHOTOSYNTHESIS, ORBITS, MARKETS])
+    emitted = []
+    stream = ChapterStream(ChapterExtractor(), lambda i, chapter, segs: emitted.append((fed[0], chapter, segs)))
+    fed = [0]
+    for segment in segments[:150]:
+        fed[0] += 1
+        stream.feed(segment)
+    assert stream.finish(segments) == 3
+
+    assert emitted[0][0] < 120
+    assert [len(segs) for _, _, segs in emitted] == [60, 60, 60]
+    assert [c["title"] for _, c, _ in emitted] == [c["title"] for c in ChapterExtractor().segment_chapters(segments)]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+from sqlalchemy import event
+
+from services.database import JobRepository, async_database_url, create_engine
+
+
+def make_repository(tmp_path, flush_interval_ms=50):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    statements = []
+    event.listens_for(engine.sync_engine, "before_cursor_execute")(
+        lambda conn, cursor, statement, *args: statements.append(statement)
+    )
+    return JobRepository(engine, flush_interval_ms=flush_interval_ms), statements
+
+
+def test_async_database_url_picks_async_drivers():
+    assert async_database_url("sqlite:///./jobs.db") == "sqlite+aiosqlite:///./jobs.db"
+    assert async_database_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+
+
+def test_progress_updates_are_coalesced_into_one_write(tmp_path):
+    async def run():
+        repository, statements = make_repository(tmp_path)
+        await repository.init_db()
+        await repository.create_job("job-1", {"models": ["bart"]})
+        statements.clear()
+
+        for i in range(100):
+            await repository.update_job("job-1", {"status": "transcribing", "progress": i / 100})
+        # Visible to readers before it is written
+        assert (await repository.get_job("job-1"))["progress"] == 0.99
+        updates_before_flush = sum(s.startswith("UPDATE") for s in statements)
+
+        await asyncio.sleep(0.2)
+        job = await repository.get_job("job-1")
+        await repository.close()
+        return updates_before_flush, sum(s.startswith("UPDATE") for s in statements), job
+
+    before, after, job = asyncio.run(run())
+    assert before == 0
+    assert after == 1
+    assert job["status"] == "transcribing"
+    assert job["progress"] == 0.99
+
+
+def test_terminal_state_is_written_through(tmp_path):
+    async def run():
+        repository, _ = make_repository(tmp_path, flush_interval_ms=60000)
+        await repository.init_db()
+        await repository.create_job("job-2", {})
+        await repository.update_job("job-2", {"progress": 0.5})
+        await repository.update_job("job-2", {"status": "completed", "progress": 1.0, "result": {"quiz": []}})
+        pending = repository.stats()["pending_jobs"]
+
+        # A fresh repository sees only what reached the database
+        fresh, _ = make_repository(tmp_path)
+        job = await fresh.get_job("job-2")
+        await fresh.close()
+        await repository.close()
+        return pending, job
+
+    pending, job = asyncio.run(run())
+    assert pending == 0
+    assert job["status"] == "completed"
+    assert job["result"] == {"quiz": []}
+
+
+def test_updates_from_other_threads_survive_concurrent_flushes(tmp_path):
+    async def run():
+        repository, _ = make_repository(tmp_path, flush_interval_ms=60000)
+        await repository.init_db()
+        for i in range(8):
+            await repository.create_job(f"job-{i}", {})
+
+        def record(i):
+            for step in range(1, 201):
+                repository.record(f"job-{i}", {"progress": step / 200})
+
+        threads = [threading.Thread(target=record, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            await repository.flush()
+            await asyncio.sleep(0)
+        await repository.flush()
+
+        fresh, _ = make_repository(tmp_path)
+        jobs = [await fresh.get_job(f"job-{i}") for i in range(8)]
+        await fresh.close()
+        await repository.close()
+        return jobs
+
+    assert [job["progress"] for job in asyncio.run(run())] == [1.0] * 8
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from services import processing, transcriber
+from services.events import EventBus, format_sse
+from services.job_store import SUBSCRIBED, MemoryJobStore, RedisJobStore
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class ScriptedJobStore(MemoryJobStore):
+    """Delivers a fixed list of events to every subscriber"""
+
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+        self.live = False
+        self.read_while_live = []
+
+    def get(self, job_id, segments=False):
+        self.read_while_live.append(self.live)
+        return super().get(job_id, segments)
+
+    async def subscribe(self, job_id):
+        await asyncio.sleep(0.01)
+        self.live = True
+        yield SUBSCRIBED
+        for event in self.events:
+            yield event
+
+
+def test_format_sse_encodes_one_event():
+    assert format_sse("segment", {"text": "hi"}) == 'event: segment\ndata: {"text": "hi"}\n\n'
+
+
+def test_event_bus_fans_out_and_drops_oldest_for_slow_consumers():
+    async def run():
+        bus = EventBus(queue_size=2)
+        fast, slow = bus.subscribe("job"), bus.subscribe("job")
+        bus.publish("job", "status", {"progress": 0.1})
+        assert fast.get_nowait() == ("status", {"progress": 0.1})
+        bus.publish("job", "status", {"progress": 0.2})
+        bus.publish("job", "status", {"progress": 0.3})
+        assert [slow.get_nowait()[1]["progress"] for _ in range(2)] == [0.2, 0.3]
+        bus.publish("other", "status", {})
+        assert fast.qsize() == 2
+
+        bus.unsubscribe("job", fast)
+        bus.unsubscribe("job", slow)
+        assert bus.subscriber_count("job") == 0
+
+    asyncio.run(run())
+
+
+def test_record_segment_stores_publishes_and_advances_progress(monkeypatch):
+    store = MemoryJobStore()
+    store.create("job", {"status": "transcribing", "progress": 0.4})
+    published = []
+    monkeypatch.setattr(processing, "job_store", store)
+    monkeypatch.setattr(store, "publish", lambda job_id, event, data: published.append((event, data)))
+
+    segment = {"start": 0.0, "end": 30.0, "text": " hello"}
+    processing.record_segment("job", segment, duration=60.0)
+
+    assert store.get("job")["segments"] == [segment]
+    assert store.get("job")["progress"] == 0.5
+    assert published == [("segment", segment)]
+
+
+def test_api_segments_report_progress_against_the_whole_media(monkeypatch):
+    segments = [{"start": 0.0, "end": 10.0, "text": " a"}, {"start": 10.0, "end": 40.0, "text": " b"}]
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {"text": "a b", "segments": segments, "language": "en"}
+
+    async def post(model, api_key, **kwargs):
+        return Response()
+
+    monkeypatch.setattr(transcriber.hf_api, "post", post)
+
+    async def run(audio):
+        seen = []
+        await transcriber.transcribe_audio(audio, hf_api_key="key", on_segment=lambda s, d: seen.append(d))
+        return seen
+
+    assert asyncio.run(run(np.zeros(16000 * 60, dtype=np.float32))) == [60.0, 60.0]
+    assert asyncio.run(run(str(__file__))) == [40.0, 40.0]
+
+
+def test_events_endpoint_streams_snapshot_then_live_events(monkeypatch):
+    segment = {"start": 0.0, "end": 4.0, "text": " hi"}
+    store = ScriptedJobStore([
+        None,
+        ("segment", segment),
+        ("status", {"status": "completed", "progress": 1.0}),
+        ("segment", {"never": "sent"})
+    ])
+    store.create("job", {"status": "transcribing", "progress": 0.4})
+    store.append_segment("job", {"start": -4.0, "end": 0.0, "text": " earlier"})
+    monkeypatch.setattr(main, "job_store", store)
+
+    response = TestClient(main.app).get("/api/v1/events/job")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert ": keepalive" in response.text
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["snapshot", "segment", "status", "completed"]
+    assert events[0][1]["segments"][0]["text"] == " earlier"
+    assert events[1][1] == segment
+    # The snapshot is read only after the subscription is live
+    assert store.read_while_live[-1] is True
+
+
+def test_events_endpoint_ends_at_once_for_finished_jobs(monkeypatch):
+    store = ScriptedJobStore([])
+    store.create("job", {"status": "failed", "progress": 0.5, "error": "boom"})
+    monkeypatch.setattr(main, "job_store", store)
+    client = TestClient(main.app)
+
+    events = parse_sse(client.get("/api/v1/events/job").text)
+    assert events == [
+        ("snapshot", {"status": "failed", "progress": 0.5, "stages": {}, "segments": []}),
+        ("failed", {"error": "boom"})
+    ]
+    assert client.get("/api/v1/events/missing").status_code == 404
+
+
+class RecordingRedis:
+    """Just enough of a Redis client to see which thread runs each command"""
+
+    def __init__(self):
+        self.hashes, self.lists, self.calls = {}, {}, []
+
+    def _record(self, command):
+        self.calls.append((command, threading.current_thread().name))
+
+    def pipeline(self):
+        return self
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self._record("hset")
+        self.hashes.setdefault(key, {}).update(mapping or {field: value})
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        pass
+
+    def rpush(self, key, value):
+        self._record("rpush")
+        self.lists.setdefault(key, []).append(value)
+
+    def publish(self, channel, message):
+        self._record("publish")
+
+    def hgetall(self, key):
+        self._record("hgetall")
+        return {field.encode(): value for field, value in self.hashes.get(key, {}).items()}
+
+    def lrange(self, key, start, end):
+        self._record("lrange")
+        return self.lists.get(key, [])
+
+
+def test_redis_store_keeps_redis_calls_off_the_loop_and_in_order():
+    store = RedisJobStore()
+    store.redis = RecordingRedis()
+
+    async def run():
+        store.create("job", {"status": "queued"})
+        store.append_segment("job", {"text": " hi"})
+        store.update("job", {"status": "transcribing"})
+        store.publish("job", "status", {"status": "transcribing"})
+        job = await store.load("job")
+        with_segments = await store.load("job", segments=True)
+        return job, with_segments
+
+    job, with_segments = asyncio.run(run())
+
+    assert job == {"stages": {}, "status": "transcribing"}
+    assert with_segments["segments"] == [{"text": " hi"}]
+    assert [command for command, _ in store.redis.calls] == [
+        "hset", "rpush", "hset", "publish", "hgetall", "hgetall", "lrange"
+    ]
+    assert all(thread.startswith("job-store") for _, thread in store.redis.calls)
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from services import executor
+from services.executor import InferencePool, _parse_pool_config
+
+
+def test_pool_config_defaults_overrides_and_modes():
+    config = _parse_pool_config("whisper=3, media=4:thread, whisper-chunks=2")
+    assert config["whisper"] == {"size": 3, "mode": "thread"}
+    assert config["media"] == {"size": 4, "mode": "thread"}
+    assert config["whisper-chunks"] == {"size": 2, "mode": "process"}
+    assert config["summarizer"]["size"] == executor.DEFAULT_POOL_SIZES["summarizer"]
+    assert _parse_pool_config("whisper-chunks=2:thread")["whisper-chunks"]["mode"] == "thread"
+
+    with pytest.raises(ValueError, match="process mode"):
+        _parse_pool_config("summarizer=2:process")
+    with pytest.raises(ValueError, match="unknown mode"):
+        _parse_pool_config("media=2:fiber")
+
+
+def test_get_pool_routes_by_kind_and_falls_back_to_default(monkeypatch):
+    monkeypatch.setattr(executor, "_pools", {})
+    monkeypatch.setattr(executor, "_pool_config", _parse_pool_config("whisper=2,default=3"))
+
+    whisper = executor.get_pool("whisper")
+    assert executor.get_pool("whisper") is whisper
+    assert (whisper.kind, whisper.size, whisper.mode) == ("whisper", 2, "thread")
+    assert executor.get_pool("unknown").size == 3
+
+    thread_names = asyncio.run(executor.run_in_pool("whisper", lambda: threading.current_thread().name))
+    assert thread_names.startswith("whisper-worker")
+    assert set(executor.pool_metrics()) == {"whisper", "unknown"}
+    executor.shutdown_pools()
+
+
+def test_metrics_count_queueing_and_failures():
+    pool = InferencePool("test", size=1)
+    release = threading.Event()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    async def run():
+        blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert pool.metrics()["running"] == 1 and pool.metrics()["queued"] == 2
+        release.set()
+        await asyncio.gather(*blocked)
+        with pytest.raises(RuntimeError):
+            await pool.run(fail)
+
+    asyncio.run(run())
+    metrics = pool.metrics()
+    assert metrics["max_queue_depth"] == 2
+    assert (metrics["submitted"], metrics["completed"], metrics["failed"]) == (4, 3, 1)
+    assert metrics["running"] == metrics["queued"] == 0
+    pool.shutdown()
+
+
+def test_process_mode_runs_in_another_process_and_shutdown_resets():
+    pool = InferencePool("whisper-chunks", size=1, mode="process")
+    assert asyncio.run(pool.run(os.getpid)) != os.getpid()
+
+    pool.shutdown()
+    assert pool._executor is None
+    # A pool is recreated lazily after shutdown
+    assert asyncio.run(pool.run(os.getpid)) != os.getpid()
+    pool.shutdown()
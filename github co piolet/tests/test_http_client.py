@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import httpx
+
+from services.http_client import CircuitBreaker, InferenceAPIClient
+
+
+def make_client(handler, **kwargs):
+    # Local stub in place of the Inference API
+    return InferenceAPIClient(
+        base_url="http://stub",
+        backoff=0.01,
+        transport=httpx.MockTransport(handler),
+        **kwargs
+    )
+
+
+def test_retries_model_loading_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503, json={"error": "Model is loading", "estimated_time": 0.01})
+        return httpx.Response(200, json=[{"summary_text": "ok"}])
+
+    async def run():
+        api = make_client(handler, retries=3)
+        response = await api.post("facebook/bart-large-cnn", "key", json={"inputs": "text"})
+        await api.close()
+        return response
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert calls[0].headers["Authorization"] == "Bearer key"
+    assert calls[0].url.path == "/models/facebook/bart-large-cnn"
+
+
+def test_circuit_breaker_opens_and_skips_requests():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, json={"error": "unavailable"})
+
+    async def run():
+        api = make_client(handler, retries=0, failure_threshold=2, reset_seconds=60)
+        results = [await api.post("model", None, json={}) for _ in range(4)]
+        await api.close()
+        return api, results
+
+    api, results = asyncio.run(run())
+
+    assert results == [None, None, None, None]
+    assert len(calls) == 2
+    assert api.stats()["model"]["state"] == "open"
+
+
+def test_client_errors_are_returned_without_retry():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": "bad input"})
+
+    async def run():
+        api = make_client(handler, retries=3)
+        response = await api.post("model", None, json={})
+        await api.close()
+        return response
+
+    assert asyncio.run(run()).status_code == 400
+    assert len(calls) == 1
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert [breaker.allow() for _ in range(3)] == [True, False, False]
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_concurrent_callers_send_a_single_half_open_probe():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={})
+
+    async def run():
+        api = make_client(handler, retries=0, failure_threshold=1, reset_seconds=0.2)
+        breaker = api.breaker("model")
+        breaker.record_failure()
+        await asyncio.sleep(0.21)
+        results = await asyncio.gather(*(api.post("model", None, json={}) for _ in range(5)))
+        await api.close()
+        return breaker, results
+
+    breaker, results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert sum(result is not None for result in results) == 1
+    assert breaker.state == "closed"
+
+
+def test_slow_attempt_is_hedged_and_first_response_wins():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        # The first request stalls; the hedge answers quickly
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+        return httpx.Response(200, json={"call": len(calls)})
+
+    async def run():
+        api = make_client(handler, hedge_after=0.05)
+        started = time.monotonic()
+        response = await api.post("model", None, json={})
+        elapsed = time.monotonic() - started
+        fast = await api.post("model", None, json={})
+        await api.close()
+        return api, response, elapsed, fast
+
+    api, response, elapsed, fast = asyncio.run(run())
+
+    assert response.json() == {"call": 2}
+    assert elapsed < 0.5
+    assert api.hedged == 1
+    assert fast.status_code == 200 and len(calls) == 3
@@ -0,0 +1,26 @@
+import pytest
+
+from services import inference_backend
+from services.inference_backend import _parse_backend_config
+from services.model_registry import ModelRegistry
+
+
+def test_backend_config_parsing():
+    config = _parse_backend_config("facebook/bart-large-cnn=int8, distilbert-sst2=onnx")
+    assert config == {"facebook/bart-large-cnn": "int8", "distilbert-sst2": "onnx"}
+    with pytest.raises(ValueError):
+        _parse_backend_config("facebook/bart-large-cnn=tensorrt")
+
+
+def test_registered_pipeline_loads_on_configured_backend(monkeypatch):
+    loaded = []
+    monkeypatch.setitem(inference_backend._LOADERS, "int8",
+                        lambda task, model, **kwargs: loaded.append((task, model)) or "quantized")
+    monkeypatch.setitem(inference_backend._backend_config, "some/model", "int8")
+
+    registry = ModelRegistry(budget_mb=0)
+    registry.register_pipeline("some/model", "summarization", size_mb=1000)
+
+    assert registry._specs["some/model"].size_mb == 400
+    assert registry.get("some/model") == "quantized"
+    assert loaded == [("summarization", "some/model")]
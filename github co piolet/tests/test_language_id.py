@@ -0,0 +1,47 @@
+import asyncio
+
+from services import translator as translator_module
+from services.language_id import identify_language, sample_text, script_counts
+from services.translator import Translator
+
+
+def test_scripts_and_latin_languages():
+    assert identify_language("नमस्ते, आज हम मशीन लर्निंग के बारे में बात करेंगे")["language"] == "hi"
+    assert identify_language("வணக்கம், இன்று நாம் பேசுவோம்")["language"] == "ta"
+    assert identify_language("Hello everyone, today we are going to talk about how it works.")["language"] == "en"
+    assert identify_language("Hola a todos, hoy vamos a hablar sobre cómo funciona.")["language"] == "es"
+    assert identify_language("Hallo zusammen, heute sprechen wir über maschinelles Lernen.")["language"] == "de"
+
+    mixed = identify_language("Hello and welcome everyone. नमस्ते")
+    assert mixed["language"] == "en"
+    assert 0 < mixed["scores"]["hi"] < mixed["confidence"] < 1
+    assert identify_language("12 34 !!") == {"language": "en", "confidence": 0.0, "scores": {}}
+
+
+def test_sample_is_bounded_and_spans_the_text():
+    text = "a" * 100_000 + "ழ" * 100
+    sample = sample_text(text, max_chars=1600, windows=16)
+    assert len(sample) <= 1600 + 15
+    assert script_counts(sample)["ta"] == 100
+
+
+def test_remote_detection_only_when_unsure(monkeypatch):
+    sent = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return [[{"label": "fr", "score": 0.9}]]
+
+    async def fake_post(model_id, api_key, json):
+        sent.append(json["inputs"])
+        return Response()
+
+    monkeypatch.setattr(translator_module.hf_api, "post", fake_post)
+    translator = Translator(hf_api_key="key")
+
+    assert asyncio.run(translator.detect_language("Hello everyone, today we talk about it. " * 1000)) == "en"
+    assert sent == []
+    assert asyncio.run(translator.detect_language("ok " * 5000)) == "fr"
+    assert len(sent[0]) <= translator_module.REMOTE_SAMPLE_CHARS + 16
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from services import processing
+from services.artifacts import ArtifactStore
+from services.database import JobRepository, create_engine
+from services.job_store import MemoryJobStore
+
+
+@pytest.fixture
+def job(monkeypatch, tmp_path):
+    store = MemoryJobStore()
+    artifacts = ArtifactStore(str(tmp_path / "artifacts"))
+    monkeypatch.setattr(processing, "job_store", store)
+    monkeypatch.setattr(processing, "artifact_store", artifacts)
+    monkeypatch.setattr(processing, "job_repository",
+                        JobRepository(create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")))
+
+    manifest = artifacts.put_all("job", {"transcript": "hello world", "segments": []})
+    store.create("job", {"status": "completed", "options": {}, "result": manifest})
+    return store, artifacts
+
+
+def test_precompute_pulls_in_dependencies():
+    assert processing.eager_stages({"options": {}}) == ["summaries"]
+    assert processing.eager_stages({"options": {"precompute": ["quiz"]}}) == ["chapters", "quiz"]
+    assert processing.eager_stages({"options": {"precompute": []}}) == []
+
+
+def test_artifact_is_computed_once_for_concurrent_requests(job, monkeypatch):
+    store, artifacts = job
+    calls = []
+
+    def fake_stages(request_data, transcript_data):
+        async def chapters(deps):
+            calls.append("chapters")
+            await asyncio.sleep(0.05)
+            return [{"title": "Intro"}]
+
+        async def quiz(deps):
+            calls.append("quiz")
+            await asyncio.sleep(0.05)
+            return {"from": transcript_data["text"], "chapters": len(deps["chapters"])}
+
+        return {"chapters": chapters, "quiz": quiz}
+
+    monkeypatch.setattr(processing, "build_stages", fake_stages)
+
+    async def run():
+        await processing.job_repository.init_db()
+        return await asyncio.gather(*(processing.ensure_artifact("job", "quiz") for _ in range(5)))
+
+    manifests = asyncio.run(run())
+    assert calls == ["chapters", "quiz"]
+    assert all("quiz" in manifest and "chapters" in manifest for manifest in manifests)
+    assert artifacts.get("job", "quiz") == {"from": "hello world", "chapters": 1}
+    assert "quiz" in store.get("job")["result"]
+
+    asyncio.run(processing.ensure_artifact("job", "quiz"))
+    assert calls == ["chapters", "quiz"]
+
+
+def test_artifact_computed_by_another_process_is_not_recomputed(job, monkeypatch):
+    store, artifacts = job
+    calls = []
+
+    def fake_stages(request_data, transcript_data):
+        async def sentiment(deps):
+            calls.append("sentiment")
+            return {"sentiment": "NEUTRAL"}
+
+        return {"sentiment": sentiment}
+
+    monkeypatch.setattr(processing, "build_stages", fake_stages)
+    monkeypatch.setattr(processing, "LAZY_LOCK_POLL_SECONDS", 0.01)
+    # Stands in for another API process computing the same artifact
+    held = artifacts.try_lock("job", "sentiment")
+    assert artifacts.try_lock("job", "sentiment") is None
+
+    async def other_process_finishes():
+        await asyncio.sleep(0.05)
+        artifacts.put("job", "sentiment", {"sentiment": "POSITIVE"})
+        held.close()
+
+    async def run():
+        _, manifest = await asyncio.gather(
+            other_process_finishes(), processing.ensure_artifact("job", "sentiment")
+        )
+        return manifest
+
+    manifest = asyncio.run(run())
+    assert calls == []
+    assert "sentiment" in manifest and "sentiment" in store.get("job")["result"]
@@ -0,0 +1,32 @@
+from services.model_registry import ModelRegistry
+
+
+def test_models_load_lazily_and_are_shared():
+    calls = []
+    registry = ModelRegistry(budget_mb=0)
+    registry.register("summarizer", lambda: calls.append(1) or object(), size_mb=10)
+
+    assert not registry.is_loaded("summarizer")
+    first = registry.get("summarizer")
+    second = registry.get("summarizer")
+
+    assert first is second
+    assert len(calls) == 1
+    assert registry.stats()["loads"] == 1
+    assert registry.stats()["hits"] == 1
+
+
+def test_lru_eviction_respects_budget():
+    registry = ModelRegistry(budget_mb=25)
+    for name in ["a", "b", "c"]:
+        registry.register(name, object, size_mb=10)
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # "b" is now least recently used
+    registry.get("c")
+
+    assert registry.is_loaded("a")
+    assert registry.is_loaded("c")
+    assert not registry.is_loaded("b")
+    assert registry.stats()["evictions"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+from services.pipeline import StageGraph, StageError
+
+
+def test_independent_stages_run_concurrently():
+    async def slow(_):
+        await asyncio.sleep(0.2)
+        return "done"
+
+    graph = StageGraph()
+    for name in ["a", "b", "c"]:
+        graph.add_stage(name, slow)
+
+    started = time.monotonic()
+    results = asyncio.run(graph.run())
+    elapsed = time.monotonic() - started
+
+    assert results == {"a": "done", "b": "done", "c": "done"}
+    assert elapsed < 0.5
+
+
+def test_dependencies_receive_results_and_progress_reaches_one():
+    progress = []
+
+    async def language(_):
+        return "en"
+
+    async def translations(deps):
+        return ["ta", "hi"] if deps["language"] == "en" else ["en"]
+
+    graph = (
+        StageGraph()
+        .add_stage("language", language)
+        .add_stage("translations", translations, depends_on=["language"])
+    )
+    results = asyncio.run(graph.run(on_progress=lambda name, state, f: progress.append(f)))
+
+    assert results["translations"] == ["ta", "hi"]
+    assert progress[-1] == 1.0
+    assert graph.status["translations"]["status"] == "completed"
+
+
+def test_required_stage_timeout_raises():
+    async def hang(_):
+        await asyncio.sleep(5)
+
+    graph = StageGraph().add_stage("quiz", hang, timeout=0.05)
+
+    with pytest.raises(StageError):
+        asyncio.run(graph.run())
+    assert graph.status["quiz"]["status"] == "timeout"
+
+
+def test_optional_failure_skips_dependents():
+    async def boom(_):
+        raise RuntimeError("model unavailable")
+
+    async def after(_):
+        return "unreachable"
+
+    graph = (
+        StageGraph()
+        .add_stage("language", boom, required=False)
+        .add_stage("translations", after, depends_on=["language"], required=False)
+    )
+    results = asyncio.run(graph.run())
+
+    assert results == {"language": None, "translations": None}
+    assert graph.status["translations"]["status"] == "skipped"
+
+
+def test_cycles_are_rejected():
+    async def noop(_):
+        return None
+
+    graph = (
+        StageGraph()
+        .add_stage("a", noop, depends_on=["b"])
+        .add_stage("b", noop, depends_on=["a"])
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(graph.run())
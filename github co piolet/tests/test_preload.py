@@ -0,0 +1,55 @@
+import gc
+import os
+
+from services import preload
+from services.model_registry import ModelRegistry
+from services.preload import memory_report, parse_smaps_rollup, preload_models, selected_models
+
+SMAPS_ROLLUP = """\
+55d0c0a00000-7ffd3a1f1000 ---p 00000000 00:00 0                          [rollup]
+Rss:              409600 kB
+Pss:              153600 kB
+Pss_Anon:          51200 kB
+Shared_Clean:     256000 kB
+Shared_Dirty:      10240 kB
+Private_Clean:     40960 kB
+Private_Dirty:    102400 kB
+Swap:                  0 kB
+"""
+
+
+def test_parse_smaps_rollup_splits_shared_and_unique():
+    assert parse_smaps_rollup(SMAPS_ROLLUP.splitlines()) == {
+        "rss_mb": 400.0,
+        "pss_mb": 150.0,
+        "shared_mb": 260.0,
+        "unique_mb": 140.0
+    }
+    assert parse_smaps_rollup([]) == {"rss_mb": 0, "pss_mb": 0, "shared_mb": 0, "unique_mb": 0}
+
+
+def test_memory_report_reads_proc_or_returns_empty():
+    assert memory_report("no-such-pid") == {}
+    if os.path.exists("/proc/self/smaps_rollup"):
+        assert memory_report()["rss_mb"] > 0
+
+
+def test_preload_loads_selected_models_and_freezes_gc(monkeypatch):
+    loads = []
+    registry = ModelRegistry()
+    registry.register("summarizer", lambda: loads.append("summarizer") or object(), size_mb=1)
+    registry.register("quiz", lambda: loads.append("quiz") or object(), size_mb=1)
+    monkeypatch.setattr(preload, "registry", registry)
+
+    assert selected_models(" summarizer , missing ") == ["summarizer", "missing"]
+    assert sorted(selected_models("all")) == ["quiz", "summarizer"]
+    monkeypatch.setenv("PRELOAD_MODELS", "quiz")
+    assert selected_models() == ["quiz"]
+
+    try:
+        assert preload_models(["summarizer", "missing"]) == ["summarizer"]
+        assert loads == ["summarizer"]
+        assert registry.is_loaded("summarizer") and not registry.is_loaded("quiz")
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
@@ -0,0 +1,147 @@
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from services import processing
+from services.cache import ResultCache
+from services.job_store import MemoryJobStore
+from services.utils import pcm_to_wav
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = MemoryJobStore()
+    monkeypatch.setattr(processing, "job_store", store)
+    monkeypatch.setattr(processing, "result_cache", ResultCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(processing.job_repository, "record", lambda job_id, fields: None)
+    store.create("job", {"status": "queued", "progress": 0.0})
+    return store
+
+
+def test_pcm_to_wav_is_16khz_mono():
+    audio = np.linspace(-1, 1, 16000, dtype=np.float32)
+    with wave.open(io.BytesIO(pcm_to_wav(audio))) as wav:
+        assert (wav.getnchannels(), wav.getframerate(), wav.getnframes()) == (1, 16000, 16000)
+
+
+def test_streamed_url_is_decoded_in_memory_without_files(store, monkeypatch):
+    audio = np.zeros(16000, dtype=np.float32)
+    seen = {}
+
+    async def resolve(url):
+        return "https://cdn.example/audio.webm", {"User-Agent": "x"}
+
+    def decode(source, sample_rate=16000, headers=None):
+        seen["decoded"] = (source, headers)
+        return audio
+
+    async def transcribe(audio_input, on_segment=None):
+        seen["transcribed"] = audio_input
+        return {"text": "hi", "segments": [], "language": "en"}
+
+    async def no_download(*args, **kwargs):
+        raise AssertionError("nothing should be downloaded to disk")
+
+    monkeypatch.setattr(processing, "resolve_audio_stream", resolve)
+    monkeypatch.setattr(processing, "load_audio_pcm", decode)
+    monkeypatch.setattr(processing, "transcribe_audio", transcribe)
+    monkeypatch.setattr(processing, "download_media", no_download)
+
+    request = {"type": "video", "url": "https://youtube.com/watch?v=1", "options": {"audio_pipeline": "stream"}}
+    result = asyncio.run(processing.ingest("job", request))
+
+    assert result["text"] == "hi"
+    assert seen["decoded"] == ("https://cdn.example/audio.webm", {"User-Agent": "x"})
+    assert seen["transcribed"] is audio
+
+    # Second run: the URL maps to the cached transcript, nothing is decoded
+    seen.clear()
+    assert asyncio.run(processing.ingest("job", request))["text"] == "hi"
+    assert seen == {}
+
+
+def test_incremental_job_analyzes_chapters_during_transcription(store, monkeypatch):
+    from tests.test_chapter_extractor import MARKETS, ORBITS, PHOTOSYNTHESIS, topic_segments
+
+    segments = topic_segments([PHOTOSYNTHESIS, ORBITS, MARKETS])
+    events = []
+
+    async def transcribe(audio_input, on_segment=None):
+        for segment in segments:
+            on_segment(segment, segments[-1]["end"])
+            await asyncio.sleep(0)
+        events.append("transcribed")
+        return {"text": " ".join(s["text"] for s in segments), "segments": segments, "language": "en"}
+
+    async def summarize(text, models, segments=None):
+        events.append("summarized")
+        return {"short": text[:20], "detailed": text, "bullets": [text], "models": {}}
+
+    async def reduce(partials, models):
+        return {"short": "|".join(partials), "bullets": partials}
+
+    async def sentiment(text, segments=None):
+        return {"sentiment": "POSITIVE", "confidence": 0.9,
+                "emotions": {"positive": 0.9, "negative": 0.1, "neutral": 0.0}}
+
+    async def quiz(text, num_questions, chapters=None):
+        return {"mcq": [{"question": f"About {chapters[0]['title']}?"}], "true_false": []}
+
+    outputs = {}
+
+    async def finalize(job_id, transcript_data, results):
+        outputs.update(results)
+
+    monkeypatch.setattr(processing, "transcribe_audio", transcribe)
+    monkeypatch.setattr(processing, "generate_summaries", summarize)
+    monkeypatch.setattr(processing, "reduce_summaries", reduce)
+    monkeypatch.setattr(processing.sentiment_analyzer, "analyze_sentiment", sentiment)
+    monkeypatch.setattr(processing.quiz_generator, "generate_quiz", quiz)
+    monkeypatch.setattr(processing, "finalize", finalize)
+    published = []
+    monkeypatch.setattr(store, "publish", lambda job_id, event, data: published.append((event, data)))
+
+    request = {"type": "audio", "media_path": "talk.wav", "media_hash": "abc",
+               "options": {"incremental": True, "audio_pipeline": "files", "precompute": []}}
+    asyncio.run(processing.process_job("job", request))
+
+    assert events.index("summarized") < events.index("transcribed")
+    assert len(outputs["chapters"]) == 3
+    assert outputs["summaries"]["short"].count("|") == 2
+    assert outputs["sentiment"]["sentiment"] == "POSITIVE"
+    assert len(outputs["quiz"]["mcq"]) == 3
+    chapter_events = [data for event, data in published if event == "chapter"]
+    assert [data["index"] for data in chapter_events] == [0, 1, 2]
+
+
+def test_chapter_analysis_is_reused_from_the_result_cache(store, monkeypatch):
+    calls = []
+
+    async def summarize(text, models, segments=None):
+        calls.append("summaries")
+        return {"short": text, "detailed": text, "bullets": [text], "models": {}}
+
+    async def sentiment(text, segments=None):
+        calls.append("sentiment")
+        return {"sentiment": "NEUTRAL", "confidence": 0.5,
+                "emotions": {"positive": 0.0, "negative": 0.0, "neutral": 1.0}}
+
+    async def quiz(text, num_questions, chapters=None):
+        calls.append("quiz")
+        return {"mcq": [], "true_false": []}
+
+    monkeypatch.setattr(processing, "generate_summaries", summarize)
+    monkeypatch.setattr(processing.sentiment_analyzer, "analyze_sentiment", sentiment)
+    monkeypatch.setattr(processing.quiz_generator, "generate_quiz", quiz)
+    monkeypatch.setattr(store, "publish", lambda job_id, event, data: None)
+
+    chapter = {"title": "Intro", "start_seconds": 0.0, "end_seconds": 4.0}
+    segments = [{"start": 0.0, "end": 4.0, "text": " hello there"}]
+    first = asyncio.run(processing.analyze_chapter("job", {"options": {}}, 0, chapter, segments))
+    second = asyncio.run(processing.analyze_chapter("job", {"options": {}}, 0, chapter, segments))
+
+    assert first == second
+    assert sorted(calls) == ["quiz", "sentiment", "summaries"]
@@ -0,0 +1,47 @@
+import asyncio
+
+from services.quiz_generator import QuizGenerator, select_passages
+
+TEXT = (
+    "Photosynthesis converts light into chemical energy. Plants use chlorophyll to absorb light. "
+    "The weather was nice. Chlorophyll absorbs red and blue light strongly. "
+    "Energy from light drives photosynthesis in plants. I had lunch. "
+    "Mitochondria release energy from glucose. Cells store energy as glucose molecules."
+)
+
+
+def test_passages_are_distinct_and_cover_every_chapter():
+    chapters = [
+        {"content": "Photosynthesis converts light into chemical energy. Plants use chlorophyll to absorb light."},
+        {"content": "Mitochondria release energy from glucose. Cells store energy as glucose molecules."}
+    ]
+    passages = select_passages(TEXT, 2, chapters)
+    assert len(passages) == 2
+    assert "Photosynthesis" in passages[0] or "chlorophyll" in passages[0]
+    assert "glucose" in passages[1]
+
+    passages = select_passages(TEXT, 10)
+    assert len(passages) == len(set(passages))
+
+
+def test_local_quiz_is_one_batched_call_without_duplicates():
+    calls = []
+
+    def fake_generator(prompts, **kwargs):
+        calls.append((prompts, kwargs))
+        outputs = []
+        for i, prompt in enumerate(prompts):
+            question = "What is photosynthesis?" if i % 2 else f"Question number {i}?"
+            outputs.append([{"generated_text": question}] * kwargs["num_return_sequences"])
+        return outputs
+
+    generator = QuizGenerator()
+    generator.local_generator = fake_generator
+    quiz = asyncio.run(generator._generate_quiz_locally(TEXT, num_questions=3))
+
+    assert len(calls) == 1
+    prompts, kwargs = calls[0]
+    assert kwargs["do_sample"] and kwargs["batch_size"] == len(prompts)
+    questions = [q["question"] for q in quiz["mcq"] + quiz["true_false"]]
+    assert questions.count("What is photosynthesis?") <= 2
+    assert len(set(q["question"] for q in quiz["mcq"])) == len(quiz["mcq"])
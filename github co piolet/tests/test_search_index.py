@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+
+import main
+from services import search_index
+from services.search_index import SearchIndex, match_expression
+
+
+def lecture(*texts):
+    return [{"start": 10.0 * i, "end": 10.0 * i + 10, "text": f" {text}"} for i, text in enumerate(texts)]
+
+
+def test_bm25_ranking_grouped_by_job(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_job("bio", lecture("Photosynthesis happens in the chloroplast.", "Plants need light.",
+                                 "Photosynthesis and photosynthetic pigments absorb light."))
+    index.add_job("physics", lecture("Light travels fast.", "Gravity bends light around stars."))
+
+    results = index.search("photosynthesis")
+    assert [r["job_id"] for r in results] == ["bio"]
+    assert sorted(s["segment"] for s in results[0]["segments"]) == [0, 2]
+    assert sorted(s["start"] for s in results[0]["segments"]) == [0.0, 20.0]
+    assert "[Photosynthesis]" in results[0]["segments"][0]["snippet"]
+
+    assert {r["job_id"] for r in index.search("light")} == {"bio", "physics"}
+    assert index.search("gravity stars")[0]["segments"][0]["end"] == 20.0
+    assert index.search("gravity chloroplast") == []
+    assert {r["job_id"] for r in index.search("gravity chloroplast", match_all=False)} == {"bio", "physics"}
+    assert [r["job_id"] for r in index.search("light", job_id="physics")] == ["physics"]
+
+
+def test_very_common_words_rank_only_the_newest_matches(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_CANDIDATES", 3)
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_job("old", lecture("the cell the cell the cell"))
+    index.add_job("new", lecture("the cell", "the cell", "the cell"))
+
+    assert [r["job_id"] for r in index.search("cell")] == ["new"]
+    assert [r["job_id"] for r in index.search("cell", job_id="old")] == ["old"]
+
+
+def test_reindexing_and_removal_touch_only_that_job(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_job("a", lecture("alpha beta"))
+    index.add_job("b", lecture("beta gamma", "gamma delta"))
+    index.add_job("a", lecture("epsilon"))
+
+    assert index.search("alpha") == []
+    assert [r["job_id"] for r in index.search("epsilon")] == ["a"]
+    assert index.stats() == {"jobs": 2, "segments": 3}
+
+    index.remove_job("b")
+    assert index.search("gamma") == []
+    assert index.stats() == {"jobs": 1, "segments": 1}
+    assert set(SearchIndex(index.path).indexed_jobs()) == {"a"}
+
+
+def test_query_syntax_is_never_interpreted():
+    assert match_expression('NEAR(a b) OR "x" -y*') == '"near" "a" "b" "or" "x" "y"'
+    assert match_expression("!!!") == ""
+
+
+def test_search_endpoint(tmp_path, monkeypatch):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_job("lecture-1", lecture("Introduction to thermodynamics", "Entropy always increases"))
+    monkeypatch.setattr(main, "search_index", index)
+    client = TestClient(main.app)
+
+    body = client.get("/api/v1/search", params={"q": "entropy"}).json()
+    assert body["results"][0]["job_id"] == "lecture-1"
+    assert body["results"][0]["segments"][0]["start"] == 10.0
+    assert client.get("/api/v1/search", params={"q": "entropy", "match": "some"}).status_code == 400
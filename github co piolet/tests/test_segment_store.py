@@ -0,0 +1,57 @@
+import json
+import sys
+
+from fastapi.testclient import TestClient
+
+from main import app, artifact_store, job_store
+from services.segment_store import SegmentTable, chapter_text
+
+
+def segments(count):
+    return [{"start": 3.0 * i, "end": 3.0 * i + 3, "text": f" segment {i} says héllo"} for i in range(count)]
+
+
+def test_table_matches_the_segment_dicts():
+    original = segments(50)
+    table = SegmentTable.from_segments(original)
+
+    assert len(table) == 50
+    assert table.to_segments() == original
+    assert table[-1] == original[-1]
+    assert table.text == " ".join(s["text"] for s in original)
+    assert table[10:20].to_segments() == original[10:20]
+    assert table[10:20].text == " ".join(s["text"] for s in original[10:20])
+    assert table[5:5].text == ""
+    assert chapter_text({"segment_range": [2, 4]}, table) == chapter_text({"segment_range": [2, 4]}, original)
+
+
+def test_time_range_lookup():
+    table = SegmentTable.from_segments(segments(400))
+    assert table.range_between(720, 900) == (240, 300)
+    assert table.range_between(721, 722) == (240, 241)
+    assert table.text_between(720, 726) == " segment 240 says héllo  segment 241 says héllo"
+    assert table.range_between(5000, 6000) == (400, 400)
+
+
+def test_binary_form_round_trips_and_is_compact():
+    original = segments(1000)
+    table = SegmentTable.from_segments(original)
+    data = table.to_bytes()
+    assert SegmentTable.from_bytes(data).to_segments() == original
+    assert SegmentTable.from_bytes(table[100:200].to_bytes()).to_segments() == original[100:200]
+    assert SegmentTable.from_bytes(SegmentTable.from_segments([]).to_bytes()).to_segments() == []
+
+    as_dicts = sum(sys.getsizeof(s) + sum(sys.getsizeof(v) for v in s.values()) for s in original)
+    assert table.nbytes < as_dicts / 4
+    assert len(data) < len(json.dumps(original)) * 0.6
+
+
+def test_range_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "root", str(tmp_path))
+    manifest = artifact_store.put_all("ranged", {"segments": segments(400)})
+    job_store.create("ranged", {"status": "completed", "progress": 1.0, "result": manifest})
+
+    body = TestClient(app).get("/api/v1/result/ranged/segments/range", params={"start": 720, "end": 729}).json()
+    assert body["segment_range"] == [240, 243]
+    assert [s["start"] for s in body["segments"]] == [720.0, 723.0, 726.0]
+    assert body["text"].startswith(" segment 240")
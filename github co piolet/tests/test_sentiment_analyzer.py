@@ -0,0 +1,80 @@
+import asyncio
+
+from services import sentiment_analyzer
+from services.sentiment_analyzer import SentimentAnalyzer, build_windows, sample_windows
+
+
+def segments(count):
+    return [{"start": float(i), "end": float(i + 1), "text": f"sentence {i} is here."} for i in range(count)]
+
+
+def test_windows_keep_time_spans_and_respect_size():
+    windows = build_windows("", segments(100), max_chars=100)
+    assert all(len(w["text"]) <= 100 for w in windows)
+    assert windows[0]["start"] == 0.0
+    assert windows[-1]["end"] == 100.0
+    assert all(a["end"] == b["start"] for a, b in zip(windows, windows[1:]))
+
+    sampled, step = sample_windows(windows, max_windows=5)
+    assert len(sampled) <= 5 and step > 1
+
+
+def test_local_sentiment_aggregates_windows_into_a_timeline():
+    class FakeBatcher:
+        calls = 0
+
+        async def submit(self, text):
+            FakeBatcher.calls += 1
+            number = int(text.split()[1])
+            return {"label": "POSITIVE" if number < 50 else "NEGATIVE", "score": 0.9}
+
+    analyzer = SentimentAnalyzer()
+    analyzer.batcher = FakeBatcher()
+    result = asyncio.run(analyzer._analyze_locally("", segments(100)))
+
+    timeline = result["timeline"]
+    assert len(timeline["start"]) == len(timeline["positive"]) == FakeBatcher.calls
+    assert timeline["positive"][0] == 0.9
+    assert timeline["positive"][-1] == 0.1
+    assert 0.1 < result["emotions"]["positive"] < 0.9
+    assert result["sampled_every"] == 1
+
+    FakeBatcher.calls = 0
+    sampled = asyncio.run(analyzer._analyze_locally("", segments(100), sample_every=3))
+    assert sampled["sampled_every"] == 3
+    assert FakeBatcher.calls == len(sampled["timeline"]["positive"]) < len(timeline["positive"])
+
+
+def test_api_sentiment_scores_windows_in_batches_with_the_same_shape(monkeypatch):
+    batches = []
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, inputs):
+            self.inputs = inputs
+
+        def json(self):
+            return [
+                [{"label": "joy", "score": 0.8}, {"label": "neutral", "score": 0.2}]
+                if int(text.split()[1]) < 50 else
+                [{"label": "anger", "score": 0.6}, {"label": "joy", "score": 0.2}]
+                for text in self.inputs
+            ]
+
+    async def post(model, api_key, json):
+        batches.append(len(json["inputs"]))
+        return Response(json["inputs"])
+
+    monkeypatch.setattr(sentiment_analyzer.hf_api, "post", post)
+    monkeypatch.setattr(sentiment_analyzer, "REMOTE_BATCH_SIZE", 2)
+    result = asyncio.run(SentimentAnalyzer(hf_api_key="key").analyze_sentiment("", segments(100)))
+
+    timeline = result["timeline"]
+    assert sum(batches) == len(timeline["positive"]) > 2 and max(batches) == 2
+    assert timeline["positive"][0] == 1.0
+    assert timeline["positive"][-1] == 0.25
+    assert timeline["start"][0] == 0.0
+    assert result["sampled_every"] == 1
+    assert set(result["emotions"]) == {"positive", "negative", "neutral"}
+    assert "joy" in result["detailed_emotions"]
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from services import summarizer
+from services.summarizer import map_chunks, pack_chunks, summarize_hierarchical
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word, without loading a tokenizer
+    monkeypatch.setattr(summarizer, "_count_tokens", lambda model, texts: [len(t.split()) for t in texts])
+    monkeypatch.setattr(summarizer, "_chunk_cache", summarizer.OrderedDict())
+
+
+def recording_summarizer(calls, words=3):
+    async def summarize(texts, max_length, min_length):
+        calls.append(list(texts))
+        return [" ".join(text.split()[:words]) for text in texts]
+    return summarize
+
+
+def test_pack_chunks_stays_under_the_token_budget():
+    units = ["a b c", "d e", "f g h i", "j"]
+    assert asyncio.run(pack_chunks("m", units, budget=5)) == ["a b c d e", "f g h i j"]
+
+    # An oversized unit is split on words
+    chunks = asyncio.run(pack_chunks("m", ["w " * 12, "x"], budget=5))
+    assert all(len(chunk.split()) <= 5 for chunk in chunks)
+    assert " ".join(chunks).split() == ["w"] * 12 + ["x"]
+
+
+def test_long_input_is_reduced_until_it_fits_one_pass():
+    calls = []
+    segments = [{"text": " ".join(["word"] * 300)} for _ in range(12)]
+    summarize = recording_summarizer(calls, words=400)
+    result = asyncio.run(summarize_hierarchical("", "m", summarize, 50, 5, segments))
+
+    # 3600 words -> 4 chunks of 900 -> 4 x 400 words -> 2 chunks -> 2 x 400 words -> one pass
+    assert result["reduce_depth"] == 2
+    assert len(result["chunk_summaries"]) == 4
+    assert [len(batch) for batch in calls] == [4, 2, 1]
+    assert all(len(text.split()) <= summarizer.CHUNK_TOKENS for batch in calls for text in batch)
+
+
+def test_map_chunks_reuses_cached_chunk_summaries():
+    calls = []
+    summarize = recording_summarizer(calls, words=1)
+    assert asyncio.run(map_chunks("m", ["a b", "c d"], summarize)) == ["a", "c"]
+    assert asyncio.run(map_chunks("m", ["c d", "e f"], summarize)) == ["c", "e"]
+    assert calls == [["a b", "c d"], ["e f"]]
+    # Another model never shares cache entries
+    asyncio.run(map_chunks("other", ["a b"], summarize))
+    assert calls[-1] == ["a b"]
+
+
+def test_empty_input_returns_an_empty_summary_without_calling_the_model(monkeypatch):
+    def no_tokenizer(model, texts):
+        raise AssertionError("tokenizer called")
+    monkeypatch.setattr(summarizer, "_count_tokens", no_tokenizer)
+    calls = []
+
+    result = asyncio.run(summarize_hierarchical("  ", "m", recording_summarizer(calls), 50, 5, []))
+    assert result == {"summary": "", "chunk_summaries": [], "reduce_depth": 0}
+    assert calls == []
+
+
+def test_map_chunks_survives_eviction_by_concurrent_jobs(monkeypatch):
+    monkeypatch.setattr(summarizer, "CHUNK_CACHE_SIZE", 2)
+
+    async def summarize(texts, max_length, min_length):
+        await asyncio.sleep(0.01)
+        return [text.split()[0] for text in texts]
+
+    async def run():
+        jobs = [map_chunks("m", [f"{job}{i} words" for i in range(6)], summarize) for job in "abc"]
+        return await asyncio.gather(*jobs)
+
+    results = asyncio.run(run())
+    assert results == [[f"{job}{i}" for i in range(6)] for job in "abc"]
+    assert len(summarizer._chunk_cache) == 2
@@ -0,0 +1,119 @@
+import pytest
+
+from services import processing, tasks
+from services.artifacts import ArtifactStore
+from services.database import JobRepository, create_engine
+from services.job_store import MemoryJobStore
+from services.search_index import SearchIndex
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = MemoryJobStore()
+    repository = JobRepository(create_engine(f"sqlite:///{tmp_path / 'jobs.db'}"))
+    tasks.run_async(repository.init_db())
+    monkeypatch.setattr(processing, "job_store", store)
+    monkeypatch.setattr(processing, "job_repository", repository)
+    monkeypatch.setattr(processing, "artifact_store", ArtifactStore(str(tmp_path / "artifacts")))
+    monkeypatch.setattr(processing, "search_index", SearchIndex(str(tmp_path / "search.sqlite3")))
+    tasks.celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        task_always_eager=True,
+        task_eager_propagates=True
+    )
+    return store
+
+
+def fake_stages(request_data, transcript_data):
+    async def echo(deps):
+        return {"text": transcript_data["text"], **deps}
+
+    async def language(_):
+        return "fr"
+
+    stages = {name: echo for name in processing.STAGES}
+    stages["language"] = language
+    return stages
+
+
+def test_job_chain_runs_every_stage_and_completes(store, monkeypatch):
+    async def ingest(job_id, request_data):
+        return {"text": request_data["text"], "segments": [], "language": None}
+
+    monkeypatch.setattr(processing, "ingest", ingest)
+    monkeypatch.setattr(processing, "build_stages", fake_stages)
+
+    store.create("job-1", {"status": "queued", "progress": 0.0})
+    tasks.enqueue_job("job-1", {"type": "text", "text": "hello", "options": {"precompute": list(processing.STAGES)}})
+
+    job = store.get("job-1")
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert processing.artifact_store.get("job-1", "language") == "fr"
+    assert processing.artifact_store.get("job-1", "translations") == {"text": "hello", "language": "fr"}
+    assert set(job["result"]) == {"transcript", "segments", *processing.STAGES}
+    assert set(job["stages"]) == set(processing.STAGES)
+    assert all(state["status"] == "completed" for state in job["stages"].values())
+
+
+def test_failed_ingest_marks_job_failed(store, monkeypatch):
+    async def ingest(job_id, request_data):
+        raise Exception("Download failed: 404")
+
+    monkeypatch.setattr(processing, "ingest", ingest)
+
+    store.create("job-2", {"status": "queued", "progress": 0.0})
+    with pytest.raises(Exception):
+        tasks.enqueue_job("job-2", {"type": "video", "url": "http://x", "options": {}})
+
+    job = store.get("job-2")
+    assert job["status"] == "failed"
+    assert "404" in job["error"]
+
+
+def test_only_precomputed_stages_run_on_workers(store, monkeypatch):
+    async def ingest(job_id, request_data):
+        return {"text": request_data["text"], "segments": [], "language": None}
+
+    monkeypatch.setattr(processing, "ingest", ingest)
+    monkeypatch.setattr(processing, "build_stages", fake_stages)
+
+    store.create("job-3", {"status": "queued", "progress": 0.0})
+    tasks.enqueue_job("job-3", {"type": "text", "text": "hello", "options": {"precompute": ["summaries"]}})
+
+    job = store.get("job-3")
+    assert job["status"] == "completed"
+    assert set(job["result"]) == {"transcript", "segments", "summaries"}
+
+
+def test_only_the_job_id_travels_down_the_chain(store, monkeypatch):
+    segments = [{"start": 0.0, "end": 2.0, "text": " hello there"}]
+
+    async def ingest(job_id, request_data):
+        return {"text": " hello there", "segments": segments, "language": "en"}
+
+    monkeypatch.setattr(processing, "ingest", ingest)
+    monkeypatch.setattr(processing, "build_stages", fake_stages)
+
+    store.create("job-4", {"status": "queued", "progress": 0.0})
+    assert tasks.ingest_task("job-4", {"type": "audio", "options": {}}) == "job-4"
+    assert "transcript_data" not in store.get("job-4")
+    assert processing.artifact_store.get("job-4", "transcript") == " hello there"
+
+    stage = tasks.stage_task("job-4", "job-4", {"type": "audio", "options": {}}, "summaries")
+    assert stage == {"stage": "summaries", "result": {"text": " hello there"}}
+
+    tasks.finalize_task([stage], "job-4")
+    assert set(store.get("job-4")["result"]) == {"transcript", "segments", "summaries"}
+    assert processing.artifact_store.get("job-4", "segments").to_segments() == segments
+
+
+def test_worker_start_creates_the_job_tables(monkeypatch, tmp_path):
+    url = f"sqlite:///{tmp_path / 'worker.db'}"
+    monkeypatch.setattr(tasks, "JobRepository", lambda: JobRepository(create_engine(url)))
+
+    tasks.create_job_tables()
+
+    repository = JobRepository(create_engine(url))
+    assert tasks.run_async(repository.get_job("missing")) is None
@@ -0,0 +1,50 @@
+import numpy as np
+
+from services import transcriber
+from services.executor import InferencePool
+from services.transcriber import find_split_points, stitch_segments
+
+
+def test_stitch_drops_overlap_and_repeated_words():
+    first = [
+        {"start": 0.0, "end": 4.0, "text": " Welcome to the lecture"},
+        {"start": 4.0, "end": 10.5, "text": " today we cover sorting"},
+    ]
+    # Second chunk starts one second early and re-transcribes the seam
+    second = [
+        {"start": 9.0, "end": 9.8, "text": " cover sorting"},
+        {"start": 10.2, "end": 14.0, "text": " sorting algorithms in depth"},
+    ]
+
+    segments = stitch_segments([first, second], seams=[10.0])
+
+    assert [s["text"] for s in segments] == [
+        " Welcome to the lecture",
+        " today we cover sorting",
+        " algorithms in depth",
+    ]
+
+
+def test_split_points_prefer_quiet_regions():
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 0.3, sample_rate * 60).astype(np.float32)
+    quiet = slice(sample_rate * 27, sample_rate * 28)
+    audio[quiet] = 0.0
+
+    cuts = find_split_points(audio, 2, sample_rate)
+
+    assert len(cuts) == 1
+    assert quiet.start <= cuts[0] < quiet.stop
+
+
+def test_whisper_threads_split_the_cores_across_chunk_workers(monkeypatch):
+    monkeypatch.delenv("WHISPER_CPU_THREADS", raising=False)
+    monkeypatch.setattr(transcriber.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(transcriber, "get_pool", lambda kind: InferencePool(kind, 4 if kind == "whisper-chunks" else 1))
+
+    assert transcriber.whisper_cpu_threads() == 8
+    monkeypatch.setattr(transcriber.multiprocessing, "parent_process", lambda: object())
+    assert transcriber.whisper_cpu_threads() == 2
+    monkeypatch.setenv("WHISPER_CPU_THREADS", "3")
+    assert transcriber.whisper_cpu_threads() == 3
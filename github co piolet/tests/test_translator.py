@@ -0,0 +1,50 @@
+import asyncio
+
+from services.translation_memory import TranslationMemory
+from services import translator as translator_module
+from services.translator import Translator, split_sentences
+
+
+def test_split_sentences_caps_length_at_word_boundaries():
+    text = "Short one. " + "word " * 200 + "end."
+    sentences = split_sentences(text, max_chars=100)
+    assert sentences[0] == "Short one."
+    assert all(len(s) <= 100 for s in sentences)
+    assert " ".join(sentences[1:]).split() == ("word " * 200 + "end.").split()
+
+
+def test_repeated_sentences_are_translated_once_and_remembered(tmp_path, monkeypatch):
+    monkeypatch.setattr(translator_module, "translation_memory", TranslationMemory(str(tmp_path / "tm.sqlite3")))
+    translated = []
+
+    async def fake_local(model_id, sentences):
+        translated.extend(sentences)
+        return [s.upper() for s in sentences]
+
+    translator = Translator()
+    monkeypatch.setattr(translator, "_translate_locally", fake_local)
+
+    text = "Hello there. Thank you. Hello there. Goodbye."
+    result = asyncio.run(translator.translate(text, "ta"))
+    assert result["translated_text"] == "HELLO THERE. THANK YOU. HELLO THERE. GOODBYE."
+    assert translated == ["Hello there.", "Thank you.", "Goodbye."]
+
+    translated.clear()
+    again = asyncio.run(translator.translate("Goodbye. Hello there. New sentence.", "ta"))
+    assert again["translated_text"] == "GOODBYE. HELLO THERE. NEW SENTENCE."
+    assert translated == ["New sentence."]
+
+
+def test_source_language_is_reported_as_given_or_detected(tmp_path, monkeypatch):
+    monkeypatch.setattr(translator_module, "translation_memory", TranslationMemory(str(tmp_path / "tm.sqlite3")))
+    translator = Translator()
+
+    async def fake_local(model_id, sentences):
+        return ["translated"] * len(sentences)
+
+    monkeypatch.setattr(translator, "_translate_locally", fake_local)
+
+    french = "Bonjour à tous, nous allons parler de la photosynthèse et des plantes aujourd'hui."
+    assert asyncio.run(translator.translate(french, "en"))["source_lang"] == "fr"
+    assert asyncio.run(translator.translate(french, "en", source_lang="de"))["source_lang"] == "de"
+    assert asyncio.run(translator.translate("Hello everyone, welcome to the lecture.", "ta"))["source_lang"] == "en"
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import hashlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import downloader
+from services.downloader import receive_form
+
+BOUNDARY = "testboundary"
+
+
+def multipart_body(payload: bytes, filename: str = "lecture.mp3", fields=None) -> bytes:
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: audio/mpeg\r\n\r\n".encode() + payload + b"\r\n"
+    )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def chunked(body: bytes, size: int = 4096):
+    # A generator body is sent without Content-Length
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+@pytest.fixture
+def uploads(monkeypatch, tmp_path):
+    monkeypatch.setattr(downloader, "UPLOAD_DIR", str(tmp_path))
+    submitted = []
+
+    async def process_job(job_id, request_data):
+        submitted.append(request_data)
+
+    monkeypatch.setattr(main, "process_job", process_job)
+    monkeypatch.setattr(main, "receive_form", functools.partial(receive_form, max_bytes=100_000))
+    return tmp_path, submitted
+
+
+def post(body, **kwargs):
+    return TestClient(main.app).post(
+        "/api/v1/submit",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}", **kwargs.pop("headers", {})},
+        **kwargs
+    )
+
+
+def test_upload_is_streamed_to_a_file_named_by_its_hash(uploads):
+    tmp_path, submitted = uploads
+    payload = os.urandom(60_000)
+    response = post(chunked(multipart_body(payload, fields={"type": "audio", "options": '{"quiz": true}'})))
+
+    assert response.status_code == 200
+    digest = hashlib.sha256(payload).hexdigest()
+    assert submitted[0]["type"] == "audio"
+    assert submitted[0]["options"] == {"quiz": True}
+    assert submitted[0]["media_hash"] == digest
+    assert submitted[0]["media_path"] == os.path.join(str(tmp_path), f"{digest}.mp3")
+    assert os.listdir(tmp_path) == [f"{digest}.mp3"]
+    with open(submitted[0]["media_path"], "rb") as f:
+        assert f.read() == payload
+
+
+def test_declared_length_over_the_limit_is_rejected_before_reading(uploads):
+    tmp_path, submitted = uploads
+    body = multipart_body(os.urandom(1_200_000))
+
+    response = post(body)
+
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == [] and submitted == []
+
+
+def test_oversized_stream_is_cut_off_and_the_partial_file_removed(uploads):
+    tmp_path, submitted = uploads
+
+    response = post(chunked(multipart_body(os.urandom(150_000))))
+
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == [] and submitted == []
+
+
+def test_truncated_body_leaves_no_partial_file(uploads):
+    tmp_path, submitted = uploads
+    body = multipart_body(os.urandom(50_000))
+
+    response = post(chunked(body[:30_000]))
+
+    assert response.status_code == 400
+    assert os.listdir(tmp_path) == [] and submitted == []
+
+
+def test_rejected_submission_deletes_its_upload(uploads):
+    tmp_path, submitted = uploads
+
+    response = post(multipart_body(os.urandom(10_000), fields={"options": "not json"}))
+
+    assert response.status_code == 400
+    assert os.listdir(tmp_path) == [] and submitted == []
+
+
+def test_cancelled_upload_leaves_no_partial_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "UPLOAD_DIR", str(tmp_path))
+    body = multipart_body(os.urandom(50_000))
+
+    class Disconnecting:
+        headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+        async def stream(self):
+            yield body[:30_000]
+            raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(receive_form(Disconnecting()))
+    assert os.listdir(tmp_path) == []